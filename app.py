@@ -1,44 +1,51 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 
-from utils.alpha_live import live_divergence_signal
-from utils.alpha_history import fetch_history
-from utils.yahoo_data import fetch_intraday
-from utils.bot_engine import BotEngine
+from utils.alpha_live import SNAPSHOT_TTL_SECONDS, get_market_snapshot
+from utils.bot_runner import read_status
 from modules.es_vix_engine import calculate_signal
 
+# Each panel is an st.fragment: its timer and its widgets rerun only that
+# panel, so a click in one section never refetches or redraws the others.
+LIVE_REFRESH_SECONDS = SNAPSHOT_TTL_SECONDS   # a new snapshot is due by then
+BOT_REFRESH_SECONDS = 15                      # the runner's default poll interval
+
 # ---------------------------------------------------------
-# LIVE SIGNAL SECTION (SPY + ^VIX via Yahoo)
+# LIVE PANEL (SPY + ^VIX via the provider registry)
 # ---------------------------------------------------------
 
-st.header("📡 Live ES + VIX Divergence Signal")
 
-live = live_divergence_signal()
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_panel():
+    snapshot = get_market_snapshot()
+    live = snapshot["signal"]
 
-if live is None:
-    st.info(
-        "No intraday candles available right now. This usually happens when the US market is closed "
-        "or data hasn't published the latest minute bars yet."
-    )
-else:
-    st.success(f"Signal: {live['signal']}")
-    st.write(f"SPY move: {live['es_move']:.2f}")
-    st.write(f"VIX move: {live['vix_move']:.2f}")
-    st.write(f"SPY close: {live['spy_close']:.2f}")
-    st.write(f"VIX close: {live['vix_close']:.2f}")
+    st.header("📡 Live ES + VIX Divergence Signal")
 
-# ---------------------------------------------------------
-# LIVE MARKET DASHBOARD (Stage 3)
-# ---------------------------------------------------------
+    if live is None:
+        st.info(
+            "No intraday candles available right now. This usually happens when the US market is closed "
+            "or data hasn't published the latest minute bars yet."
+        )
+    else:
+        if snapshot.get("source") and snapshot["source"] != "yahoo":
+            st.caption(f"Data source: {snapshot['source']} (Yahoo unavailable)")
+        st.success(f"Signal: {live['signal']}")
+        st.write(f"SPY move: {live['es_move']:.2f}")
+        st.write(f"VIX move: {live['vix_move']:.2f}")
+        st.write(f"SPY close: {live['spy_close']:.2f}")
+        st.write(f"VIX close: {live['vix_close']:.2f}")
+
+    # ---------------------------------------------------------
+    # LIVE MARKET DASHBOARD (Stage 3)
+    # ---------------------------------------------------------
 
-st.header("📊 Live Market Dashboard")
+    st.header("📊 Live Market Dashboard")
 
-live = live_divergence_signal()
+    if live is None:
+        st.info("Waiting for intraday data… market may be closed or data not yet available.")
+        return
 
-if live is None:
-    st.info("Waiting for intraday data… market may be closed or data not yet available.")
-else:
     col1, col2, col3 = st.columns(3)
 
     with col1:
@@ -71,10 +78,10 @@ else:
     # Live charts (SPY + VIX intraday)
     st.subheader("📈 Live SPY & VIX Charts")
 
-    try:
-        spy_live = fetch_intraday("SPY", period="1d", interval="1m")
-        vix_live = fetch_intraday("^VIX", period="1d", interval="1m")
+    spy_live = snapshot["spy"]
+    vix_live = snapshot["vix"]
 
+    try:
         if spy_live is not None:
             st.line_chart(spy_live["Close"], height=200)
 
@@ -86,6 +93,23 @@ else:
 
     st.write("---")
 
+    # Session divergence: open to now, from the same snapshot
+    if spy_live is not None and vix_live is not None:
+        st.subheader("ES + VIX Signal")
+
+        result = calculate_signal(
+            float(spy_live["Open"].iloc[0]), float(spy_live["Close"].iloc[-1]),
+            float(vix_live["Open"].iloc[0]), float(vix_live["Close"].iloc[-1]),
+        )
+
+        st.write(f"Signal: {result['signal']}")
+        st.write(f"Confidence: {result['confidence']} / 5")
+        st.write(f"SPY Change: {result['spy_change']}%")
+        st.write(f"VIX Change: {result['vix_change']}%")
+        st.write(f"Reason: {result['reason']}")
+
+        st.write("---")
+
     # Sentiment gauge
     st.subheader("🧭 Market Sentiment Gauge")
 
@@ -100,250 +124,164 @@ else:
 
     st.info(f"VIX Level: **{vix_level:.2f}** → {sentiment}")
 
+
 # ---------------------------------------------------------
-# AUTOMATION SECTION (Stage 4)
+# BOT PANEL (Stage 4, driven by the runner's status file)
 # ---------------------------------------------------------
 
-st.header("🤖 Automated Trading Bot")
-
-st.info("This section runs the bot in simulation mode. No real trades are executed.")
-
-# Keep a single BotEngine instance in session state
-if "bot" not in st.session_state:
-    st.session_state.bot = BotEngine()
 
-bot = st.session_state.bot
+@st.fragment(run_every=BOT_REFRESH_SECONDS)
+def bot_panel():
+    st.header("🤖 Automated Trading Bot")
 
-enable_bot = st.checkbox("Enable automated trading (simulation mode)")
+    st.info("This section shows the bot running in simulation mode. No real trades are executed.")
 
-broker = st.selectbox(
-    "Select broker (architecture only at this stage)",
-    ["Interactive Brokers (IBKR)", "Alpaca", "None"]
-)
+    # The bot is driven by the headless runner (python -m utils.bot_runner);
+    # this panel only reads the status it publishes.
+    status = read_status()
 
-bot.set_broker(broker)
-
-if enable_bot:
-    st.success("Automation enabled (simulation mode).")
-else:
-    st.warning("Automation disabled.")
-
-# Show current live signal feeding the bot
-live = live_divergence_signal()
-if live:
-    st.write("### 🔌 Live Signal Feed")
-    st.write(f"Signal: **{live['signal']}**")
-    st.write(f"SPY move: {live['es_move']:.4f}")
-    st.write(f"VIX move: {live['vix_move']:.4f}")
-else:
-    st.write("Waiting for live data…")
-
-st.write("---")
-
-# Manual simulation controls (stand-in for scheduled open/close checks)
-col_a, col_b = st.columns(2)
-
-with col_a:
-    if st.button("Simulate Market OPEN Check"):
-        if enable_bot and live:
-            if bot.should_enter(live["signal"]):
-                bot.enter_trade(live["signal"], price=live["spy_close"])
+    if status is None:
+        st.warning(
+            "Bot runner is not running. Start it with "
+            "`python -m utils.bot_runner --broker alpaca` (simulation mode)."
+        )
+    else:
+        last_poll = status.get("last_poll")
+        state = "not responding" if status.get("stale") else "running" if status["running"] else "stopped"
+        st.write(f"Runner: **{state}** · "
+                 f"Phase: **{status['phase']}** · Broker: **{status['broker'] or 'None'}**")
+        st.caption(f"Last poll: {last_poll or 'never'} · Next session: {status['next_open']}")
+
+        if status.get("stale"):
+            st.warning("The bot runner stopped publishing status; it may have been killed. "
+                       "The details below are from its last poll.")
+
+        latency = status.get("broker_latency") or {}
+        if latency.get("count"):
+            st.caption(f"Order ack latency: p50 {latency['p50_ms']:.1f} ms · "
+                       f"p95 {latency['p95_ms']:.1f} ms · {latency['count']} orders")
+
+        if status.get("last_error"):
+            st.error(f"Last runner error: {status['last_error']}")
+
+    # Show current live signal feeding the bot (shared snapshot, no extra fetch)
+    live = get_market_snapshot()["signal"]
+    if live:
+        st.write("### 🔌 Live Signal Feed")
+        st.write(f"Signal: **{live['signal']}**")
+        st.write(f"SPY move: {live['es_move']:.4f}")
+        st.write(f"VIX move: {live['vix_move']:.4f}")
+    else:
+        st.write("Waiting for live data…")
 
-with col_b:
-    if st.button("Simulate Market CLOSE Check"):
-        if enable_bot and live:
-            if bot.should_exit():
-                bot.exit_trade(price=live["spy_close"])
+    st.write("---")
 
-# Bot status
-status = bot.get_status()
+    if status is not None:
+        st.write("### 📌 Bot Status")
+        positions = status.get("positions") or {}
+        if len(positions) > 1:
+            st.table(pd.DataFrame(
+                [{"Strategy": name, "Position": side or "—"} for name, side in positions.items()]
+            ))
+        elif status["position"]:
+            st.write(f"Current position: **{status['position']}**")
+        else:
+            st.write("No open position.")
 
-st.write("### 📌 Bot Status")
-if status["position"]:
-    st.write(f"Current position: **{status['position']}**")
-else:
-    st.write("No open position.")
+        st.write("### 📜 Last Executed Trade")
+        if status["last_trade"]:
+            st.info(status["last_trade"])
+        else:
+            st.info("No trades executed yet (simulation mode).")
 
-st.write("### 📜 Last Executed Trade")
-if status["last_trade"]:
-    st.info(status["last_trade"])
-else:
-    st.info("No trades executed yet (simulation mode).")
+        st.write("### 🧾 Recent Bot Log")
+        if status["log"]:
+            for line in status["log"]:
+                st.write(f"- {line}")
+        else:
+            st.write("Log is empty.")
 
-st.write("### 🧾 Recent Bot Log")
-if status["log"]:
-    for line in status["log"]:
-        st.write(f"- {line}")
-else:
-    st.write("Log is empty.")
 
 # ---------------------------------------------------------
-# BACKTEST SECTION (SPY + ^VIX via Yahoo)
+# BACKTEST PANEL (SPY + ^VIX via Yahoo)
 # ---------------------------------------------------------
 
-st.header("📅 Backtest ES + VIX Divergence Strategy")
 
-start_date = st.date_input("Start date", key="bt_start")
-end_date = st.date_input("End date", key="bt_end")
+@st.fragment
+def backtest_panel():
+    st.header("📅 Backtest ES + VIX Divergence Strategy")
 
-if st.button("Run Backtest", key="bt_run"):
-    if start_date >= end_date:
-        st.error("End date must be after start date.")
-    else:
-        spy, vix = fetch_history(
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d")
-        )
+    start_date = st.date_input("Start date", key="bt_start")
+    end_date = st.date_input("End date", key="bt_end")
 
-        if spy is None or vix is None or spy.empty or vix.empty:
-            st.warning("Yahoo Finance returned no historical data for the selected range.")
+    if st.button("Run Backtest", key="bt_run"):
+        if start_date >= end_date:
+            st.error("End date must be after start date.")
+            st.session_state.pop("bt_range", None)
         else:
-            st.success("Historical data loaded successfully.")
-
-            # Merge on Date
-            df = pd.merge(spy, vix, on="Date", suffixes=("_SPY", "_VIX"))
-            df = df.sort_values("Date").reset_index(drop=True)
-
-            # Flatten MultiIndex columns
-            df.columns = [
-                f"{col[0]}{col[1]}" if isinstance(col, tuple) else col
-                for col in df.columns
-            ]
-
-            # DEBUG: Show columns
-            st.write("🔍 Columns returned by Yahoo Finance:", list(df.columns))
-
-            # FIX: Rename Yahoo’s weird suffixes to expected names
-            rename_map = {
-                "OpenSPY": "Open_SPY",
-                "CloseSPY": "Close_SPY",
-                "HighSPY": "High_SPY",
-                "LowSPY": "Low_SPY",
-                "VolumeSPY": "Volume_SPY",
-
-                "Open^VIX": "Open_VIX",
-                "Close^VIX": "Close_VIX",
-                "High^VIX": "High_VIX",
-                "Low^VIX": "Low_VIX",
-                "Volume^VIX": "Volume_VIX",
-            }
-
-            df = df.rename(columns=rename_map)
-
-            # Validate required columns
-            required_cols = ["Open_SPY", "Close_SPY", "Open_VIX", "Close_VIX"]
-            missing = [c for c in required_cols if c not in df.columns]
-
-            if missing:
-                st.error(f"Missing expected columns after renaming: {missing}")
-                st.stop()
-
-            # ---------------------------------------------------------
-            # Divergence logic with aggressive thresholds (0.05%)
-            # ---------------------------------------------------------
-            df["ES_pct"] = (df["Close_SPY"] - df["Open_SPY"]) / df["Open_SPY"]
-            df["VIX_pct"] = (df["Close_VIX"] - df["Open_VIX"]) / df["Open_VIX"]
-
-            threshold = 0.0005  # 0.05%
-
-            df["Signal"] = np.where(
-                (df["ES_pct"] > threshold) & (df["VIX_pct"] < -threshold), "LONG",
-                np.where(
-                    (df["ES_pct"] < -threshold) & (df["VIX_pct"] > threshold), "SHORT",
-                    "NONE"
-                )
-            )
-
-            # ---------------------------------------------------------
-            # Trade simulation
-            # ---------------------------------------------------------
-            trades = []
-            equity = 10000
-            position_size = 10000
-
-            for i in range(len(df)):
-                row = df.iloc[i]
-
-                if row["Signal"] == "LONG":
-                    ret = (row["Close_SPY"] - row["Open_SPY"]) / row["Open_SPY"]
-                    pnl = position_size * ret
-                    trades.append([row["Date"], "LONG", pnl])
-                    equity += pnl
-
-                elif row["Signal"] == "SHORT":
-                    ret = (row["Open_SPY"] - row["Close_SPY"]) / row["Open_SPY"]
-                    pnl = position_size * ret
-                    trades.append([row["Date"], "SHORT", pnl])
-                    equity += pnl
-
-            trades_df = pd.DataFrame(trades, columns=["Date", "Side", "PnL"])
-
-            if len(trades_df) > 0:
-                trades_df["Equity"] = 10000 + trades_df["PnL"].cumsum()
-
-            # ---------------------------------------------------------
-            # Display results
-            # ---------------------------------------------------------
-            st.subheader("📈 Trade Log")
-            st.dataframe(trades_df)
-
-            st.subheader("💰 Final Equity")
-            st.metric("Final Value", f"${equity:,.2f}")
-
-            st.subheader("📉 Equity Curve")
-            if len(trades_df) > 0:
-                st.line_chart(trades_df.set_index("Date")["Equity"])
-
-            # ---------------------------------------------------------
-            # 📊 Strategy Analytics (Stage 1)
-            # ---------------------------------------------------------
-            if len(trades_df) > 0:
-                trades_df["Return"] = trades_df["PnL"] / position_size
-
-                total_return = (equity / 10000) - 1
-                wins = trades_df[trades_df["PnL"] > 0]
-                losses = trades_df[trades_df["PnL"] < 0]
-
-                win_rate = len(wins) / len(trades_df) if len(trades_df) > 0 else 0
-                avg_win = wins["PnL"].mean() if len(wins) > 0 else 0
-                avg_loss = losses["PnL"].mean() if len(losses) > 0 else 0
-
-                expectancy = win_rate * avg_win + (1 - win_rate) * avg_loss
-
-                equity_curve = trades_df["Equity"]
-                running_max = equity_curve.cummax()
-                drawdown = (equity_curve - running_max) / running_max
-                max_drawdown = drawdown.min()
-
-                if trades_df["Return"].std() != 0:
-                    sharpe = (trades_df["Return"].mean() / trades_df["Return"].std()) * np.sqrt(252)
-                else:
-                    sharpe = 0.0
-
-                st.subheader("📊 Strategy Stats")
-                st.write(f"**Total Return:** {total_return:.2%}")
-                st.write(f"**Win Rate:** {win_rate:.2%}")
-                st.write(f"**Average Win:** ${avg_win:,.2f}")
-                st.write(f"**Average Loss:** ${avg_loss:,.2f}")
-                st.write(f"**Expectancy per Trade:** ${expectancy:,.2f}")
-                st.write(f"**Max Drawdown:** {max_drawdown:.2%}")
-                st.write(f"**Sharpe Ratio (approx):** {sharpe:.2f}")
-
-            # ---------------------------------------------------------
-            # CSV Export
-            # ---------------------------------------------------------
-            st.subheader("⬇️ Download Results")
-            csv = trades_df.to_csv(index=False)
-            st.download_button("Download CSV", csv, "backtest_results.csv", "text/csv")
-            st.subheader("ES + VIX Signal")
-
-result = calculate_signal(spy_open, spy_now, vix_open, vix_now)
-
-st.write(f"Signal: {result['signal']}")
-st.write(f"Confidence: {result['confidence']} / 5")
-st.write(f"SPY Change: {result['spy_change']}%")
-st.write(f"VIX Change: {result['vix_change']}%")
-st.write(f"Reason: {result['reason']}")
+            st.session_state["bt_range"] = (start_date.strftime("%Y-%m-%d"),
+                                            end_date.strftime("%Y-%m-%d"))
 
+    # The last requested range stays on screen across reruns; its result
+    # comes from the backtest cache, so redrawing it costs no recompute.
+    if "bt_range" not in st.session_state:
+        return
+    start, end = st.session_state["bt_range"]
 
+    # Loaded on demand: yfinance and the backtest engine are the slowest
+    # imports and most page views never run a backtest.
+    from utils.backtest import cached_backtest
 
+    try:
+        result = cached_backtest("SPY", "^VIX", start, end)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    if result is None:
+        st.warning("Yahoo Finance returned no historical data for the selected range.")
+        return
+
+    st.success(f"Backtest for {start} → {end}.")
+
+    trades_df = result["trades"]
+    equity = result["equity"]
+    stats = result["stats"]
+
+    # ---------------------------------------------------------
+    # Display results
+    # ---------------------------------------------------------
+    st.subheader("📈 Trade Log")
+    st.dataframe(trades_df)
+
+    st.subheader("💰 Final Equity")
+    st.metric("Final Value", f"${equity:,.2f}")
+
+    st.subheader("📉 Equity Curve")
+    if len(trades_df) > 0:
+        st.line_chart(trades_df.set_index("Date")["Equity"])
+
+    # ---------------------------------------------------------
+    # 📊 Strategy Analytics (Stage 1)
+    # ---------------------------------------------------------
+    if stats is not None:
+        st.subheader("📊 Strategy Stats")
+        st.write(f"**Total Return:** {stats['total_return']:.2%}")
+        st.write(f"**Win Rate:** {stats['win_rate']:.2%}")
+        st.write(f"**Average Win:** ${stats['avg_win']:,.2f}")
+        st.write(f"**Average Loss:** ${stats['avg_loss']:,.2f}")
+        st.write(f"**Expectancy per Trade:** ${stats['expectancy']:,.2f}")
+        st.write(f"**Max Drawdown:** {stats['max_drawdown']:.2%}")
+        st.write(f"**Sharpe Ratio (approx):** {stats['sharpe']:.2f}")
+
+    # ---------------------------------------------------------
+    # CSV Export
+    # ---------------------------------------------------------
+    st.subheader("⬇️ Download Results")
+    csv = trades_df.to_csv(index=False)
+    st.download_button("Download CSV", csv, "backtest_results.csv", "text/csv")
+
+
+live_panel()
+bot_panel()
+backtest_panel()
@@ -0,0 +1,4 @@
+"""
+Offline benchmark suite: `python -m benchmarks run`, then
+`python -m benchmarks compare` to diff the last two stored runs.
+"""
@@ -0,0 +1,127 @@
+import argparse
+import fnmatch
+import gc
+import statistics
+import sys
+import time
+
+from benchmarks import fixtures, results, startup
+from benchmarks.suite import BENCHMARKS, DATA_SIZES
+
+# Runs at or above this many rows are capped at LARGE_REPEAT repeats
+LARGE_ROWS = 1_000_000
+LARGE_REPEAT = 3
+
+SOURCE_HELP = ("synthetic: generated offline (default). recorded: replays the CSVs that "
+               "`python -m benchmarks record` downloads into benchmarks/fixtures/recorded; "
+               "they are not committed, so record once with network access first")
+
+
+def measure(fn, repeat):
+    """Seconds per call over `repeat` calls, after one warm-up, with GC paused like timeit."""
+    fn()
+    times = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return times
+
+
+def run_benchmarks(patterns=("*",), sizes=DATA_SIZES, repeat=5, source="synthetic", out=sys.stdout):
+    """Run every matching benchmark at every size. Returns a list of result dicts."""
+    rows_for = [fixtures.parse_size(s) for s in sizes]
+    collected = []
+    for name, bench in BENCHMARKS.items():
+        if not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        for rows in (bench.sizes if bench.sizes == (None,) else rows_for):
+            if rows is not None and bench.max_rows is not None and rows > bench.max_rows:
+                continue
+            n = min(repeat, LARGE_REPEAT) if rows and rows >= LARGE_ROWS else repeat
+            with bench.setup(rows, source) as fn:
+                times = measure(fn, n)
+            result = {
+                "benchmark": name,
+                "rows": rows,
+                "repeat": n,
+                "min_s": min(times),
+                "median_s": statistics.median(times),
+                "mean_s": statistics.fmean(times),
+                "rows_per_s": rows / statistics.median(times) if rows else None,
+            }
+            collected.append(result)
+            print(f"{results.key(result):<45} median {result['median_s'] * 1000:>10.2f} ms  "
+                  f"min {result['min_s'] * 1000:>10.2f} ms", file=out, flush=True)
+    return collected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Offline benchmarks for the backtest, engine and feeds.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks and store the results")
+    run.add_argument("patterns", nargs="*", default=["*"], help="Benchmark name globs, e.g. 'indicators.*'")
+    run.add_argument("--sizes", nargs="+", default=list(DATA_SIZES), help="Fixture rows: 1k 100k 5m or a number")
+    run.add_argument("--repeat", type=int, default=5,
+                     help=f"Timed calls per benchmark (at most {LARGE_REPEAT} from {LARGE_ROWS:,} rows)")
+    run.add_argument("--source", choices=["synthetic", "recorded"], default="synthetic", help=SOURCE_HELP)
+    run.add_argument("--label", help="Name for this run, e.g. 'baseline' or 'after-vectorize'")
+    run.add_argument("--results", default=results.RESULTS_FILE)
+    run.add_argument("--no-save", action="store_true", help="Print results without storing them")
+
+    compare = commands.add_parser("compare", help="Compare two stored runs (default: the last two)")
+    compare.add_argument("base", nargs="?", default="-2", help="Label, commit prefix or index")
+    compare.add_argument("head", nargs="?", default="-1", help="Label, commit prefix or index")
+    compare.add_argument("--threshold", type=float, default=results.REGRESSION_THRESHOLD)
+    compare.add_argument("--results", default=results.RESULTS_FILE)
+
+    fixture = commands.add_parser("fixtures", help="Generate fixture files ahead of a run")
+    fixture.add_argument("--sizes", nargs="+", default=list(DATA_SIZES))
+    fixture.add_argument("--source", choices=["synthetic", "recorded"], default="synthetic", help=SOURCE_HELP)
+
+    budget = commands.add_parser("startup", help="Check cold-start import time against the budgets")
+    budget.add_argument("scripts", nargs="*", help="Scripts to check (default: all budgeted ones)")
+
+    record = commands.add_parser("record", help="Download real daily SPY/^VIX/ES bars (needs network)")
+    record.add_argument("--start", default="2000-01-01")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        collected = run_benchmarks(args.patterns, args.sizes, args.repeat, args.source)
+        if collected and not args.no_save:
+            results.save(collected, args.label, args.source, args.results)
+            print(f"\nSaved {len(collected)} results to {args.results}")
+    elif args.command == "compare":
+        runs = results.load(args.results)
+        base, head = results.find(runs, args.base), results.find(runs, args.head)
+        if base is None or head is None:
+            parser.error("need two stored runs to compare")
+        regressions = results.print_comparison(base, head, args.threshold)
+        return 1 if regressions else 0
+    elif args.command == "fixtures":
+        for size in args.sizes:
+            fixtures.ensure(fixtures.parse_size(size), args.source)
+            print(f"{size}: ready")
+    elif args.command == "startup":
+        report = startup.check(args.scripts or None)
+        return 0 if startup.print_report(report) else 1
+    elif args.command == "record":
+        for symbol, rows in fixtures.record(args.start).items():
+            print(f"{symbol}: {rows} daily bars")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
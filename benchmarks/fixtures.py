@@ -0,0 +1,158 @@
+import os
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_store import has_columns, load_columns, save_columns
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SYMBOLS = ["SPY", "^VIX", "ES=F"]
+COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+SIZES = {"1k": 1_000, "100k": 100_000, "5m": 5_000_000}
+
+SEED = 20240101
+
+# Bars are one minute apart so even 5M rows stay inside pandas' date range
+START = pd.Timestamp("2000-01-03 09:30").value
+STEP_NS = 60 * 1_000_000_000
+
+# VIX: AR(1) log level, truncated to a KERNEL-tap filter applied by FFT
+VIX_PHI = 0.995
+VIX_KERNEL = 4096
+
+
+def parse_size(label):
+    """'1k' / '100k' / '5m' / '2500' -> row count."""
+    if label in SIZES:
+        return SIZES[label]
+    label = label.lower()
+    for suffix, scale in (("k", 1_000), ("m", 1_000_000)):
+        if label.endswith(suffix):
+            return int(float(label[:-1]) * scale)
+    return int(label)
+
+
+def _path(source, rows, symbol):
+    return os.path.join(FIXTURE_DIR, source, str(rows), quote(symbol, safe=""))
+
+
+def _dates(rows):
+    return START + np.arange(rows, dtype=np.int64) * STEP_NS
+
+
+def _ohlc(rng, close, spread):
+    """Open/High/Low around a close path: open at the previous close plus a gap."""
+    rows = len(close)
+    open_ = np.empty(rows)
+    open_[0] = close[0]
+    open_[1:] = close[:-1] * np.exp(rng.normal(0, spread / 4, rows - 1))
+    wick = np.abs(rng.normal(0, spread, (2, rows)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    return open_, high, low
+
+
+def _ar1(eps, phi):
+    """x[t] = phi * x[t-1] + eps[t], via FFT convolution (no Python loop)."""
+    kernel = phi ** np.arange(min(VIX_KERNEL, len(eps)))
+    size = 1 << (len(eps) + len(kernel) - 1).bit_length()
+    return np.fft.irfft(np.fft.rfft(eps, size) * np.fft.rfft(kernel, size), size)[:len(eps)]
+
+
+def synthetic(rows, seed=SEED):
+    """
+    {symbol: columns} for SPY, ^VIX and ES=F. SPY and ES share market
+    shocks; VIX is a mean-reverting log level driven against them, so the
+    divergence signals fire at a realistic rate.
+    """
+    rng = np.random.default_rng(seed + rows)
+    market = rng.normal(0, 0.0008, rows)
+
+    spy = 450 * np.exp(np.cumsum(market + rng.normal(0, 0.0002, rows)))
+    es = 4500 * np.exp(np.cumsum(market + rng.normal(0, 0.0001, rows)))
+    vix = 18 * np.exp(_ar1(-6 * market + rng.normal(0, 0.004, rows), VIX_PHI))
+
+    out = {}
+    for symbol, close, spread in (("SPY", spy, 0.0004), ("^VIX", vix, 0.003), ("ES=F", es, 0.0004)):
+        open_, high, low = _ohlc(rng, close, spread)
+        out[symbol] = {
+            "Date": _dates(rows), "Open": open_, "High": high, "Low": low, "Close": close,
+            "Volume": rng.integers(1_000, 100_000, rows).astype(float),
+        }
+    return out
+
+
+def recorded_file(symbol):
+    return os.path.join(FIXTURE_DIR, "recorded", f"{quote(symbol, safe='')}.csv")
+
+
+def record(start="2000-01-01", end=None):
+    """Download real daily bars for SYMBOLS into fixtures/recorded (needs network)."""
+    from utils.yahoo_data import fetch_daily
+
+    end = end or pd.Timestamp.today().strftime("%Y-%m-%d")
+    os.makedirs(os.path.join(FIXTURE_DIR, "recorded"), exist_ok=True)
+    written = {}
+    for symbol in SYMBOLS:
+        df = fetch_daily(symbol, start, end, use_store=False)
+        if df is None or df.empty:
+            continue
+        df[COLUMNS].to_csv(recorded_file(symbol), index=False)
+        written[symbol] = len(df)
+    return written
+
+
+def recorded(rows):
+    """
+    {symbol: columns} replaying the recorded daily bars cyclically up to
+    `rows`. Days are inner-joined across symbols so co-movements survive,
+    and log returns are demeaned so repeated cycles don't compound drift.
+    """
+    frames = {}
+    for symbol in SYMBOLS:
+        path = recorded_file(symbol)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} missing; run `python -m benchmarks record` (needs network) first")
+        frames[symbol] = pd.read_csv(path).set_index("Date")
+    days = sorted(set.intersection(*(set(df.index) for df in frames.values())))
+    if len(days) < 2:
+        raise ValueError("Recorded fixtures share fewer than two days")
+
+    idx = np.arange(rows) % (len(days) - 1)
+    out = {}
+    for symbol, df in frames.items():
+        df = df.loc[days].astype(float)
+        close = df["Close"].to_numpy()
+        returns = np.diff(np.log(close))
+        returns -= returns.mean()
+        path = close[0] * np.exp(np.cumsum(returns[idx]))
+        ratios = {col: (df[col].to_numpy() / close)[1:][idx] for col in ("Open", "High", "Low")}
+        out[symbol] = {
+            "Date": _dates(rows), "Open": path * ratios["Open"], "High": path * ratios["High"],
+            "Low": path * ratios["Low"], "Close": path, "Volume": df["Volume"].to_numpy()[1:][idx],
+        }
+    return out
+
+
+def ensure(rows, source="synthetic"):
+    """Write the fixture files for `rows` if they aren't on disk yet."""
+    if all(has_columns(_path(source, rows, s), COLUMNS) for s in SYMBOLS):
+        return
+    data = synthetic(rows) if source == "synthetic" else recorded(rows)
+    for symbol, columns in data.items():
+        save_columns(_path(source, rows, symbol), columns)
+
+
+def load(symbol, rows, source="synthetic"):
+    """
+    Fixture bars as a DataFrame (Date, Open, High, Low, Close, Volume),
+    generating the files on first use.
+    """
+    ensure(rows, source)
+    columns = load_columns(_path(source, rows, symbol), COLUMNS, mmap=False)
+    df = pd.DataFrame({name: columns[name] for name in COLUMNS[1:]})
+    df.insert(0, "Date", pd.DatetimeIndex(columns["Date"].view("datetime64[ns]")))
+    return df
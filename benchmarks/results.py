@@ -0,0 +1,107 @@
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+# A benchmark this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def _git(*args):
+    try:
+        out = subprocess.run(["git", *args], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def environment():
+    """Commit, dirty flag and machine facts stored with every run."""
+    commit = _git("rev-parse", "--short", "HEAD")
+    return {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")) if commit else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def key(result):
+    """'name' for fixed workloads, 'name[rows]' for data benchmarks."""
+    return result["benchmark"] if result["rows"] is None else f"{result['benchmark']}[{result['rows']}]"
+
+
+def save(results, label=None, source="synthetic", path=RESULTS_FILE):
+    """Append one run (a list of per-benchmark results) as a JSON line."""
+    run = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "source": source,
+        **environment(),
+        "results": results,
+    }
+    with open(path, "a") as fh:
+        fh.write(json.dumps(run) + "\n")
+    return run
+
+
+def load(path=RESULTS_FILE):
+    """Every stored run, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def find(runs, ref):
+    """Newest run whose label or commit starts with ref; ref may also be an index (-1 = last)."""
+    try:
+        return runs[int(ref)]
+    except (ValueError, IndexError):
+        pass
+    for run in reversed(runs):
+        if run.get("label") == ref or (run.get("commit") or "").startswith(ref):
+            return run
+    return None
+
+
+def compare(base, head, threshold=REGRESSION_THRESHOLD):
+    """
+    Rows of (key, base median, head median, ratio, flag) for benchmarks in
+    both runs; flag is "REGRESSION" / "faster" beyond threshold, else "".
+    """
+    base_by_key = {key(r): r for r in base["results"]}
+    rows = []
+    for result in head["results"]:
+        before = base_by_key.get(key(result))
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else ""
+        rows.append((key(result), before["median_s"], result["median_s"], ratio, flag))
+    return rows
+
+
+def describe(run):
+    commit = run.get("commit") or "?"
+    if run.get("dirty"):
+        commit += "+dirty"
+    label = f" ({run['label']})" if run.get("label") else ""
+    return f"{commit}{label} at {run['timestamp']}"
+
+
+def print_comparison(base, head, threshold=REGRESSION_THRESHOLD, file=sys.stdout):
+    rows = compare(base, head, threshold)
+    print(f"base: {describe(base)}\nhead: {describe(head)}\n", file=file)
+    width = max((len(r[0]) for r in rows), default=10)
+    print(f"{'benchmark':<{width}}  {'base':>10}  {'head':>10}  {'ratio':>6}", file=file)
+    for name, before, after, ratio, flag in rows:
+        print(f"{name:<{width}}  {before * 1000:>8.2f}ms  {after * 1000:>8.2f}ms  {ratio:>5.2f}x  {flag}",
+              file=file)
+    return [r for r in rows if r[4] == "REGRESSION"]
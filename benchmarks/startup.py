@@ -0,0 +1,98 @@
+import ast
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget per Streamlit script: import time (ms) of its top-level
+# imports in a fresh interpreter, measured with `python -X importtime`.
+# streamlit itself is skipped; the server has loaded it before any script runs.
+STARTUP_BUDGETS_MS = {
+    "app.py": 600,
+    "pages/3_News.py": 650,
+    "pages/4_Diagnostics.py": 750,
+}
+SKIP_MODULES = {"streamlit"}
+
+# Modules no script may pull in at startup; each is deferred to the section
+# that needs it (yfinance on first download, the backtest on its button).
+LAZY_MODULES = ["yfinance", "requests", "utils.yahoo_data", "utils.backtest", "utils.bot_engine"]
+
+
+def startup_imports(script):
+    """Source of a script's module-level import statements, minus SKIP_MODULES."""
+    with open(os.path.join(REPO_ROOT, script)) as fh:
+        tree = ast.parse(fh.read())
+    lines = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [a for a in node.names if a.name.split(".")[0] not in SKIP_MODULES]
+            if names:
+                lines.append(ast.unparse(ast.Import(names=names)))
+        elif isinstance(node, ast.ImportFrom) and node.module.split(".")[0] not in SKIP_MODULES:
+            lines.append(ast.unparse(node))
+    return "\n".join(lines)
+
+
+def _importtime(code):
+    """[(module, self us, cumulative us, depth)] from `python -X importtime -c code`."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative), depth))
+    return rows
+
+
+def measure(script):
+    """
+    Import profile of a script's startup: {"total_ms", "modules", "top"},
+    where modules is every module loaded beyond a bare interpreter and top
+    the ten slowest by self time.
+    """
+    baseline = {row[0] for row in _importtime("pass")}
+    rows = [row for row in _importtime(startup_imports(script)) if row[0] not in baseline]
+    total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    top = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    return {
+        "total_ms": total_us / 1000,
+        "modules": [row[0] for row in rows],
+        "top": [(name, self_us / 1000) for name, self_us, _, _ in top],
+    }
+
+
+def check(scripts=None, budgets=None):
+    """
+    Measure each script against its budget and LAZY_MODULES.
+    Returns {script: {"total_ms", "budget_ms", "eager", "top", "ok"}}.
+    """
+    budgets = budgets or STARTUP_BUDGETS_MS
+    report = {}
+    for script in scripts or budgets:
+        profile = measure(script)
+        eager = [m for m in LAZY_MODULES if m in profile["modules"]]
+        budget = budgets.get(script)
+        report[script] = {
+            "total_ms": profile["total_ms"],
+            "budget_ms": budget,
+            "eager": eager,
+            "top": profile["top"],
+            "ok": not eager and (budget is None or profile["total_ms"] <= budget),
+        }
+    return report
+
+
+def print_report(report, file=sys.stdout):
+    for script, r in report.items():
+        status = "ok" if r["ok"] else "OVER BUDGET" if not r["eager"] else "EAGER IMPORTS"
+        print(f"{script}: {r['total_ms']:.0f} ms (budget {r['budget_ms']} ms) {status}", file=file)
+        if r["eager"]:
+            print(f"  loaded at startup but should be lazy: {', '.join(r['eager'])}", file=file)
+        for name, ms in r["top"][:5]:
+            print(f"  {ms:8.1f} ms  {name}", file=file)
+    return all(r["ok"] for r in report.values())
@@ -0,0 +1,115 @@
+import contextlib
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Articles each provider returns per request
+ARTICLES = 50
+
+
+def _articles(provider, count):
+    """Canned provider payloads with unique URLs and headlines."""
+    now = datetime.datetime(2024, 1, 2, 15, 0, tzinfo=datetime.timezone.utc)
+    items = []
+    for i in range(count):
+        published = now - datetime.timedelta(minutes=i)
+        items.append({
+            "url": f"https://example.com/{provider}/story-{i}?utm_source=feed",
+            "title": f"{provider} headline number {i} about markets - Example News",
+            "iso": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "epoch": int(published.timestamp()),
+        })
+
+    if provider == "newsapi":
+        return {"status": "ok", "articles": [
+            {"source": {"name": "Example"}, "title": a["title"], "url": a["url"],
+             "publishedAt": a["iso"]} for a in items]}
+    if provider == "finnhub":
+        return [{"source": "Example", "headline": a["title"], "url": a["url"],
+                 "datetime": a["epoch"]} for a in items]
+    return {"data": [
+        {"source": "example.com", "title": a["title"], "url": a["url"], "published_at": a["iso"],
+         "entities": [{"sentiment_score": 0.1}]} for a in items]}
+
+
+def _daily_series(days=100):
+    start = datetime.date(2024, 1, 1)
+    return {"Time Series (Daily)": {
+        (start + datetime.timedelta(days=i)).isoformat(): {
+            "1. open": "100.0", "2. high": "101.0", "3. low": "99.0",
+            "4. close": f"{100 + i * 0.1:.2f}", "5. volume": "1000000",
+        } for i in range(days)
+    }}
+
+
+class StubNewsServer(ThreadingHTTPServer):
+    """
+    Local stand-in for NewsAPI, Finnhub, MarketAux and AlphaVantage.
+    Each provider lives under its own path prefix (/newsapi, /finnhub,
+    /marketaux, /alphavantage); `urls` maps utils.news URL settings to them.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, articles=ARTICLES, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.payloads = {name: json.dumps(_articles(name, articles)).encode()
+                         for name in ("newsapi", "finnhub", "marketaux")}
+        self.payloads["alphavantage"] = json.dumps(_daily_series()).encode()
+        self.requests = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def urls(self):
+        return {
+            "NEWSAPI_URL": f"{self.base_url}/newsapi",
+            "FINNHUB_URL": f"{self.base_url}/finnhub",
+            "MARKETAUX_URL": f"{self.base_url}/marketaux",
+            "ALPHAVANTAGE_URL": f"{self.base_url}/alphavantage",
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def do_GET(self):
+        provider = urlsplit(self.path).path.strip("/").split("/")[0]
+        body = self.server.payloads.get(provider)
+        self.server.requests += 1
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def stub_news(articles=ARTICLES):
+    """Run a StubNewsServer and point utils.news at it for the duration."""
+    from utils import news
+
+    server = StubNewsServer(articles)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    saved = {name: getattr(news, name) for name in server.urls}
+    for name, url in server.urls.items():
+        setattr(news, name, url)
+    try:
+        yield server
+    finally:
+        for name, url in saved.items():
+            setattr(news, name, url)
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,186 @@
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import fixtures
+from benchmarks.startup import REPO_ROOT, STARTUP_BUDGETS_MS, startup_imports
+from benchmarks.stub_news import stub_news
+
+# Row counts the data benchmarks run at by default
+DATA_SIZES = ("1k", "100k", "5m")
+
+# Python-loop benchmarks stop here; beyond it they only measure the interpreter
+STREAMING_MAX_ROWS = 100_000
+
+JOURNAL_ENTRIES = 1_000
+
+
+class Benchmark:
+    """
+    One named workload. `setup(rows, source)` is a generator that prepares
+    inputs, yields the zero-argument callable to time, and cleans up after.
+    Fixed-size workloads have sizes=(None,).
+    """
+
+    def __init__(self, name, setup, sizes, max_rows=None):
+        self.name = name
+        self.setup = contextlib.contextmanager(setup)
+        self.sizes = sizes
+        self.max_rows = max_rows
+
+    def __repr__(self):
+        return f"Benchmark({self.name})"
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes=DATA_SIZES, max_rows=None):
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, sizes, max_rows)
+        return setup
+    return decorator
+
+
+def _frames(rows, source, *symbols):
+    return [fixtures.load(symbol, rows, source) for symbol in symbols]
+
+
+# ---------------------------------------------------------
+# Backtest (the app.py path)
+# ---------------------------------------------------------
+
+def app_backtest(spy, vix):
+    """The Run Backtest button in app.py: prepare_backtest_frame, then run_backtest."""
+    from utils.backtest import prepare_backtest_frame, run_backtest, DEFAULT_THRESHOLD
+
+    return run_backtest(prepare_backtest_frame(spy, vix), threshold=DEFAULT_THRESHOLD)
+
+
+@benchmark("backtest.app")
+def _backtest_app(rows, source):
+    spy, vix = _frames(rows, source, "SPY", "^VIX")
+    yield lambda: app_backtest(spy, vix)
+
+
+# ---------------------------------------------------------
+# Learning engine
+# ---------------------------------------------------------
+
+@benchmark("learning.run_es_vix_engine")
+def _learning_engine(rows, source):
+    from utils.learning import run_es_vix_engine
+
+    es, vix = _frames(rows, source, "ES=F", "^VIX")
+    yield lambda: run_es_vix_engine(es, vix)
+
+
+# ---------------------------------------------------------
+# Indicators
+# ---------------------------------------------------------
+
+def _indicator(name, fn, **kwargs):
+    @benchmark(f"indicators.{name}")
+    def setup(rows, source):
+        (spy,) = _frames(rows, source, "SPY")
+        yield lambda: fn(spy, **kwargs)
+
+
+def _streaming(name, cls, **kwargs):
+    @benchmark(f"indicators.{name}", max_rows=STREAMING_MAX_ROWS)
+    def setup(rows, source):
+        (spy,) = _frames(rows, source, "SPY")
+        closes = spy["Close"].tolist()
+
+        def run():
+            indicator = cls(**kwargs)
+            for close in closes:
+                indicator.update(close)
+            return indicator
+
+        yield run
+
+
+def _register_indicators():
+    from utils.utils import indicators as ind
+
+    _indicator("sma", ind.sma)
+    _indicator("ema", ind.ema)
+    _indicator("rsi", ind.rsi)
+    _indicator("rsi_wilder", ind.rsi, smoothing="wilder")
+    _indicator("macd", ind.macd)
+    _indicator("bollinger_bands", ind.bollinger_bands)
+
+    _streaming("streaming_sma", ind.StreamingSMA)
+    _streaming("streaming_ema", ind.StreamingEMA)
+    _streaming("streaming_rsi", ind.StreamingRSI)
+    _streaming("streaming_rsi_wilder", ind.StreamingRSI, smoothing="wilder")
+    _streaming("streaming_macd", ind.StreamingMACD)
+    _streaming("streaming_bollinger", ind.StreamingBollinger)
+
+
+_register_indicators()
+
+
+# ---------------------------------------------------------
+# News (against the local stub server)
+# ---------------------------------------------------------
+
+@benchmark("news.get_news", sizes=(None,))
+def _news(rows, source):
+    from utils import news
+
+    with stub_news():
+        def run():
+            # Cold feed every time: empty caches and a fresh index
+            for fetch in news.PROVIDERS.values():
+                fetch.cache.clear()
+            news._index = news.NewsIndex()
+            return news.get_news("AAPL")
+
+        saved = news._index
+        try:
+            yield run
+        finally:
+            news._index = saved
+
+
+# ---------------------------------------------------------
+# Journal
+# ---------------------------------------------------------
+
+@benchmark("journal.save_entry", sizes=(None,))
+def _journal(rows, source):
+    from utils import journal
+
+    saved = journal.JOURNAL_DB
+    with tempfile.TemporaryDirectory() as tmp:
+        journal.JOURNAL_DB = os.path.join(tmp, "journal.db")
+        try:
+            def run():
+                for i in range(JOURNAL_ENTRIES):
+                    journal.save_entry(f"Benchmark entry {i}: SPY long, VIX diverging", reload=False)
+
+            yield run
+        finally:
+            journal.close()
+            journal.JOURNAL_DB = saved
+
+
+# ---------------------------------------------------------
+# Cold start (fresh interpreter importing each Streamlit script's imports)
+# ---------------------------------------------------------
+
+def _startup(script):
+    name = os.path.splitext(os.path.basename(script))[0]
+
+    @benchmark(f"startup.{name}", sizes=(None,))
+    def setup(rows, source):
+        code = startup_imports(script)
+        yield lambda: subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+
+
+for _script in STARTUP_BUDGETS_MS:
+    _startup(_script)
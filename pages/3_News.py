@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 from utils.news import get_news, fetch_price_reaction
 
 st.title("📰 Market News Intelligence")
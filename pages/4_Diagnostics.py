@@ -0,0 +1,82 @@
+import streamlit as st
+import pandas as pd
+
+from utils import instrument
+from utils.bot_runner import read_status
+from utils.cache import cache_stats
+from utils.providers import get_registry
+
+st.title("🩺 Diagnostics")
+
+
+def stage_table(stages):
+    """One row per stage, slowest p95 first."""
+    rows = [{"Stage": name, **summary} for name, summary in stages.items()]
+    df = pd.DataFrame(rows).sort_values("p95_ms", ascending=False)
+    return df[["Stage", "count", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms"]]
+
+
+# ---------------------------------------------------------
+# Dashboard process
+# ---------------------------------------------------------
+
+st.header("⏱️ Dashboard Timings")
+
+if not instrument.ENABLED:
+    st.info("Instrumentation is disabled (INSTRUMENT=0).")
+
+timings = instrument.snapshot()
+
+if timings["stages"]:
+    st.dataframe(stage_table(timings["stages"]), hide_index=True)
+else:
+    st.write("No stages timed yet — open the main page first.")
+
+if timings["counters"]:
+    st.write("Counters:", timings["counters"])
+
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("Download JSON", instrument.to_json(timings),
+                       "timings.json", "application/json")
+with col2:
+    st.download_button("Download Prometheus", instrument.to_prometheus(timings),
+                       "timings.prom", "text/plain")
+
+if st.button("Reset timings"):
+    instrument.reset()
+    st.rerun()
+
+# ---------------------------------------------------------
+# Headless bot runner
+# ---------------------------------------------------------
+
+st.header("🤖 Bot Runner Timings")
+
+status = read_status()
+runner_timings = (status or {}).get("timings") or {}
+
+if status is None:
+    st.write("Bot runner is not running.")
+elif runner_timings.get("stages"):
+    stale = " (runner not responding)" if status.get("stale") else ""
+    st.caption(f"As of last poll: {status.get('last_poll') or 'never'}{stale}")
+    st.dataframe(stage_table(runner_timings["stages"]), hide_index=True)
+    if runner_timings.get("counters"):
+        st.write("Counters:", runner_timings["counters"])
+else:
+    st.write("The runner has not timed any stages yet.")
+
+# ---------------------------------------------------------
+# Data providers and caches
+# ---------------------------------------------------------
+
+st.header("🛰️ Data Providers")
+st.dataframe(pd.DataFrame(get_registry().status()), hide_index=True)
+
+st.header("🗄️ Caches")
+caches = cache_stats()
+if caches:
+    st.dataframe(pd.DataFrame.from_dict(caches, orient="index"))
+else:
+    st.write("No caches in use yet.")
@@ -0,0 +1,65 @@
+import sys
+import types
+
+import pandas as pd
+import requests
+
+from utils import polygon_data, yahoo_data
+from utils.cache import clear_caches
+from utils.providers import PolygonProvider, ProviderRegistry, YahooProvider
+
+
+def _registry(provider):
+    return ProviderRegistry([provider], failure_threshold=3, cooldown=60, clock=lambda: 0.0)
+
+
+def _fake_yfinance(monkeypatch, error):
+    yf = types.ModuleType("yfinance")
+    yf.shared = types.SimpleNamespace(_ERRORS={})
+
+    def download(symbols, **kwargs):
+        yf.shared._ERRORS = dict.fromkeys(symbols, error)
+        return pd.DataFrame()
+
+    yf.download = download
+    monkeypatch.setitem(sys.modules, "yfinance", yf)
+
+
+def test_polygon_network_errors_open_the_circuit(monkeypatch):
+    def get(*args, **kwargs):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(polygon_data, "API_KEY", "key")
+    monkeypatch.setattr(requests, "get", get)
+    clear_caches()
+    registry = _registry(PolygonProvider())
+
+    for _ in range(3):
+        assert registry.fetch_intraday("SPY") is None
+    health = registry.status()[0]
+    assert health["failures"] == 3 and health["empty"] == 0
+    assert health["circuit"] == "open"
+    assert registry.candidates() == []
+
+
+def test_yahoo_download_errors_open_the_circuit(monkeypatch):
+    _fake_yfinance(monkeypatch, "ConnectionError('Failed to establish a new connection')")
+    clear_caches()
+    registry = _registry(YahooProvider())
+
+    for _ in range(3):
+        assert registry.fetch_intraday_batch(["SPY", "^VIX"]) == {"SPY": None, "^VIX": None}
+    assert registry.status()[0]["circuit"] == "open"
+
+
+def test_yahoo_no_data_is_not_a_failure(monkeypatch):
+    _fake_yfinance(monkeypatch, "YFPricesMissingError('$SPY: possibly delisted; no price data found')")
+    clear_caches()
+    registry = _registry(YahooProvider())
+
+    for _ in range(3):
+        assert registry.fetch_intraday("SPY") is None
+    health = registry.status()[0]
+    assert health["failures"] == 0 and health["empty"] == 3
+    assert health["circuit"] == "closed"
+    assert yahoo_data._fetch_intraday_raw.cache.stats()["size"] == 0
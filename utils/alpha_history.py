@@ -1,5 +1,4 @@
 import pandas as pd
-from utils.yahoo_data import fetch_daily
 
 
 def fetch_history(start: str, end: str):
@@ -7,8 +6,11 @@ def fetch_history(start: str, end: str):
     Fetch daily SPY and VIX (^VIX) history between start and end (YYYY-MM-DD).
     Returns (spy_df, vix_df) or (None, None) if either is missing.
     """
-    spy = fetch_daily("SPY", start, end)
-    vix = fetch_daily("^VIX", start, end)
+    # Deferred so the dashboard only loads yfinance when a backtest runs
+    from utils.yahoo_data import fetch_daily_batch
+
+    frames = fetch_daily_batch(["SPY", "^VIX"], start, end)
+    spy, vix = frames["SPY"], frames["^VIX"]
 
     if spy is None or vix is None or spy.empty or vix.empty:
         return None, None
@@ -1,33 +1,31 @@
+import time
+
 import numpy as np
-from utils.yahoo_data import fetch_intraday
+from utils.bars import last_closes
+from utils.cache import ttl_cache
+from utils.providers import get_registry
 
+# How long one SPY/^VIX pull is reused before hitting the data providers again.
+SNAPSHOT_TTL_SECONDS = 30
 
-def live_divergence_signal():
+
+def compute_divergence_signal(spy_df, vix_df):
     """
-    Compute live ES (SPY) + VIX divergence using Yahoo intraday data.
-    Uses the last two 1-minute bars for each.
+    Compute the ES (SPY) + VIX divergence from already-fetched intraday bars
+    (DataFrames or BarSeries). Uses the last two 1-minute bars for each.
     Returns:
         dict with keys: signal, es_move, vix_move, spy_close, vix_close
         or None if data unavailable.
     """
-    spy_df = fetch_intraday("SPY", period="1d", interval="1m")
-    vix_df = fetch_intraday("^VIX", period="1d", interval="1m")
-
-    if spy_df is None or vix_df is None:
-        return None
+    spy = last_closes(spy_df)
+    vix = last_closes(vix_df)
 
     # Need at least 2 bars to compute a move
-    if len(spy_df) < 2 or len(vix_df) < 2:
+    if spy is None or vix is None or len(spy) < 2 or len(vix) < 2:
         return None
 
-    spy_last = spy_df.iloc[-1]
-    spy_prev = spy_df.iloc[-2]
-
-    vix_last = vix_df.iloc[-1]
-    vix_prev = vix_df.iloc[-2]
-
-    es_move = spy_last["Close"] - spy_prev["Close"]
-    vix_move = vix_last["Close"] - vix_prev["Close"]
+    es_move = spy[1] - spy[0]
+    vix_move = vix[1] - vix[0]
 
     es_dir = 1 if es_move > 0 else (-1 if es_move < 0 else 0)
     vix_dir = 1 if vix_move > 0 else (-1 if vix_move < 0 else 0)
@@ -43,40 +41,50 @@ def live_divergence_signal():
         "signal": signal,
         "es_move": float(es_move),
         "vix_move": float(vix_move),
-        "spy_close": float(spy_last["Close"]),
-        "vix_close": float(vix_last["Close"]),
+        "spy_close": float(spy[1]),
+        "vix_close": float(vix[1]),
     }
 
-from utils.polygon_data import fetch_intraday
 
-def live_divergence_signal():
-    spy = fetch_intraday("SPY", limit=2)
-    vix = fetch_intraday("VIX", limit=2)
+@ttl_cache(ttl=SNAPSHOT_TTL_SECONDS, maxsize=4, name="market_snapshot", copy=False)
+def _load_snapshot(period, interval):
+    frames, sources = get_registry().fetch_intraday_batch(
+        ["SPY", "^VIX"], period, interval, with_source=True)
+    spy_df, vix_df = frames["SPY"], frames["^VIX"]
 
-    if spy is None or vix is None:
-        return None
-
-    spy_latest = spy.iloc[-1]
-    vix_latest = vix.iloc[-1]
-
-    es_move = spy_latest["Close"] - spy_latest["Open"]
-    vix_move = vix_latest["Close"] - vix_latest["Open"]
+    return {
+        "spy": spy_df,
+        "vix": vix_df,
+        "signal": compute_divergence_signal(spy_df, vix_df),
+        # "yahoo", or e.g. "yahoo/polygon" when the symbols came from different providers
+        "source": "/".join(dict.fromkeys(name for name in sources.values() if name)) or None,
+        "fetched_at": time.time(),
+    }
 
-    es_dir = 1 if es_move > 0 else (-1 if es_move < 0 else 0)
-    vix_dir = 1 if vix_move > 0 else (-1 if vix_move < 0 else 0)
 
-    if es_dir == 1 and vix_dir == -1:
-        signal = "LONG"
-    elif es_dir == -1 and vix_dir == 1:
-        signal = "SHORT"
-    else:
-        signal = "NONE"
+def get_market_snapshot(period="1d", interval="1m", force=False):
+    """
+    Pull SPY and ^VIX intraday bars once and share them for
+    SNAPSHOT_TTL_SECONDS. Every dashboard section and the bot read from the
+    same snapshot, and concurrent sessions are coalesced onto one download,
+    so a Streamlit rerun costs at most one request per symbol.
+    Bars come from the provider registry (Yahoo, then Polygon, then the
+    local archive), so one provider's outage falls over to the next.
+    Returns:
+        dict with keys: spy, vix (DataFrames or None), signal (dict or None),
+        source (name(s) of the providers that answered), fetched_at (epoch seconds)
+    """
+    if force:
+        _load_snapshot.cache.invalidate(_load_snapshot.cache_key(period, interval))
+    return _load_snapshot(period, interval)
 
-    return {
-        "signal": signal,
-        "es_move": es_move,
-        "vix_move": vix_move,
-        "spy_close": spy_latest["Close"],
-        "vix_close": vix_latest["Close"]
-    }
 
+def live_divergence_signal():
+    """
+    Compute live ES (SPY) + VIX divergence from intraday bars.
+    Reads from the shared market snapshot (see get_market_snapshot).
+    Returns:
+        dict with keys: signal, es_move, vix_move, spy_close, vix_close
+        or None if data unavailable.
+    """
+    return get_market_snapshot()["signal"]
@@ -0,0 +1,354 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import OPEN_DAILY_TTL_SECONDS, daily_ttl, ttl_cache
+from utils.instrument import timer
+
+# Divergence threshold on the daily open-to-close move (0.05%)
+DEFAULT_THRESHOLD = 0.0005
+
+INITIAL_EQUITY = 10000
+POSITION_SIZE = 10000
+
+# Sharpe ratios are annualized from per-trade returns by sqrt(TRADING_DAYS)
+TRADING_DAYS = 252
+
+SIDE_LABELS = np.array(["SHORT", "NONE", "LONG"], dtype=object)
+
+# Columns run_backtest needs; the equity leg is always _SPY and the
+# volatility leg _VIX, whatever the symbols.
+REQUIRED_COLUMNS = ["Open_SPY", "Close_SPY", "Open_VIX", "Close_VIX"]
+FIELDS = ["Open", "Close", "High", "Low", "Volume"]
+
+# Where the CLI writes trade logs and the batch summary
+OUTPUT_DIR = os.path.join("data", "backtests")
+
+
+def divergence_signal(es_pct, vix_pct, threshold=DEFAULT_THRESHOLD):
+    """
+    Vectorized daily divergence signal.
+    Returns an int8 array: 1 = LONG, -1 = SHORT, 0 = NONE.
+    """
+    es_pct = np.asarray(es_pct, dtype=float)
+    vix_pct = np.asarray(vix_pct, dtype=float)
+
+    long_mask = (es_pct > threshold) & (vix_pct < -threshold)
+    short_mask = (es_pct < -threshold) & (vix_pct > threshold)
+    return long_mask.astype(np.int8) - short_mask.astype(np.int8)
+
+
+def simulate_trades(open_spy, close_spy, signal, position_size=POSITION_SIZE):
+    """
+    Open-to-close PnL for every day with a signal.
+    Returns (traded mask over all rows, PnL array for the traded rows).
+    """
+    traded = signal != 0
+    side = signal[traded]
+    o = open_spy[traded]
+    c = close_spy[traded]
+
+    ret = np.where(side > 0, (c - o) / o, (o - c) / o)
+    return traded, position_size * ret
+
+
+def sharpe_from_sums(total, total_sq, n, periods_per_year=TRADING_DAYS):
+    """
+    Annualized Sharpe ratio of n per-trade returns from their sum and sum
+    of squares, with the sample std (ddof=1). NaN for fewer than two
+    trades, and 0.0 when every return is the same (no variation to scale by).
+    The one definition shared by the backtest, the sweep and walk-forward.
+    """
+    if n < 2:
+        return np.nan
+    mean = total / n
+    var = (total_sq - total * total / n) / (n - 1)
+    # Cancellation leaves a tiny residue where the returns are all equal
+    if var <= 1e-12 * mean * mean or var <= 0:
+        return 0.0
+    return float(mean / np.sqrt(var) * np.sqrt(periods_per_year))
+
+
+def sharpe_ratio(returns, periods_per_year=TRADING_DAYS):
+    """Annualized Sharpe ratio of per-trade returns (see sharpe_from_sums)."""
+    returns = np.asarray(returns, dtype=float)
+    return sharpe_from_sums(returns.sum(), (returns * returns).sum(), len(returns), periods_per_year)
+
+
+def compute_stats(pnl, equity_curve, final_equity,
+                  position_size=POSITION_SIZE, initial_equity=INITIAL_EQUITY):
+    """
+    Strategy analytics over per-trade PnL and the trade-by-trade equity curve.
+    Returns None when there are no trades.
+    """
+    n = len(pnl)
+    if n == 0:
+        return None
+
+    returns = pnl / position_size
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+
+    win_rate = len(wins) / n
+    avg_win = wins.mean() if len(wins) > 0 else 0
+    avg_loss = losses.mean() if len(losses) > 0 else 0
+    expectancy = win_rate * avg_win + (1 - win_rate) * avg_loss
+
+    running_max = np.maximum.accumulate(equity_curve)
+    drawdown = (equity_curve - running_max) / running_max
+    max_drawdown = drawdown.min()
+
+    return {
+        "total_return": (final_equity / initial_equity) - 1,
+        "win_rate": win_rate,
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "expectancy": expectancy,
+        "max_drawdown": max_drawdown,
+        "sharpe": sharpe_ratio(returns),
+    }
+
+
+def run_backtest(df, threshold=DEFAULT_THRESHOLD,
+                 position_size=POSITION_SIZE, initial_equity=INITIAL_EQUITY):
+    """
+    Daily open-to-close ES (SPY) + VIX divergence backtest over a merged frame
+    with Date, Open_SPY, Close_SPY, Open_VIX, Close_VIX columns.
+    Every step is a NumPy array operation; nothing iterates over rows.
+    Returns:
+        dict with keys: signal (int8 array per row), trades (DataFrame with
+        Date/Side/PnL/Equity/Return), equity (final value), stats (dict or None)
+    """
+    open_spy = df["Open_SPY"].to_numpy(dtype=float)
+    close_spy = df["Close_SPY"].to_numpy(dtype=float)
+    open_vix = df["Open_VIX"].to_numpy(dtype=float)
+    close_vix = df["Close_VIX"].to_numpy(dtype=float)
+
+    es_pct = (close_spy - open_spy) / open_spy
+    vix_pct = (close_vix - open_vix) / open_vix
+    signal = divergence_signal(es_pct, vix_pct, threshold)
+
+    traded, pnl = simulate_trades(open_spy, close_spy, signal, position_size)
+    side = signal[traded]
+
+    # Accumulate from the starting equity so the final value matches a
+    # trade-by-trade running total bit for bit.
+    final_equity = np.cumsum(np.concatenate(([initial_equity], pnl)))[-1] if len(pnl) else initial_equity
+    equity_curve = initial_equity + np.cumsum(pnl)
+
+    trades = pd.DataFrame({
+        "Date": df["Date"].to_numpy()[traded],
+        "Side": SIDE_LABELS[side + 1],
+        "PnL": pnl,
+        "Equity": equity_curve,
+        "Return": pnl / position_size,
+    })
+
+    return {
+        "signal": signal,
+        "trades": trades,
+        "equity": final_equity,
+        "stats": compute_stats(pnl, equity_curve, final_equity, position_size, initial_equity),
+    }
+
+
+# ---------------------------------------------------------
+# Data preparation
+# ---------------------------------------------------------
+
+def rename_map(symbol="SPY", vol_symbol="^VIX"):
+    """Flattened yfinance (field, ticker) names -> the _SPY / _VIX leg names."""
+    out = {}
+    for field in FIELDS:
+        out[f"{field}{symbol}"] = f"{field}_SPY"
+        out[f"{field}{vol_symbol}"] = f"{field}_VIX"
+    return out
+
+
+def prepare_backtest_frame(spy, vix, symbol="SPY", vol_symbol="^VIX"):
+    """
+    Merge daily equity and volatility bars on Date into the frame
+    run_backtest takes: sorted, MultiIndex columns flattened and Yahoo's
+    ticker suffixes mapped onto the _SPY / _VIX legs.
+    Raises ValueError when a required column is missing.
+    """
+    with timer("backtest.merge"):
+        df = pd.merge(spy, vix, on="Date", suffixes=("_SPY", "_VIX"))
+        df = df.sort_values("Date").reset_index(drop=True)
+
+        # Flatten MultiIndex columns
+        df.columns = [
+            f"{col[0]}{col[1]}" if isinstance(col, tuple) else col
+            for col in df.columns
+        ]
+
+    with timer("backtest.rename"):
+        df = df.rename(columns=rename_map(symbol, vol_symbol))
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing expected columns after renaming: {missing}")
+    return df
+
+
+def load_history(symbol, vol_symbol, start, end, source="store"):
+    """
+    Daily bars for both legs with start <= Date < end.
+    source="store" reads the local bar store only (no network);
+    source="yahoo" goes through yahoo_data.fetch_daily_batch, which fills
+    the store. Returns (equity df, vol df) or (None, None).
+    """
+    if source == "store":
+        from utils.bar_store import get_bar_store
+        store = get_bar_store()
+        frames = {s: store.read(s, "1d", start, end) for s in (symbol, vol_symbol)}
+    elif source == "yahoo":
+        from utils.yahoo_data import fetch_daily_batch
+        frames = fetch_daily_batch([symbol, vol_symbol], start, end)
+    else:
+        raise ValueError(f"Unknown source {source!r}")
+
+    eq, vol = frames[symbol], frames[vol_symbol]
+    if eq is None or vol is None or eq.empty or vol.empty:
+        return None, None
+    eq["Date"] = pd.to_datetime(eq["Date"]).dt.date
+    vol["Date"] = pd.to_datetime(vol["Date"]).dt.date
+    return eq, vol
+
+
+def backtest_range(symbol="SPY", vol_symbol="^VIX", start=None, end=None,
+                   threshold=DEFAULT_THRESHOLD, source="store"):
+    """Load, prepare and backtest one pair over one range; None when there is no data."""
+    eq, vol = load_history(symbol, vol_symbol, start, end, source)
+    if eq is None:
+        return None
+    return run_backtest(prepare_backtest_frame(eq, vol, symbol, vol_symbol), threshold=threshold)
+
+
+def _backtest_ttl(symbol="SPY", vol_symbol="^VIX", start=None, end=None,
+                  threshold=DEFAULT_THRESHOLD, source="yahoo"):
+    # As long as the daily bars it is computed from: short while the range includes today
+    return daily_ttl(end) if end is not None else OPEN_DAILY_TTL_SECONDS
+
+
+@ttl_cache(ttl=_backtest_ttl, maxsize=32, copy=False)
+def cached_backtest(symbol="SPY", vol_symbol="^VIX", start=None, end=None,
+                    threshold=DEFAULT_THRESHOLD, source="yahoo"):
+    """
+    backtest_range memoized on its arguments, for the dashboard: a range
+    is computed once and then served to every rerun and session. Results
+    are shared, so treat them as read-only. No-data results and errors
+    are not cached.
+    """
+    return backtest_range(symbol, vol_symbol, start, end, threshold, source)
+
+
+# ---------------------------------------------------------
+# Batch runs
+# ---------------------------------------------------------
+
+def _slug(symbol):
+    return "".join(c if c.isalnum() else "_" for c in symbol).strip("_")
+
+
+def _run_job(job):
+    """One batch job: (symbol, vol_symbol, start, end, threshold, source, out_dir) -> summary row."""
+    symbol, vol_symbol, start, end, threshold, source, out_dir = job
+    row = {"symbol": symbol, "vol_symbol": vol_symbol, "start": start, "end": end,
+           "trades": 0, "final_equity": None, "trades_file": None, "error": None}
+    try:
+        result = backtest_range(symbol, vol_symbol, start, end, threshold, source)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+    if result is None:
+        row["error"] = f"no data in {source}"
+        return row
+
+    row["trades"] = len(result["trades"])
+    row["final_equity"] = float(result["equity"])
+    row.update(result["stats"] or {})
+    if out_dir:
+        path = os.path.join(out_dir, f"{_slug(symbol)}_{_slug(vol_symbol)}_{start}_{end}.csv")
+        result["trades"].to_csv(path, index=False)
+        row["trades_file"] = path
+    return row
+
+
+def run_batch(pairs, ranges, threshold=DEFAULT_THRESHOLD, source="store",
+              out_dir=OUTPUT_DIR, workers=None):
+    """
+    Backtest every (symbol, vol_symbol) pair over every (start, end) range,
+    in parallel worker processes. With source="yahoo" the union of all
+    ranges is downloaded once up front and the jobs then read the bar store.
+    Returns a DataFrame with one summary row per job.
+    """
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    if source == "yahoo":
+        from utils.yahoo_data import fetch_daily_batch
+        symbols = list(dict.fromkeys(s for pair in pairs for s in pair))
+        fetch_daily_batch(symbols, min(r[0] for r in ranges), max(r[1] for r in ranges))
+        source = "store"
+
+    jobs = [(symbol, vol_symbol, start, end, threshold, source, out_dir)
+            for symbol, vol_symbol in pairs for start, end in ranges]
+    if workers == 1 or len(jobs) == 1:
+        rows = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_run_job, jobs))
+    return pd.DataFrame(rows)
+
+
+def _pair(text):
+    symbol, _, vol_symbol = text.partition(":")
+    if not vol_symbol:
+        raise argparse.ArgumentTypeError(f"expected EQUITY:VOL, got {text!r}")
+    return symbol, vol_symbol
+
+
+def _range(text):
+    start, _, end = text.partition(":")
+    if not end:
+        raise argparse.ArgumentTypeError(f"expected START:END, got {text!r}")
+    return start, end
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the daily ES/VIX divergence backtest headless.")
+    parser.add_argument("--pairs", nargs="+", type=_pair, default=[("SPY", "^VIX")],
+                        help="EQUITY:VOL symbol pairs, e.g. SPY:^VIX QQQ:^VXN")
+    parser.add_argument("--start", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="End date, exclusive (YYYY-MM-DD)")
+    parser.add_argument("--ranges", nargs="+", type=_range, default=[],
+                        help="START:END date ranges to run in one batch")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--source", choices=["store", "yahoo"], default="store",
+                        help="store = local bar store only (offline); yahoo = download missing days")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="Directory for trade logs and summary.csv")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    ranges = list(args.ranges)
+    if args.start or args.end:
+        if not (args.start and args.end):
+            parser.error("--start and --end go together")
+        ranges.append((args.start, args.end))
+    if not ranges:
+        parser.error("give --start/--end or --ranges")
+
+    summary = run_batch(args.pairs, ranges, args.threshold, args.source, args.out, args.workers)
+    summary.to_csv(os.path.join(args.out, "summary.csv"), index=False)
+
+    columns = [c for c in ["symbol", "vol_symbol", "start", "end", "trades",
+                           "final_equity", "total_return", "sharpe", "error"] if c in summary.columns]
+    print(summary[columns].to_string(index=False))
+    return 1 if summary["error"].notna().all() else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,252 @@
+import argparse
+import datetime
+import os
+import threading
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_store import has_columns, load_columns, save_columns
+
+# Root of the intraday archive. Override with BAR_ARCHIVE_DIR.
+ARCHIVE_DIR = os.getenv("BAR_ARCHIVE_DIR", os.path.join("data", "archive"))
+
+MARKET_TZ = "America/New_York"
+
+# The archive holds 1-minute bars only (what LocalFileProvider serves as "1m").
+INTERVAL = "1m"
+
+# int64 bar start (ns since epoch, UTC) plus fixed-width float64 values.
+TIME_COLUMN = "Time"
+VALUE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+COLUMNS = [TIME_COLUMN] + VALUE_COLUMNS
+
+
+def _column(df, name):
+    """1-D column from a flat or yfinance (field, ticker) frame."""
+    values = df[name]
+    if isinstance(values, pd.DataFrame):
+        values = values.iloc[:, 0]
+    return values
+
+
+def _bar_times(df):
+    """Bar start times of a minute frame (Datetime column or index), tz-aware UTC."""
+    if "Datetime" in df.columns:
+        index = pd.DatetimeIndex(_column(df, "Datetime"))
+    else:
+        index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TZ)
+    return index.tz_convert("UTC").as_unit("ns")
+
+
+class BarArchive:
+    """
+    Append-only columnar archive of 1-minute bars, one directory per
+    symbol and market day:
+      <root>/<symbol>/<YYYY-MM-DD>/Time.*.npy      int64 ns since epoch (UTC)
+      <root>/<symbol>/<YYYY-MM-DD>/<Column>.*.npy  float64 Open/High/Low/Close/Volume
+      <root>/<symbol>/<YYYY-MM-DD>/columns.json    current file of each column
+    Days are split on New York dates. Each day is a handful of contiguous
+    .npy files, so read_day() memory-maps them without copying and months
+    of history open instantly.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, day):
+        return os.path.join(self.root, quote(symbol, safe=""), day.isoformat())
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name) for name in os.listdir(self.root))
+
+    def days(self, symbol):
+        """Sorted market days archived for a symbol."""
+        path = os.path.join(self.root, quote(symbol, safe=""))
+        if not os.path.isdir(path):
+            return []
+        return sorted(datetime.date.fromisoformat(name) for name in os.listdir(path)
+                      if has_columns(os.path.join(path, name), [TIME_COLUMN]))
+
+    # ---------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------
+
+    def append(self, symbol, df):
+        """
+        Merge a 1-minute-bar frame (fetch_intraday schema) into the archive.
+        Bars already archived with the same timestamp are replaced, so
+        recording the same session repeatedly is safe.
+        Returns the number of days touched.
+        """
+        if df is None or len(df) == 0:
+            return 0
+
+        times = _bar_times(df)
+        new = pd.DataFrame({TIME_COLUMN: times.asi8})
+        for name in VALUE_COLUMNS:
+            new[name] = pd.to_numeric(_column(df, name), errors="coerce").to_numpy(np.float64)
+        new = new.dropna(subset=["Close"])
+        new["day"] = times.tz_convert(MARKET_TZ).date[new.index]
+
+        with self._lock:
+            for day, rows in new.groupby("day"):
+                path = self._path(symbol, day)
+                rows = rows.drop(columns="day")
+                existing = load_columns(path, COLUMNS, mmap=False)
+                if existing is not None:
+                    rows = pd.concat([pd.DataFrame(existing), rows], ignore_index=True)
+                rows = (rows.drop_duplicates(TIME_COLUMN, keep="last")
+                            .sort_values(TIME_COLUMN))
+                save_columns(path, {
+                    TIME_COLUMN: rows[TIME_COLUMN].to_numpy(np.int64),
+                    **{name: rows[name].to_numpy(np.float64) for name in VALUE_COLUMNS},
+                })
+        return new["day"].nunique()
+
+    # ---------------------------------------------------------
+    # Reading
+    # ---------------------------------------------------------
+
+    def read_day(self, symbol, day, mmap=True):
+        """Columns of one archived day as {name: array} (memory-mapped), or None."""
+        return load_columns(self._path(symbol, day), COLUMNS, mmap=mmap)
+
+    def read_columns(self, symbol, start=None, end=None):
+        """
+        Columns for archived days with start <= day < end, concatenated.
+        A single day is returned as its memory maps; several are copied once.
+        """
+        days = self.days(symbol)
+        if start is not None:
+            days = [d for d in days if d >= pd.Timestamp(start).date()]
+        if end is not None:
+            days = [d for d in days if d < pd.Timestamp(end).date()]
+        if len(days) == 1:
+            return self.read_day(symbol, days[0])
+        # Several days are copied into one array anyway, so skip the maps
+        parts = [self.read_day(symbol, day, mmap=False) for day in days]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return None
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+    def read(self, symbol, start=None, end=None):
+        """
+        Archived bars as a DataFrame in the fetch_intraday schema
+        (Datetime in New York time, Open/High/Low/Close/Volume), or None.
+        """
+        columns = self.read_columns(symbol, start, end)
+        if columns is None:
+            return None
+        df = pd.DataFrame({
+            "Datetime": pd.DatetimeIndex(np.asarray(columns[TIME_COLUMN]).view("datetime64[ns]"))
+                          .tz_localize("UTC").tz_convert(MARKET_TZ),
+        })
+        for name in VALUE_COLUMNS:
+            df[name] = np.asarray(columns[name])
+        return df
+
+    def frames(self, symbols, start=None, end=None):
+        """{symbol: DataFrame} for several symbols, e.g. to feed utils.replay."""
+        return {symbol: self.read(symbol, start, end) for symbol in symbols}
+
+    # ---------------------------------------------------------
+    # Arrow IPC
+    # ---------------------------------------------------------
+
+    def export_arrow(self, symbol, path, start=None, end=None):
+        """
+        Write archived bars to an Arrow IPC file, which other tools can
+        memory-map without copying (see open_arrow). Needs pyarrow.
+        """
+        import pyarrow as pa
+
+        columns = self.read_columns(symbol, start, end)
+        if columns is None:
+            return None
+        table = pa.table({
+            TIME_COLUMN: pa.array(np.asarray(columns[TIME_COLUMN]), type=pa.timestamp("ns", tz="UTC")),
+            **{name: pa.array(np.asarray(columns[name])) for name in VALUE_COLUMNS},
+        })
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return path
+
+
+def open_arrow(path):
+    """Memory-map an Arrow IPC file written by export_arrow (zero-copy)."""
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+_default_archive = None
+
+
+def get_bar_archive():
+    """Return the process-wide BarArchive rooted at ARCHIVE_DIR."""
+    global _default_archive
+    if _default_archive is None:
+        _default_archive = BarArchive()
+    return _default_archive
+
+
+# ---------------------------------------------------------
+# Recorder
+# ---------------------------------------------------------
+
+class BarRecorder:
+    """
+    Copies each session's 1-minute bars into the archive before the
+    provider's short 1-minute lookback drops them. The headless bot runner
+    records every poll of the session (see BotRunner); the CLI below
+    backfills by hand.
+    record() fetches every symbol in one batch; record_frames() archives frames
+    already in hand (e.g. BarSeries.to_frame() from a BarBus).
+    """
+
+    def __init__(self, symbols, archive=None, fetch=None, period="1d"):
+        self.symbols = list(symbols)
+        self.archive = archive or get_bar_archive()
+        self.fetch = fetch
+        self.period = period
+
+    def _fetch_all(self):
+        if self.fetch is not None:
+            return {symbol: self.fetch(symbol, self.period, INTERVAL) for symbol in self.symbols}
+        from utils.yahoo_data import fetch_intraday_batch
+        return fetch_intraday_batch(self.symbols, period=self.period, interval=INTERVAL)
+
+    def record_frames(self, frames):
+        """Archive {symbol: DataFrame}; returns {symbol: days touched}."""
+        return {symbol: self.archive.append(symbol, df) for symbol, df in frames.items()
+                if df is not None}
+
+    def record(self):
+        """Fetch and archive every symbol. Returns {symbol: days touched}."""
+        return self.record_frames(self._fetch_all())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record 1-minute bars into the local archive.")
+    parser.add_argument("symbols", nargs="+", help="Symbols to record, e.g. SPY ^VIX")
+    parser.add_argument("--period", default="1d",
+                        help="Lookback to fetch (Yahoo serves up to 7d of 1m bars)")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args(argv)
+
+    recorder = BarRecorder(args.symbols, archive=BarArchive(args.root),
+                           period=args.period)
+    for symbol, days in recorder.record().items():
+        print(f"{symbol}: {days} day(s) archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import datetime
+import json
+import os
+import threading
+import uuid
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# Root of the on-disk bar store. Override with BAR_STORE_DIR.
+STORE_DIR = os.getenv("BAR_STORE_DIR", os.path.join("data", "bars"))
+
+# Fixed-width float64 value columns stored next to an int64 day index.
+VALUE_COLUMNS = ["Open", "Close", "High", "Low", "Volume"]
+
+_EPOCH = datetime.date(1970, 1, 1)
+
+# Names the current .npy file of every column in a column directory.
+MANIFEST = "columns.json"
+
+
+def _to_date(value):
+    """Coerce a YYYY-MM-DD string, datetime or date into a datetime.date."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _merge_ranges(ranges):
+    """Union a list of half-open (start, end) date ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _column_files(path):
+    """{column: file name} of the current column set under path ({} if none)."""
+    try:
+        with open(os.path.join(path, MANIFEST)) as fh:
+            return json.load(fh)["files"]
+    except FileNotFoundError:
+        pass
+    # Written before the manifest existed: one <name>.npy per column
+    if not os.path.isdir(path):
+        return {}
+    return {name[:-4]: name for name in os.listdir(path) if name.endswith(".npy")}
+
+
+def save_columns(path, columns):
+    """
+    Write a dict of 1-D arrays as one .npy file per column, atomically as
+    a set: the new files get fresh names and the manifest naming them is
+    swapped in last, so a concurrent reader sees either every old column
+    or every new one. The replaced files are removed afterwards.
+    """
+    os.makedirs(path, exist_ok=True)
+    old = _column_files(path)
+    version = uuid.uuid4().hex[:12]
+    files = {}
+    for name, values in columns.items():
+        files[name] = f"{name}.{version}.npy"
+        with open(os.path.join(path, files[name]), "wb") as fh:
+            np.save(fh, np.ascontiguousarray(values))
+
+    manifest = os.path.join(path, MANIFEST)
+    tmp = manifest + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"files": files}, fh)
+    os.replace(tmp, manifest)
+
+    for name in set(old.values()) - set(files.values()):
+        try:
+            os.remove(os.path.join(path, name))
+        except OSError:
+            pass  # already gone, or still mapped by a reader (Windows)
+
+
+def has_columns(path, names):
+    """True if every named column is stored under path."""
+    files = _column_files(path)
+    return all(name in files for name in names)
+
+
+def load_columns(path, names, mmap=True):
+    """
+    Open the named .npy columns under path, all from the same save.
+    With mmap=True the arrays are memory-mapped read-only (zero-copy).
+    Returns None if any column is missing.
+    """
+    for _ in range(3):
+        files = _column_files(path)
+        if not all(name in files for name in names):
+            return None
+        try:
+            return {name: np.load(os.path.join(path, files[name]), mmap_mode="r" if mmap else None)
+                    for name in names}
+        except FileNotFoundError:
+            continue  # a writer replaced the set mid-read; reload its manifest
+    return None
+
+
+class BarStore:
+    """
+    Local columnar OHLCV store keyed by symbol/interval.
+    Layout per key:
+      <root>/<symbol>/<interval>/Date.*.npy      int64 days since 1970-01-01
+      <root>/<symbol>/<interval>/<Column>.*.npy  float64 per OHLCV column
+      <root>/<symbol>/<interval>/columns.json    current file of each column
+      <root>/<symbol>/<interval>/meta.json     covered date ranges
+    Covered ranges are half-open [start, end) and record which spans have
+    already been downloaded, so callers only fetch the missing gaps.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, quote(symbol, safe=""), interval)
+
+    def _load_meta(self, path):
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return {"ranges": []}
+        with open(meta_path) as fh:
+            return json.load(fh)
+
+    def _save_meta(self, path, meta):
+        meta_path = os.path.join(path, "meta.json")
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, meta_path)
+
+    def covered_ranges(self, symbol, interval):
+        """Return the merged list of (start, end) date ranges already stored."""
+        meta = self._load_meta(self._path(symbol, interval))
+        return [(_to_date(a), _to_date(b)) for a, b in meta["ranges"]]
+
+    def missing_ranges(self, symbol, interval, start, end):
+        """Return the (start, end) gaps inside [start, end) not yet stored."""
+        start, end = _to_date(start), _to_date(end)
+        gaps = []
+        cursor = start
+        for a, b in self.covered_ranges(symbol, interval):
+            if b <= cursor:
+                continue
+            if a >= end:
+                break
+            if a > cursor:
+                gaps.append((cursor, a))
+            cursor = max(cursor, b)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def read(self, symbol, interval, start, end):
+        """
+        Return stored bars with start <= Date < end in the fetch_daily schema
+        (Date/Open/Close/High/Low/Volume), or None if nothing is stored.
+        """
+        path = self._path(symbol, interval)
+        columns = load_columns(path, ["Date"] + VALUE_COLUMNS)
+        if columns is None:
+            return None
+
+        days = columns["Date"]
+        lo = np.searchsorted(days, (_to_date(start) - _EPOCH).days, side="left")
+        hi = np.searchsorted(days, (_to_date(end) - _EPOCH).days, side="left")
+        if hi <= lo:
+            return None
+
+        dates = pd.to_datetime(np.asarray(days[lo:hi]), unit="D")
+        df = pd.DataFrame({"Date": dates.date})
+        for name in VALUE_COLUMNS:
+            df[name] = np.array(columns[name][lo:hi])
+        return df[["Date", "Open", "Close", "High", "Low", "Volume"]]
+
+    def write(self, symbol, interval, df, start, end):
+        """
+        Merge bars into the store and mark [start, end) as covered.
+        Rows already stored for the same Date are replaced by the new ones.
+        """
+        path = self._path(symbol, interval)
+
+        new = pd.DataFrame({
+            "Date": (pd.to_datetime(df["Date"]).values.astype("datetime64[D]")
+                     .astype(np.int64)),
+        })
+        for name in VALUE_COLUMNS:
+            new[name] = pd.to_numeric(df[name], errors="coerce").astype(float).values
+
+        with self._lock:
+            existing = load_columns(path, ["Date"] + VALUE_COLUMNS, mmap=False)
+            if existing is not None:
+                new = pd.concat([pd.DataFrame(existing), new], ignore_index=True)
+
+            new = (new.drop_duplicates("Date", keep="last")
+                      .sort_values("Date")
+                      .reset_index(drop=True))
+
+            save_columns(path, {
+                "Date": new["Date"].to_numpy(np.int64),
+                **{name: new[name].to_numpy(np.float64) for name in VALUE_COLUMNS},
+            })
+            self._add_range(path, start, end)
+
+    def mark_covered(self, symbol, interval, start, end):
+        """
+        Mark [start, end) as covered without storing bars, for spans the
+        source answered with no data (weekends, holidays).
+        """
+        path = self._path(symbol, interval)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            self._add_range(path, start, end)
+
+    def _add_range(self, path, start, end):
+        meta = self._load_meta(path)
+        ranges = [(_to_date(a), _to_date(b)) for a, b in meta["ranges"]]
+        ranges.append((_to_date(start), _to_date(end)))
+        meta["ranges"] = [[a.isoformat(), b.isoformat()] for a, b in _merge_ranges(ranges)]
+        self._save_meta(path, meta)
+
+
+_default_store = None
+
+
+def get_bar_store():
+    """Return the process-wide BarStore rooted at STORE_DIR."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store
@@ -0,0 +1,261 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+MARKET_TZ = "America/New_York"
+
+# Room for a full session of 1-minute bars, twice over
+DEFAULT_CAPACITY = 780
+
+FIELDS = ("open", "high", "low", "close", "volume")
+FRAME_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class Bar:
+    """One OHLCV bar; ts is the bar start in ns since epoch (UTC)."""
+
+    __slots__ = ("ts",) + FIELDS
+
+    def __init__(self, ts, open, high, low, close, volume=0.0):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @property
+    def time(self):
+        return pd.Timestamp(self.ts, tz="UTC").tz_convert(MARKET_TZ)
+
+    def __repr__(self):
+        return (f"Bar({self.time:%Y-%m-%d %H:%M}, O={self.open}, H={self.high}, "
+                f"L={self.low}, C={self.close}, V={self.volume})")
+
+
+class BarSeries:
+    """
+    Fixed-capacity ring buffer of OHLCV bars backed by NumPy arrays.
+    Appending is O(1) and allocation-free; once full, the oldest bar is
+    overwritten. A bar with the same timestamp as the newest one replaces
+    it (the still-forming minute), and older timestamps are ignored.
+    The series holds one session (New York calendar day): the first bar of
+    a later day clears it, so the overnight gap never reads as a 1-minute
+    move.
+    Indexing follows Python: series[-1] is the newest Bar.
+    """
+
+    __slots__ = ("capacity", "_ts", "_values", "_start", "_size", "_session_end")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._values = np.full((capacity, len(FIELDS)), np.nan)
+        self._start = 0
+        self._size = 0
+        self._session_end = 0     # ns; bars at or after this start a new session
+
+    def __len__(self):
+        return self._size
+
+    def _slot(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("bar index out of range")
+        return (self._start + i) % self.capacity
+
+    def _slots(self, n=None):
+        n = self._size if n is None else min(n, self._size)
+        return (self._start + np.arange(self._size - n, self._size)) % self.capacity
+
+    # ---------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------
+
+    @property
+    def last_ts(self):
+        return int(self._ts[self._slot(-1)]) if self._size else None
+
+    def append(self, ts, open, high, low, close, volume=0.0):
+        """Add one bar. Returns False if it is older than the newest bar."""
+        if self._size and ts >= self._session_end:
+            self.clear()
+        if not self._size:
+            self._session_end = _session_bounds(ts)[1]
+        else:
+            last = self._slot(-1)
+            if ts < self._ts[last]:
+                return False
+            if ts == self._ts[last]:
+                self._values[last] = (open, high, low, close, volume)
+                return True
+
+        if self._size < self.capacity:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._ts[slot] = ts
+        self._values[slot] = (open, high, low, close, volume)
+        return True
+
+    def append_bar(self, bar):
+        return self.append(bar.ts, bar.open, bar.high, bar.low, bar.close, bar.volume)
+
+    def update(self, bars):
+        """
+        Fold new bars into the series: a provider frame (Datetime +
+        Open/High/Low/Close/Volume) or a (ts, values) pair from
+        frame_arrays / yahoo_data.fetch_intraday_arrays. Only bars at or
+        after the newest stored one are copied, so polling the same growing
+        session costs O(new bars). Bars of a later session replace the
+        stored ones, and only the newest session of a multi-day batch is kept.
+        Returns the number of bars written.
+        """
+        if bars is None or len(bars) == 0:
+            return 0
+        ts = bars[0] if isinstance(bars, tuple) else _frame_ns(bars)
+        if self._size and ts[-1] >= self._session_end:
+            self.clear()
+        if self._size:
+            first = int(np.searchsorted(ts, self.last_ts))
+        else:
+            session_start, self._session_end = _session_bounds(ts[-1])
+            first = int(np.searchsorted(ts, session_start))
+        if isinstance(bars, tuple):
+            ts, values = ts[first:], bars[1][first:]
+        else:
+            ts = ts[first:]
+            values = _frame_values(bars, first)
+        if len(ts) == 0:
+            return 0
+        written = len(ts)
+
+        # Replace the still-forming bar, then append the rest in one write
+        if self._size and ts[0] == self.last_ts:
+            self._values[self._slot(-1)] = values[0]
+            ts, values = ts[1:], values[1:]
+
+        k = len(ts)
+        if k >= self.capacity:
+            self._ts[:] = ts[-self.capacity:]
+            self._values[:] = values[-self.capacity:]
+            self._start, self._size = 0, self.capacity
+        elif k:
+            slots = (self._start + self._size + np.arange(k)) % self.capacity
+            self._ts[slots] = ts
+            self._values[slots] = values
+            overflow = max(0, self._size + k - self.capacity)
+            self._start = (self._start + overflow) % self.capacity
+            self._size = min(self.capacity, self._size + k)
+        return written
+
+    @classmethod
+    def from_frame(cls, df, capacity=DEFAULT_CAPACITY):
+        series = cls(capacity)
+        series.update(df)
+        return series
+
+    def clear(self):
+        self._start = self._size = 0
+
+    # ---------------------------------------------------------
+    # Reading
+    # ---------------------------------------------------------
+
+    def __getitem__(self, i):
+        slot = self._slot(i)
+        return Bar(int(self._ts[slot]), *self._values[slot].tolist())
+
+    @property
+    def last(self):
+        """Newest Bar, or None when empty."""
+        return self[-1] if self._size else None
+
+    def column(self, name, n=None):
+        """Last n values (oldest first) of one field as a new array."""
+        return self._values[self._slots(n), FIELDS.index(name)]
+
+    def closes(self, n=None):
+        return self.column("close", n)
+
+    def times(self, n=None):
+        """Last n bar start times as int64 ns since epoch (UTC)."""
+        return self._ts[self._slots(n)]
+
+    def to_frame(self):
+        """DataFrame in the provider intraday schema, for charts."""
+        slots = self._slots()
+        df = pd.DataFrame({
+            "Datetime": pd.DatetimeIndex(self._ts[slots].view("datetime64[ns]"))
+                          .tz_localize("UTC").tz_convert(MARKET_TZ),
+        })
+        for i, col in enumerate(FRAME_COLUMNS):
+            df[col] = self._values[slots, i]
+        return df
+
+    def __repr__(self):
+        return f"BarSeries({self._size}/{self.capacity} bars)"
+
+
+def _session_bounds(ts):
+    """[start, end) in ns of the New York calendar day containing ts."""
+    day = pd.Timestamp(int(ts), tz="UTC").tz_convert(MARKET_TZ).date()
+    start = pd.Timestamp(day).tz_localize(MARKET_TZ)
+    end = pd.Timestamp(day + datetime.timedelta(days=1)).tz_localize(MARKET_TZ)
+    return start.value, end.value
+
+
+def _frame_ns(df):
+    """Bar start times of a frame as int64 ns since epoch (UTC)."""
+    times = df["Datetime"] if "Datetime" in df.columns else df.index
+    return index_ns(getattr(times, "array", times))
+
+
+def index_ns(times):
+    """int64 ns since epoch (UTC) of datetimes; naive ones are New York time."""
+    if getattr(times, "tz", None) is None:
+        times = pd.DatetimeIndex(times).tz_localize(MARKET_TZ)
+    if getattr(times, "unit", "ns") != "ns":
+        times = times.as_unit("ns")
+    return times.asi8
+
+
+def _frame_values(df, first=0):
+    values = np.empty((len(df) - first, len(FIELDS)))
+    for i, col in enumerate(FRAME_COLUMNS):
+        if col not in df.columns:
+            values[:, i] = np.nan
+            continue
+        column = df[col].to_numpy()
+        if column.dtype != np.float64:
+            column = pd.to_numeric(df[col], errors="coerce").to_numpy(float)
+        values[:, i] = column[first:]
+    return values
+
+
+def frame_arrays(df):
+    """(ts, values) arrays of a provider frame, as BarSeries.update takes them."""
+    if df is None or len(df) == 0:
+        return None
+    return _frame_ns(df), _frame_values(df)
+
+
+def last_closes(bars, n=2):
+    """
+    Last n closes of a BarSeries or a DataFrame with a Close column, from
+    the newest session only (fewer than n at the start of a session).
+    """
+    if bars is None:
+        return None
+    if isinstance(bars, BarSeries):
+        return bars.closes(n)
+    tail = bars.iloc[-n:]
+    closes = np.asarray(tail["Close"], dtype=float).ravel()
+    if len(tail) == 0:
+        return closes
+    ts = _frame_ns(tail)
+    return closes[ts >= _session_bounds(ts[-1])[0]]
@@ -1,57 +1,233 @@
-import datetime
-from utils.alpha_live import live_divergence_signal
+import numpy as np
+
+from utils.bars import last_closes
+from utils.brokers.base import Order, run_sync
+from utils.data_bus import BarBus
+from utils.event_log import EventLog, format_event
+from utils.instrument import timed, timer
+
+
+class DivergenceStrategy:
+    """
+    ES/VIX-style divergence on one equity/volatility-index pair:
+    equity up + vol down -> LONG, equity down + vol up -> SHORT.
+    """
+
+    def __init__(self, name, symbol, vol_symbol):
+        self.name = name
+        self.symbol = symbol
+        self.vol_symbol = vol_symbol
+
+    def __repr__(self):
+        return f"DivergenceStrategy({self.name!r}, {self.symbol!r}, {self.vol_symbol!r})"
+
+
+# Default strategy plus ready-made pairs
+DEFAULT_STRATEGY = DivergenceStrategy("SPY/VIX", "SPY", "^VIX")
+PAIR_STRATEGIES = [
+    DEFAULT_STRATEGY,
+    DivergenceStrategy("QQQ/VXN", "QQQ", "^VXN"),
+    DivergenceStrategy("IWM/RVX", "IWM", "^RVX"),
+]
+
+SIGNAL_LABELS = np.array(["SHORT", "NONE", "LONG"], dtype=object)
+
+
+def evaluate_divergence(strategies, frames):
+    """
+    Evaluate every strategy's divergence signal in one vectorized pass over
+    the last two 1-minute closes of each symbol. `frames` maps symbols to
+    BarSeries (as published by BarBus) or DataFrames.
+    Returns {strategy name: dict(signal, es_move, vix_move, spy_close,
+    vix_close) or None if either symbol lacks two bars in its newest session}.
+    """
+    names, last2 = [], []
+    results = {}
+    for strat in strategies:
+        # Closes of the newest session only, so there may be fewer than two
+        eq = last_closes(frames.get(strat.symbol))
+        vol = last_closes(frames.get(strat.vol_symbol))
+        if eq is None or vol is None or len(eq) < 2 or len(vol) < 2:
+            results[strat.name] = None
+            continue
+        names.append(strat.name)
+        last2.append((eq, vol))
+
+    if not names:
+        return results
+
+    closes = np.asarray(last2)                  # (n, 2 [eq, vol], 2 [prev, last])
+    moves = closes[:, :, 1] - closes[:, :, 0]   # (n, 2)
+    dirs = np.sign(moves)
+
+    long_mask = (dirs[:, 0] == 1) & (dirs[:, 1] == -1)
+    short_mask = (dirs[:, 0] == -1) & (dirs[:, 1] == 1)
+    labels = SIGNAL_LABELS[long_mask.astype(int) - short_mask.astype(int) + 1]
+
+    for i, name in enumerate(names):
+        results[name] = {
+            "signal": labels[i],
+            "es_move": float(moves[i, 0]),
+            "vix_move": float(moves[i, 1]),
+            "spy_close": float(closes[i, 0, 1]),
+            "vix_close": float(closes[i, 1, 1]),
+        }
+    return results
+
+
+# Acks that change the engine's book; without a broker every order counts as filled
+FILL_STATUSES = ("FILLED", "PARTIAL")
+
+
+def _filled(ack):
+    return ack is None or ack.status in FILL_STATUSES
+
+
+def _filled_qty(ack, qty):
+    """Quantity an order actually filled: all of it without a broker."""
+    return qty if ack is None else ack.filled_qty
+
+
+def _ack_fields(ack):
+    if ack is None:
+        return {}
+    return {
+        "order_status": ack.status,
+        "fill_price": ack.fill_price,
+        "latency_ms": ack.latency * 1000 if ack.latency is not None else None,
+    }
 
 
 class BotEngine:
     """
     Core trading bot engine (simulation mode).
     Handles:
-      - Live signal intake
-      - Entry/exit logic
+      - Live signal intake from a shared bar bus (BarSeries ring buffers)
+      - Entry/exit logic per strategy
       - Logging
-      - Broker abstraction (IBKR / Alpaca)
+      - Broker abstraction (IBKR / Alpaca / simulated exchange), with
+        simultaneous orders submitted as one batch
+    Methods default to the first strategy, so single-pair callers keep
+    using should_enter / enter_trade / exit_trade without naming one.
     """
 
-    def __init__(self, base_capital_usd=65):
-        self.position = None          # "LONG", "SHORT", or None
+    def __init__(self, base_capital_usd=65, strategies=None, bus=None,
+                 log_capacity=1000, log_path=None, clock=None):
+        self.positions = {}           # strategy name -> "LONG", "SHORT", or None
+        self.quantities = {}          # strategy name -> filled quantity of the open position
+        self.strategies = {}          # strategy name -> DivergenceStrategy
         self.last_trade = None        # last executed trade description
-        self.log = []                 # recent log entries
+        self.log = EventLog(capacity=log_capacity, path=log_path, clock=clock)  # structured events
         self.broker = None            # assigned broker connector
         self.base_capital_usd = base_capital_usd  # e.g. ~65 USD from 100 AUD
+        self.bus = bus or BarBus()
+        self._last_signals = {}       # strategy name -> last logged signal label
+
+        for strat in strategies or [DEFAULT_STRATEGY]:
+            self.add_strategy(strat)
+
+    # ---------------------------------------------------------
+    # Strategies
+    # ---------------------------------------------------------
+
+    def add_strategy(self, strategy):
+        """Host another strategy; its symbols join the shared bar feed."""
+        if strategy.name in self.strategies:
+            raise ValueError(f"Strategy {strategy.name!r} already registered")
+        self.strategies[strategy.name] = strategy
+        self.positions[strategy.name] = None
+        self.bus.subscribe(strategy.symbol, strategy.vol_symbol)
+
+    def remove_strategy(self, name):
+        strategy = self.strategies.pop(name)
+        self.positions.pop(name, None)
+        self.quantities.pop(name, None)
+        self.bus.unsubscribe(strategy.symbol, strategy.vol_symbol)
+
+    @property
+    def default_strategy(self):
+        """Name of the first registered strategy."""
+        if not self.strategies:
+            raise ValueError("No strategies registered; add one with add_strategy()")
+        return next(iter(self.strategies))
+
+    def _strategy(self, name):
+        return self.strategies[name or self.default_strategy]
+
+    @property
+    def position(self):
+        """Position of the default strategy."""
+        return self.positions.get(self.default_strategy)
+
+    @position.setter
+    def position(self, value):
+        self.positions[self.default_strategy] = value
+
+    # ---------------------------------------------------------
+    # Broker
+    # ---------------------------------------------------------
 
     def set_broker(self, broker_name):
         """Assign a broker connector (simulation mode)."""
         if broker_name == "Interactive Brokers (IBKR)":
             from utils.brokers.ibkr import IBKRBroker
             self.broker = IBKRBroker()
-            self._log("Broker set to IBKR (simulation mode).")
+            self._log("Broker set to IBKR (simulation mode).", kind="broker")
         elif broker_name == "Alpaca":
             from utils.brokers.alpaca import AlpacaBroker
             self.broker = AlpacaBroker()
-            self._log("Broker set to Alpaca (simulation mode).")
+            self._log("Broker set to Alpaca (simulation mode).", kind="broker")
+        elif broker_name == "Simulated exchange":
+            from utils.brokers.simulated import SimulatedBroker
+            self.broker = SimulatedBroker()
+            self._log("Broker set to the simulated exchange.", kind="broker")
         else:
             self.broker = None
-            self._log("No broker selected.")
+            self._log("No broker selected.", kind="broker")
+
+    # ---------------------------------------------------------
+    # Signals
+    # ---------------------------------------------------------
+
+    @timed("bot.live_signals")
+    def get_live_signals(self):
+        """
+        Tick the shared bar bus once and evaluate every strategy.
+        Returns {strategy name: signal dict or None}.
+        """
+        frames = self.bus.tick()
+        signals = evaluate_divergence(self.strategies.values(), frames)
+
+        # Log signal changes only, so polling doesn't flood the log
+        for name, live in signals.items():
+            label = live["signal"] if live else None
+            if label != self._last_signals.get(name):
+                self._last_signals[name] = label
+                if live:
+                    self.log.append("signal", f"{name} signal {label}", strategy=name, **live)
+        return signals
 
     def get_live_signal(self):
-        """Fetch the current live divergence signal."""
-        return live_divergence_signal()
+        """Fetch the current live divergence signal of the default strategy."""
+        return self.get_live_signals().get(self.default_strategy)
+
+    # ---------------------------------------------------------
+    # Entry / exit
+    # ---------------------------------------------------------
 
-    def should_enter(self, signal):
+    def should_enter(self, signal, strategy=None):
         """Entry logic: only enter if no position is open."""
-        if self.position is None and signal in ["LONG", "SHORT"]:
+        if self.positions[self._strategy(strategy).name] is None and signal in ["LONG", "SHORT"]:
             return True
         return False
 
-    def should_exit(self):
+    def should_exit(self, strategy=None):
         """Exit logic: always exit at market close if a position is open."""
-        return self.position is not None
+        return self.positions[self._strategy(strategy).name] is not None
 
-    def _log(self, message):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        entry = f"[{timestamp}] {message}"
-        self.log.append(entry)
-        self.last_trade = entry
+    def _log(self, message, kind="info", **fields):
+        event = self.log.append(kind, message, **fields)
+        self.last_trade = format_event(event)
 
     def _estimate_quantity(self, price):
         """
@@ -63,45 +239,121 @@ class BotEngine:
         qty = self.base_capital_usd / price
         return round(qty, 4)
 
-    def enter_trade(self, signal, price):
-        """Simulate entering a trade and (optionally) sending to broker."""
-        qty = self._estimate_quantity(price)
-        self.position = signal
+    def _submit(self, orders):
+        """Send orders to the broker as one batch; returns one Ack (or None) per order."""
+        if self.broker is None or not orders:
+            return [None] * len(orders)
+        with timer("bot.broker_submit"):
+            return run_sync(self.broker.submit_batch(orders))
 
-        broker_msg = None
-        if self.broker is not None:
+    @timed("bot.enter_trades")
+    def enter_trades(self, entries):
+        """
+        Enter several trades at once: entries is a list of
+        (signal, price, strategy name). Orders go to the broker in one batch;
+        a position is opened only for orders it filled (fully or partly),
+        sized by the quantity actually filled.
+        """
+        plans = []
+        for signal, price, strategy in entries:
+            strat = self._strategy(strategy)
+            qty = self._estimate_quantity(price)
             side = "BUY" if signal == "LONG" else "SELL"
-            broker_msg = self.broker.place_order("SPY", side, qty)
+            plans.append((strat, signal, price, qty,
+                          Order(strat.symbol, side, qty, ref_price=price)))
 
-        msg = f"Entered {signal} on SPY at ~{price:.2f} with qty {qty}"
-        if broker_msg:
-            msg += f" | Broker: {broker_msg}"
+        acks = self._submit([plan[-1] for plan in plans])
 
-        self._log(msg)
+        for (strat, signal, price, qty, _), ack in zip(plans, acks):
+            if not _filled(ack):
+                self._log_unfilled(ack, f"Entry {signal}", strat, signal, price, qty)
+                continue
+            filled = _filled_qty(ack, qty)
+            self.positions[strat.name] = signal
+            self.quantities[strat.name] = filled
+            broker_msg = ack.message if ack else None
 
-    def exit_trade(self, price):
-        """Simulate exiting a trade and (optionally) sending to broker."""
-        if self.position is None:
-            return
+            msg = f"Entered {signal} on {strat.symbol} at ~{price:.2f} with qty {filled}"
+            if filled != qty:
+                msg += f" (partial fill of {qty})"
+            if broker_msg:
+                msg += f" | Broker: {broker_msg}"
 
-        qty = self._estimate_quantity(price)
+            self._log(msg, kind="entry", strategy=strat.name, symbol=strat.symbol,
+                      side=signal, price=price, qty=filled, broker=broker_msg,
+                      **_ack_fields(ack))
+
+    @timed("bot.exit_trades")
+    def exit_trades(self, exits):
+        """
+        Exit several trades at once: exits is a list of (price, strategy name).
+        Strategies without an open position are skipped. Each closing order
+        is for the position's filled quantity; whatever the broker leaves
+        unfilled stays open for the next exit.
+        """
+        plans = []
+        for price, strategy in exits:
+            strat = self._strategy(strategy)
+            position = self.positions[strat.name]
+            if position is None:
+                continue
+            qty = self.quantities.get(strat.name) or self._estimate_quantity(price)
+            side = "SELL" if position == "LONG" else "BUY"
+            plans.append((strat, position, price, qty,
+                          Order(strat.symbol, side, qty, ref_price=price, intent="close")))
 
-        broker_msg = None
-        if self.broker is not None:
-            side = "SELL" if self.position == "LONG" else "BUY"
-            broker_msg = self.broker.close_position("SPY")
+        acks = self._submit([plan[-1] for plan in plans])
 
-        msg = f"Exited {self.position} on SPY at ~{price:.2f} with qty {qty}"
-        if broker_msg:
-            msg += f" | Broker: {broker_msg}"
+        for (strat, position, price, qty, _), ack in zip(plans, acks):
+            if not _filled(ack):
+                self._log_unfilled(ack, f"Exit of {position}", strat, position, price, qty)
+                continue
+            filled = _filled_qty(ack, qty)
+            remaining = round(qty - filled, 4)
+            broker_msg = ack.message if ack else None
 
-        self._log(msg)
-        self.position = None
+            if remaining > 0:
+                msg = (f"Partly exited {position} on {strat.symbol} at ~{price:.2f} "
+                       f"with qty {filled}, {remaining} still open")
+                kind = "partial_exit"
+                self.quantities[strat.name] = remaining
+            else:
+                msg = f"Exited {position} on {strat.symbol} at ~{price:.2f} with qty {filled}"
+                kind = "exit"
+                self.positions[strat.name] = None
+                self.quantities.pop(strat.name, None)
+            if broker_msg:
+                msg += f" | Broker: {broker_msg}"
+
+            self._log(msg, kind=kind, strategy=strat.name, symbol=strat.symbol,
+                      side=position, price=price, qty=filled, broker=broker_msg,
+                      **_ack_fields(ack))
+
+    def _log_unfilled(self, ack, action, strat, side, price, qty):
+        """Log an order the broker rejected or left working; the book is unchanged."""
+        kind = "reject" if ack.status == "REJECTED" else "order"
+        outcome = "rejected" if ack.status == "REJECTED" else f"not filled ({ack.status})"
+        msg = f"{action} on {strat.symbol} at ~{price:.2f} {outcome}"
+        if ack.message:
+            msg += f" | Broker: {ack.message}"
+        self.log.append(kind, msg, strategy=strat.name, symbol=strat.symbol, side=side,
+                        price=price, qty=qty, broker=ack.message or None, **_ack_fields(ack))
+
+    def enter_trade(self, signal, price, strategy=None):
+        """Simulate entering a trade and (optionally) sending to broker."""
+        self.enter_trades([(signal, price, strategy)])
+
+    def exit_trade(self, price, strategy=None):
+        """Simulate exiting a trade and (optionally) sending to broker."""
+        self.exit_trades([(price, strategy)])
 
     def get_status(self):
         """Return bot status for UI display."""
         return {
             "position": self.position,
+            "positions": dict(self.positions),
+            "quantities": dict(self.quantities),
             "last_trade": self.last_trade,
-            "log": self.log[-10:],  # last 10 entries
+            "log": [format_event(e) for e in self.log.tail(10)],  # last 10 entries
+            "broker_latency": self.broker.latency_stats() if self.broker else None,
         }
@@ -0,0 +1,350 @@
+import argparse
+import datetime
+import json
+import os
+import signal
+import threading
+from zoneinfo import ZoneInfo
+
+from utils import instrument
+from utils.market_calendar import is_trading_day
+
+# asyncio and utils.bot_engine are imported where they are used, so the
+# dashboard can read_status() without loading the engine stack.
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+
+# Where the runner publishes its status for the Streamlit page to read.
+STATUS_FILE = os.getenv("BOT_STATUS_FILE", os.path.join("data", "bot_status.json"))
+
+# Append-only event log of the headless bot (rotated JSON lines).
+EVENT_LOG_FILE = os.getenv("BOT_EVENT_LOG", os.path.join("data", "bot_events.jsonl"))
+
+# Prometheus text export of the runner's stage timings (textfile collector).
+METRICS_FILE = os.getenv("BOT_METRICS_FILE", os.path.join("data", "bot_metrics.prom"))
+
+# A running status whose runner has missed this many polls is reported stale
+# (the process was killed before it could publish running=False).
+STALE_AFTER_POLLS = 3
+
+BROKER_CHOICES = {
+    "ibkr": "Interactive Brokers (IBKR)",
+    "alpaca": "Alpaca",
+    "sim": "Simulated exchange",
+    "none": "None",
+}
+
+
+class SessionSchedule:
+    """
+    When the bot may enter and when it must exit within a session.
+    Entries are allowed from open + entry_delay for entry_window minutes;
+    open positions are closed from close - exit_lead onwards.
+    """
+
+    def __init__(self, entry_delay_minutes=1, entry_window_minutes=30, exit_lead_minutes=5):
+        self.entry_delay = datetime.timedelta(minutes=entry_delay_minutes)
+        self.entry_window = datetime.timedelta(minutes=entry_window_minutes)
+        self.exit_lead = datetime.timedelta(minutes=exit_lead_minutes)
+
+    def session(self, day):
+        """(open, close) as tz-aware datetimes, or None on non-trading days."""
+        if not is_trading_day(day):
+            return None
+        return (
+            datetime.datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ),
+            datetime.datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ),
+        )
+
+    def phase(self, now):
+        """One of: closed, pre_entry, entry, holding, exit."""
+        session = self.session(now.date())
+        if session is None:
+            return "closed"
+        open_at, close_at = session
+        entry_start = open_at + self.entry_delay
+        exit_at = close_at - self.exit_lead
+
+        if now < open_at or now >= close_at:
+            return "closed"
+        if now < entry_start:
+            return "pre_entry"
+        if now >= exit_at:
+            return "exit"
+        if now < entry_start + self.entry_window:
+            return "entry"
+        return "holding"
+
+    def next_open(self, now):
+        """Start of the next session at or after now."""
+        day = now.date()
+        while True:
+            session = self.session(day)
+            if session is not None and session[1] > now:
+                return max(session[0], now)
+            day += datetime.timedelta(days=1)
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+
+class BotRunner:
+    """
+    Drives BotEngine on the market schedule, outside Streamlit.
+    step(now) makes one decision per hosted strategy (enter during the
+    entry window, exit near the close); run() calls it from an asyncio loop
+    every poll_interval seconds during the session and publishes status to
+    STATUS_FILE (stage timings go to metrics_file as Prometheus text
+    when one is given). With a BarRecorder, run() also archives the
+    session's bars every poll, so the local provider can serve them if
+    the live feeds go down.
+    """
+
+    def __init__(self, engine=None, schedule=None, poll_interval=15,
+                 idle_interval=300, status_file=STATUS_FILE, metrics_file=None,
+                 recorder=None):
+        if engine is None:
+            from utils.bot_engine import BotEngine
+            engine = BotEngine()
+        self.engine = engine
+        self.schedule = schedule or SessionSchedule()
+        self.poll_interval = poll_interval
+        self.idle_interval = idle_interval
+        self.status_file = status_file
+        self.metrics_file = metrics_file
+        self.recorder = recorder
+
+        self.session_day = None
+        self.entered_today = set()
+        self.last_signals = {}
+        self.last_poll = None
+        self.last_error = None
+        self.running = False
+        self._stop = None
+
+    @instrument.timed("runner.step")
+    def step(self, now, signals=None):
+        """
+        Make one scheduling decision for every strategy at `now` (tz-aware).
+        `signals` ({strategy name: signal dict}) overrides the live feed
+        (used by replays); otherwise the engine ticks its shared bar bus
+        once for all strategies.
+        Returns the session phase.
+        """
+        phase = self.schedule.phase(now)
+        self.last_poll = now
+
+        if now.date() != self.session_day:
+            self.session_day = now.date()
+            self.entered_today = set()
+
+        engine = self.engine
+        if phase == "entry":
+            pending = [name for name in engine.strategies if name not in self.entered_today]
+            if not pending:
+                return phase
+        elif phase in ("exit", "closed"):
+            # Positions never carry overnight; a restart after the close
+            # still flattens anything left open.
+            pending = [name for name in engine.strategies if engine.should_exit(name)]
+            if not pending:
+                return phase
+        else:
+            return phase
+
+        signals = signals if signals is not None else engine.get_live_signals()
+        self.last_signals = signals
+
+        # Collect every decision of this tick so the broker sees one batch
+        entries, exits = [], []
+        for name in pending:
+            live = signals.get(name)
+            if not live:
+                continue
+            if phase == "entry":
+                if engine.should_enter(live["signal"], name):
+                    entries.append((live["signal"], live["spy_close"], name))
+            else:
+                exits.append((live["spy_close"], name))
+
+        if entries:
+            engine.enter_trades(entries)
+            self.entered_today.update(name for _, _, name in entries)
+        if exits:
+            engine.exit_trades(exits)
+
+        return phase
+
+    def status(self):
+        """JSON-serializable snapshot for the UI."""
+        status = self.engine.get_status()
+        now = datetime.datetime.now(MARKET_TZ)
+        return {
+            "running": self.running,
+            "phase": self.schedule.phase(now),
+            "poll_interval": self.poll_interval,
+            "last_poll": self.last_poll.isoformat() if self.last_poll else None,
+            "next_poll": ((self.last_poll + datetime.timedelta(seconds=self._sleep_for(self.last_poll)))
+                          .isoformat() if self.last_poll else None),
+            "next_open": self.schedule.next_open(now).isoformat(),
+            "entered_today": sorted(self.entered_today),
+            "last_signals": self.last_signals,
+            "last_error": self.last_error,
+            "broker": type(self.engine.broker).__name__ if self.engine.broker else None,
+            **status,
+            "timings": instrument.snapshot(),
+        }
+
+    def publish_status(self):
+        """Atomically write status() to the status file (and metrics to metrics_file)."""
+        if self.metrics_file:
+            instrument.write_prometheus(self.metrics_file)
+        if not self.status_file:
+            return
+        directory = os.path.dirname(self.status_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.status_file + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.status(), fh, default=str)
+        os.replace(tmp, self.status_file)
+
+    def record_bars(self):
+        """Archive the session's bars so far; a failed fetch is logged, not raised."""
+        try:
+            self.recorder.record()
+        except Exception as e:
+            print(f"Bar recording error: {e}")
+
+    def _sleep_for(self, now):
+        if self.schedule.phase(now) != "closed":
+            return self.poll_interval
+        until_open = (self.schedule.next_open(now) - now).total_seconds()
+        return max(self.poll_interval, min(self.idle_interval, until_open))
+
+    async def run(self):
+        """Poll until stop() is called."""
+        import asyncio
+
+        self._stop = asyncio.Event()
+        self.running = True
+        try:
+            while not self._stop.is_set():
+                now = datetime.datetime.now(MARKET_TZ)
+                try:
+                    # Engine calls may block on network I/O
+                    await asyncio.to_thread(self.step, now)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                if self.recorder is not None and self.schedule.phase(now) != "closed":
+                    await asyncio.to_thread(self.record_bars)
+                await asyncio.to_thread(self.publish_status)
+
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self._sleep_for(now))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.running = False
+            self.publish_status()
+
+    def stop(self):
+        """Ask run() to finish after the current step."""
+        if self._stop is not None:
+            self._stop.set()
+
+    def start_in_thread(self):
+        """Run the loop on a daemon thread (for embedding in another process)."""
+        import asyncio
+
+        thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        thread.start()
+        return thread
+
+
+def read_status(path=STATUS_FILE, now=None):
+    """
+    Load the status last published by a runner, or None. "stale" is True
+    when it claims to be running but has missed STALE_AFTER_POLLS polls.
+    """
+    try:
+        with open(path) as fh:
+            status = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    status["stale"] = bool(status.get("running")) and _missed_polls(status, now)
+    return status
+
+
+def _missed_polls(status, now=None):
+    if not status.get("last_poll"):
+        return False
+    last_poll = datetime.datetime.fromisoformat(status["last_poll"])
+    if status.get("next_poll"):
+        interval = datetime.datetime.fromisoformat(status["next_poll"]) - last_poll
+    else:
+        interval = datetime.timedelta(seconds=status.get("poll_interval") or 15)
+    now = now or datetime.datetime.now(MARKET_TZ)
+    return now - last_poll > STALE_AFTER_POLLS * interval
+
+
+def main(argv=None):
+    import asyncio
+
+    from utils.bar_archive import BarRecorder
+    from utils.bot_engine import DEFAULT_STRATEGY, PAIR_STRATEGIES, BotEngine
+
+    parser = argparse.ArgumentParser(description="Run the ES/VIX divergence bot headless.")
+    parser.add_argument("--broker", choices=sorted(BROKER_CHOICES), default="none")
+    parser.add_argument("--capital", type=float, default=65, help="Base capital in USD")
+    parser.add_argument("--pairs", nargs="+", default=[DEFAULT_STRATEGY.name],
+                        choices=[s.name for s in PAIR_STRATEGIES],
+                        help="Strategies to run, e.g. SPY/VIX QQQ/VXN IWM/RVX")
+    parser.add_argument("--poll", type=float, default=15, help="Seconds between polls in session")
+    parser.add_argument("--idle", type=float, default=300, help="Max seconds between polls when closed")
+    parser.add_argument("--entry-delay", type=int, default=1, help="Minutes after the open before entering")
+    parser.add_argument("--entry-window", type=int, default=30, help="Minutes during which entries are allowed")
+    parser.add_argument("--exit-lead", type=int, default=5, help="Minutes before the close to exit")
+    parser.add_argument("--status-file", default=STATUS_FILE)
+    parser.add_argument("--log-file", default=EVENT_LOG_FILE, help="Append-only JSON-lines event log")
+    parser.add_argument("--metrics-file", default=METRICS_FILE,
+                        help="Prometheus text file of stage timings ('' to disable)")
+    parser.add_argument("--no-record", action="store_true",
+                        help="Don't archive session bars for the local data provider")
+    args = parser.parse_args(argv)
+
+    by_name = {s.name: s for s in PAIR_STRATEGIES}
+    engine = BotEngine(
+        base_capital_usd=args.capital,
+        strategies=[by_name[name] for name in args.pairs],
+        log_path=args.log_file,
+    )
+    engine.set_broker(BROKER_CHOICES[args.broker])
+    runner = BotRunner(
+        engine,
+        SessionSchedule(args.entry_delay, args.entry_window, args.exit_lead),
+        poll_interval=args.poll,
+        idle_interval=args.idle,
+        status_file=args.status_file,
+        metrics_file=args.metrics_file or None,
+        recorder=None if args.no_record else BarRecorder(engine.bus.symbols),
+    )
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, runner.stop)
+            except NotImplementedError:
+                pass
+        await runner.run()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,23 @@
-class AlpacaBroker:
+from utils.brokers.base import Ack, AsyncBroker
+
+
+class AlpacaBroker(AsyncBroker):
     """
     Placeholder Alpaca broker connector.
     Replace internals with real API calls only after thorough testing
     and with full awareness of the risks of automated trading.
     """
 
-    def __init__(self):
-        self.connected = False
+    name = "Alpaca (simulation mode)"
 
-    def connect(self):
-        """Simulate connecting to Alpaca."""
-        self.connected = True
-        return "Connected to Alpaca (simulation mode)"
+    async def _submit(self, order):
+        """Simulate placing an order."""
+        if order.intent == "close":
+            message = f"Simulated Alpaca close position: {order.symbol}"
+        else:
+            message = f"Simulated Alpaca order: {order.side} {order.quantity} {order.symbol}"
+        return Ack(order, "FILLED", filled_qty=order.quantity,
+                   fill_price=order.ref_price, message=message)
 
     def place_order(self, symbol, side, quantity):
         """Simulate placing an order."""
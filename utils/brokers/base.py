@@ -0,0 +1,120 @@
+import abc
+import asyncio
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+_order_ids = itertools.count(1)
+
+
+class Order:
+    """A single order sent to a broker connector."""
+
+    __slots__ = ("client_id", "symbol", "side", "quantity", "order_type",
+                 "limit_price", "ref_price", "intent", "created_at")
+
+    def __init__(self, symbol, side, quantity, order_type="MKT", limit_price=None,
+                 ref_price=None, intent="open"):
+        self.client_id = next(_order_ids)
+        self.symbol = symbol
+        self.side = side                # "BUY" or "SELL"
+        self.quantity = quantity
+        self.order_type = order_type    # "MKT" or "LMT"
+        self.limit_price = limit_price
+        self.ref_price = ref_price      # last seen price, used by simulators
+        self.intent = intent            # "open" or "close"
+        self.created_at = time.perf_counter()
+
+    def __repr__(self):
+        return f"Order#{self.client_id}({self.side} {self.quantity} {self.symbol} {self.order_type})"
+
+
+class Ack:
+    """Broker acknowledgement for an Order."""
+
+    __slots__ = ("order", "status", "filled_qty", "fill_price", "broker_id",
+                 "message", "latency")
+
+    def __init__(self, order, status, filled_qty=0.0, fill_price=None,
+                 broker_id=None, message=""):
+        self.order = order
+        self.status = status            # "FILLED", "PARTIAL", "ACCEPTED" or "REJECTED"
+        self.filled_qty = filled_qty
+        self.fill_price = fill_price
+        self.broker_id = broker_id
+        self.message = message
+        self.latency = None             # submit-to-ack seconds, set by AsyncBroker
+
+    def __repr__(self):
+        return f"Ack({self.order!r}, {self.status}, {self.filled_qty}@{self.fill_price})"
+
+
+class AsyncBroker(abc.ABC):
+    """
+    Common async broker protocol.
+    Subclasses implement `_submit(order) -> Ack` (and may override
+    `_submit_batch` when the venue accepts several orders per request).
+    submit / submit_batch time every order from submission to ack.
+    """
+
+    name = "broker"
+
+    def __init__(self, latency_window=1000):
+        self.connected = False
+        self.latencies = deque(maxlen=latency_window)
+
+    async def connect(self):
+        self.connected = True
+        return f"Connected to {self.name}"
+
+    @abc.abstractmethod
+    async def _submit(self, order):
+        """Send one order to the venue and return its Ack."""
+
+    async def _submit_batch(self, orders):
+        return await asyncio.gather(*(self._submit(order) for order in orders))
+
+    def _record(self, ack, started):
+        ack.latency = time.perf_counter() - started
+        self.latencies.append(ack.latency)
+        return ack
+
+    async def submit(self, order):
+        """Send one order and wait for its acknowledgement."""
+        started = time.perf_counter()
+        return self._record(await self._submit(order), started)
+
+    async def submit_batch(self, orders):
+        """Send several orders together; acks come back in order."""
+        if not orders:
+            return []
+        started = time.perf_counter()
+        acks = await self._submit_batch(list(orders))
+        return [self._record(ack, started) for ack in acks]
+
+    def latency_stats(self):
+        """Submit-to-ack latency percentiles in milliseconds."""
+        if not self.latencies:
+            return {"count": 0}
+        ms = np.fromiter(self.latencies, dtype=float) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {"count": len(ms), "p50_ms": float(p50), "p95_ms": float(p95),
+                "p99_ms": float(p99), "max_ms": float(ms.max())}
+
+
+def run_sync(coro):
+    """
+    Run a broker coroutine from synchronous code. Inside a running event
+    loop (where asyncio.run fails) it runs on a fresh loop in a worker
+    thread and blocks until done; async callers should await the
+    coroutine instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
@@ -0,0 +1,101 @@
+import asyncio
+import random
+import time
+
+from utils.brokers.base import Ack, AsyncBroker, Order
+
+
+class SimulatedBroker(AsyncBroker):
+    """
+    In-process simulated exchange for offline load testing.
+    - latency_ms: (low, high) uniform round-trip latency per request
+    - fill_probability / partial_probability / reject_probability shape
+      the outcome of each order
+    - slippage_bps moves fills against the order side
+    A batch costs one round trip, like a venue with a batch order endpoint.
+    """
+
+    name = "Simulated exchange"
+
+    def __init__(self, latency_ms=(5, 20), fill_probability=1.0, partial_probability=0.0,
+                 reject_probability=0.0, slippage_bps=1.0, seed=None, latency_window=1000):
+        super().__init__(latency_window)
+        self.latency_ms = latency_ms
+        self.fill_probability = fill_probability
+        self.partial_probability = partial_probability
+        self.reject_probability = reject_probability
+        self.slippage_bps = slippage_bps
+        self.rng = random.Random(seed)
+        self._next_id = 1
+
+    async def _round_trip(self):
+        low, high = self.latency_ms
+        await asyncio.sleep(self.rng.uniform(low, high) / 1000)
+
+    def _fill(self, order):
+        broker_id = f"SIM-{self._next_id}"
+        self._next_id += 1
+
+        roll = self.rng.random()
+        if roll < self.reject_probability:
+            return Ack(order, "REJECTED", broker_id=broker_id,
+                       message=f"Simulated reject: {order.side} {order.quantity} {order.symbol}")
+
+        price = order.limit_price if order.order_type == "LMT" else order.ref_price
+        if price is not None:
+            direction = 1 if order.side == "BUY" else -1
+            price = price * (1 + direction * self.slippage_bps / 10000)
+
+        if self.rng.random() >= self.fill_probability:
+            return Ack(order, "ACCEPTED", fill_price=None, broker_id=broker_id,
+                       message=f"Simulated working order: {order.side} {order.quantity} {order.symbol}")
+
+        if self.rng.random() < self.partial_probability:
+            qty = round(order.quantity * self.rng.uniform(0.1, 0.9), 4)
+            status = "PARTIAL"
+        else:
+            qty = order.quantity
+            status = "FILLED"
+
+        price_text = f" @ {price:.2f}" if price is not None else ""
+        return Ack(order, status, filled_qty=qty, fill_price=price, broker_id=broker_id,
+                   message=f"Simulated fill: {order.side} {qty} {order.symbol}{price_text}")
+
+    async def _submit(self, order):
+        await self._round_trip()
+        return self._fill(order)
+
+    async def _submit_batch(self, orders):
+        await self._round_trip()
+        return [self._fill(order) for order in orders]
+
+
+async def load_test(broker, n_orders=1000, batch_size=10, symbols=("SPY", "QQQ", "IWM"),
+                    concurrency=8, ref_price=100.0):
+    """
+    Push n_orders through a broker in batches, with up to `concurrency`
+    batches in flight. Returns throughput and latency stats.
+    """
+    orders = [
+        Order(symbols[i % len(symbols)], "BUY" if i % 2 == 0 else "SELL", 1, ref_price=ref_price)
+        for i in range(n_orders)
+    ]
+    batches = [orders[i:i + batch_size] for i in range(0, n_orders, batch_size)]
+    gate = asyncio.Semaphore(concurrency)
+
+    async def send(batch):
+        async with gate:
+            return await broker.submit_batch(batch)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(send(b) for b in batches))
+    elapsed = time.perf_counter() - started
+
+    acks = [ack for batch in results for ack in batch]
+    return {
+        "orders": len(acks),
+        "seconds": elapsed,
+        "orders_per_sec": len(acks) / elapsed if elapsed else float("inf"),
+        "statuses": {s: sum(1 for a in acks if a.status == s) for s in {a.status for a in acks}},
+        **broker.latency_stats(),
+    }
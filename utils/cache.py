@@ -0,0 +1,198 @@
+import datetime
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+# Every cache created by ttl_cache, by name, for stats and clearing.
+_registry = {}
+_registry_lock = threading.Lock()
+
+# Lifetimes (seconds) of cached daily ranges
+CLOSED_DAILY_TTL_SECONDS = 86400   # daily ranges that end before today
+OPEN_DAILY_TTL_SECONDS = 300       # daily ranges that include today
+
+
+def daily_ttl(end):
+    """
+    Cache lifetime of a half-open daily range ending at `end` (YYYY-MM-DD or
+    date): long once every bar in it is final, short while today's is forming.
+    """
+    if datetime.date.fromisoformat(str(end)[:10]) <= datetime.date.today():
+        return CLOSED_DAILY_TTL_SECONDS
+    return OPEN_DAILY_TTL_SECONDS
+
+
+class _InFlight:
+    """A call being computed by one thread while others wait for its result."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe TTL + LRU cache.
+    - Entries expire `ttl` seconds after they were stored.
+    - At most `maxsize` entries are kept; the least recently used goes first.
+    - Concurrent misses on the same key are coalesced into one computation.
+    - None results are not stored, so failed fetches are retried next call;
+      `store_if(value)` can reject other incomplete results the same way.
+    Works the same inside Streamlit (shared across sessions in the server
+    process) and in headless scripts.
+    """
+
+    def __init__(self, name, ttl, maxsize=128, copy=True, store_if=None):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.copy = copy
+        self.store_if = store_if
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _out(self, value):
+        # Hand out copies so callers can't mutate the cached DataFrame
+        if self.copy and value is not None and hasattr(value, "copy"):
+            return value.copy()
+        return value
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """Return the cached value for key, computing it once if missing."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return self._out(value)
+                del self._data[key]
+                self.expirations += 1
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = _InFlight()
+                self._inflight[key] = pending
+                self.misses += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return self._out(pending.value)
+
+        try:
+            value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        else:
+            pending.value = value
+            if value is not None and (self.store_if is None or self.store_if(value)):
+                lifetime = self.ttl if ttl is None else ttl
+                with self._lock:
+                    self._data[key] = (time.monotonic() + lifetime, value)
+                    self._data.move_to_end(key)
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+                        self.evictions += 1
+            return self._out(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.event.set()
+
+    def invalidate(self, key):
+        """Drop one entry."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+def ttl_cache(ttl, maxsize=128, name=None, copy=True, store_if=None):
+    """
+    Decorator that memoizes a function in a TTLCache.
+
+    `ttl` is either a number of seconds or a callable taking the same
+    arguments as the function and returning seconds, for per-call lifetimes
+    such as short TTLs for 1-minute bars and long ones for closed days.
+    Results for which `store_if(result)` is false are returned but not cached.
+    The wrapper exposes `.cache` (the TTLCache) and `.cache_key(...)`.
+    """
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        cache_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        cache = TTLCache(cache_name, ttl if not callable(ttl) else 0, maxsize, copy, store_if)
+
+        with _registry_lock:
+            _registry[cache_name] = cache
+
+        def cache_key(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple(bound.arguments.items())
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = cache_key(*args, **kwargs)
+            lifetime = ttl(*args, **kwargs) if callable(ttl) else None
+            return cache.get_or_compute(key, lambda: fn(*args, **kwargs), lifetime)
+
+        wrapper.cache = cache
+        wrapper.cache_key = cache_key
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    """Stats for every registered cache, keyed by cache name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def clear_caches():
+    """Empty every registered cache."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    for cache in caches:
+        cache.clear()
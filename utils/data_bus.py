@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.bars import DEFAULT_CAPACITY, BarSeries
+
+
+def _default_fetch(symbol, period, interval):
+    from utils.providers import get_registry
+    return get_registry().fetch_intraday(symbol, period, interval)
+
+
+def _default_fetch_batch(symbols, period, interval):
+    from utils.providers import get_registry
+    return get_registry().fetch_bars_batch(symbols, period, interval)
+
+
+class BarBus:
+    """
+    Shared intraday bar feed.
+    Strategies subscribe to the symbols they need; each tick() fetches every
+    subscribed symbol exactly once, however many strategies consume it, and
+    folds the new bars into one BarSeries ring buffer per symbol, which all
+    of them read.
+    With the default feed all symbols go out as one multi-ticker request
+    (fetch_batch); a custom per-symbol `fetch` is called in parallel.
+    """
+
+    def __init__(self, fetch=None, period="1d", interval="1m", max_workers=8,
+                 fetch_batch=None, capacity=DEFAULT_CAPACITY):
+        self.fetch = fetch or _default_fetch
+        self.fetch_batch = fetch_batch or (_default_fetch_batch if fetch is None else None)
+        self.period = period
+        self.interval = interval
+        self.max_workers = max_workers
+        self.capacity = capacity
+        self.series = {}              # symbol -> BarSeries
+        self.last_tick = None
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, *symbols):
+        """Register interest in symbols (reference-counted)."""
+        with self._lock:
+            for symbol in symbols:
+                self._subscribers[symbol] = self._subscribers.get(symbol, 0) + 1
+
+    def unsubscribe(self, *symbols):
+        with self._lock:
+            for symbol in symbols:
+                count = self._subscribers.get(symbol, 0) - 1
+                if count > 0:
+                    self._subscribers[symbol] = count
+                else:
+                    self._subscribers.pop(symbol, None)
+                    self.series.pop(symbol, None)
+
+    @property
+    def symbols(self):
+        with self._lock:
+            return sorted(self._subscribers)
+
+    def tick(self):
+        """
+        Fetch the latest bars for every subscribed symbol, once each, in one
+        batch or in parallel, and append them to the per-symbol series.
+        Returns {symbol: BarSeries, or None while a symbol has no bars}.
+        """
+        symbols = self.symbols
+        if not symbols:
+            return {}
+
+        if self.fetch_batch is not None:
+            try:
+                frames = self.fetch_batch(symbols, self.period, self.interval)
+            except Exception as e:
+                print(f"Bar feed error for {', '.join(symbols)}: {e}")
+                frames = {}
+            frames = {symbol: frames.get(symbol) for symbol in symbols}
+        else:
+            def load(symbol):
+                try:
+                    return self.fetch(symbol, self.period, self.interval)
+                except Exception as e:
+                    print(f"Bar feed error for {symbol}: {e}")
+                    return None
+
+            workers = max(1, min(self.max_workers, len(symbols)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                frames = dict(zip(symbols, pool.map(load, symbols)))
+
+        with self._lock:
+            for symbol, df in frames.items():
+                series = self.series.get(symbol)
+                if series is None:
+                    series = self.series[symbol] = BarSeries(self.capacity)
+                series.update(df)
+            self.last_tick = time.time()
+            return {symbol: self.series[symbol] if len(self.series[symbol]) else None
+                    for symbol in symbols}
+
+    def latest(self, symbol):
+        """BarSeries of symbol, or None if it was never fetched."""
+        with self._lock:
+            return self.series.get(symbol)
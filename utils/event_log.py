@@ -0,0 +1,166 @@
+import bisect
+import datetime
+import json
+import os
+import threading
+import time
+
+
+class _TsView:
+    """Read-only sequence of event timestamps in ring order, for bisect."""
+
+    __slots__ = ("log",)
+
+    def __init__(self, log):
+        self.log = log
+
+    def __len__(self):
+        return self.log._size
+
+    def __getitem__(self, i):
+        return self.log._at(i)["ts"]
+
+
+class EventLog:
+    """
+    Bounded, structured, append-only event log.
+    - The newest `capacity` events stay in a fixed-size in-memory ring buffer.
+    - With `path` set, every event is also appended to a JSON-lines file,
+      rotated at `max_bytes` into path.1 ... path.<backups>.
+    - tail() and between() answer from memory, and between() falls back to
+      the files for ranges older than the ring.
+    Events are dicts: ts (epoch seconds), kind, message, plus any fields.
+    """
+
+    def __init__(self, capacity=1000, path=None, max_bytes=5 * 1024 * 1024,
+                 backups=5, clock=None):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.clock = clock or time.time
+        self._buf = [None] * capacity
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def _at(self, i):
+        return self._buf[(self._start + i) % self.capacity]
+
+    def __len__(self):
+        return self._size
+
+    # ---------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------
+
+    def append(self, kind, message, **fields):
+        """Record an event and return it."""
+        event = {"ts": self.clock(), "kind": kind, "message": message, **fields}
+        with self._lock:
+            if self._size < self.capacity:
+                self._buf[(self._start + self._size) % self.capacity] = event
+                self._size += 1
+            else:
+                self._buf[self._start] = event
+                self._start = (self._start + 1) % self.capacity
+            if self.path:
+                self._write(event)
+        return event
+
+    def _write(self, event):
+        line = json.dumps(event, default=str) + "\n"
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size and size + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    # ---------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------
+
+    def tail(self, n=10, kind=None):
+        """Newest n events (oldest first), optionally of one kind."""
+        with self._lock:
+            if kind is None:
+                n = min(n, self._size)
+                return [self._at(i) for i in range(self._size - n, self._size)]
+            out = []
+            for i in range(self._size - 1, -1, -1):
+                event = self._at(i)
+                if event["kind"] == kind:
+                    out.append(event)
+                    if len(out) == n:
+                        break
+            return out[::-1]
+
+    def between(self, start, end=None, kind=None):
+        """
+        Events with start <= ts < end (epoch seconds or datetimes), oldest
+        first. Reads the rotated files only when start predates the ring.
+        """
+        start = _epoch(start)
+        end = _epoch(end) if end is not None else float("inf")
+
+        with self._lock:
+            view = _TsView(self)
+            lo = bisect.bisect_left(view, start)
+            hi = bisect.bisect_left(view, end)
+            events = [self._at(i) for i in range(lo, hi)]
+            oldest = self._at(0)["ts"] if self._size else float("inf")
+
+        if self.path and start < oldest:
+            older = list(self._read_files(start, min(end, oldest)))
+            events = older + events
+
+        if kind is not None:
+            events = [e for e in events if e["kind"] == kind]
+        return events
+
+    def _read_files(self, start, end):
+        paths = [f"{self.path}.{i}" for i in range(self.backups, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event["ts"] >= end:
+                        return
+                    if event["ts"] >= start:
+                        yield event
+
+
+def _epoch(value):
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def format_event(event):
+    """Human-readable one-liner: [YYYY-MM-DD HH:MM:SS] message."""
+    stamp = datetime.datetime.fromtimestamp(event["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    return f"[{stamp}] {event['message']}"
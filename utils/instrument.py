@@ -0,0 +1,222 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Set INSTRUMENT=0 to turn every timer and counter into a pass-through.
+ENABLED = os.getenv("INSTRUMENT", "1") != "0"
+
+# Samples kept per stage for percentiles (the most recent ones)
+WINDOW = 2048
+
+QUANTILES = (50, 95, 99)
+
+PROMETHEUS_PREFIX = "esvix"
+
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+
+
+class Histogram:
+    """
+    Durations of one stage: lifetime count/total/max plus a window of the
+    most recent samples for p50/p95/p99.
+    """
+
+    __slots__ = ("name", "count", "total", "max", "samples")
+
+    def __init__(self, name, window=WINDOW):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def summary(self):
+        """Durations in milliseconds."""
+        out = {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+        values = np.fromiter(self.samples, dtype=float) * 1000
+        for q in QUANTILES:
+            out[f"p{q}_ms"] = float(np.percentile(values, q)) if len(values) else 0.0
+        return out
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    """Drop every recorded timing and counter."""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def record(stage, seconds):
+    """Add one duration (seconds) to a stage."""
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _stages.get(stage)
+        if histogram is None:
+            histogram = _stages[stage] = Histogram(stage)
+        histogram.add(seconds)
+
+
+def count(name, n=1):
+    """Bump a counter."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage):
+    """Context manager timing a block: `with timer("app.merge"): ...`."""
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+
+def timed(stage=None):
+    """
+    Decorator timing every call of a function under `stage`
+    (default module.qualname). Exceptions are timed too.
+    """
+
+    def decorator(fn):
+        name = stage or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+# ---------------------------------------------------------
+# Export
+# ---------------------------------------------------------
+
+def snapshot():
+    """{"stages": {stage: summary}, "counters": {name: value}}, JSON-serializable."""
+    with _lock:
+        stages = list(_stages.values())
+        counters = dict(_counters)
+        # Copy the windows under the lock; percentiles are computed outside it
+        copies = []
+        for h in stages:
+            copy = Histogram(h.name, h.samples.maxlen)
+            copy.count, copy.total, copy.max = h.count, h.total, h.max
+            copy.samples.extend(h.samples)
+            copies.append(copy)
+    return {
+        "stages": {h.name: h.summary() for h in sorted(copies, key=lambda h: h.name)},
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def to_json(data=None):
+    return json.dumps(snapshot() if data is None else data, indent=2)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(data=None, prefix=PROMETHEUS_PREFIX):
+    """
+    Prometheus text exposition of a snapshot: each stage as a summary
+    (seconds, with p50/p95/p99 quantiles) and each counter as a counter.
+    """
+    data = snapshot() if data is None else data
+    lines = []
+
+    stages = data.get("stages", {})
+    if stages:
+        metric = f"{prefix}_stage_seconds"
+        lines += [f"# HELP {metric} Duration of instrumented stages.",
+                  f"# TYPE {metric} summary"]
+        for stage, s in stages.items():
+            label = f'stage="{_label(stage)}"'
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{label},quantile="{q / 100}"}} {s[f"p{q}_ms"] / 1000:.6g}')
+            lines.append(f"{metric}_sum{{{label}}} {s['mean_ms'] * s['count'] / 1000:.6g}")
+            lines.append(f"{metric}_count{{{label}}} {s['count']}")
+
+    counters = data.get("counters", {})
+    if counters:
+        metric = f"{prefix}_events_total"
+        lines += [f"# HELP {metric} Instrumented event counts.",
+                  f"# TYPE {metric} counter"]
+        for name, value in counters.items():
+            lines.append(f'{metric}{{name="{_label(name)}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, data=None):
+    """Atomically write to_prometheus() for a node-exporter textfile collector."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        fh.write(to_prometheus(data))
+    os.replace(tmp, path)
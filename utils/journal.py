@@ -1,20 +1,204 @@
 import pandas as pd
 from datetime import datetime
 import os
+import sqlite3
+import threading
 
-JOURNAL_FILE = "journal.csv"
-
-def load_journal():
-    if not os.path.exists(JOURNAL_FILE):
-        return pd.DataFrame(columns=["timestamp", "entry"])
-    return pd.read_csv(JOURNAL_FILE)
-
-def save_entry(text):
-    df = load_journal()
-    new_row = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "entry": text
-    }
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    df.to_csv(JOURNAL_FILE, index=False)
-    return df
+JOURNAL_DB = "journal.db"
+JOURNAL_FILE = "journal.csv"  # legacy CSV journal, imported once into JOURNAL_DB
+PAGE_SIZE = 500
+COLUMNS = ["timestamp", "entry"]
+
+_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    entry TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts
+    USING fts5(entry, content='entries', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, entry) VALUES (new.id, new.entry);
+END;
+INSERT INTO entries_fts (entries_fts) VALUES ('rebuild');
+"""
+
+
+def _connect(path=None):
+    """
+    Per-thread SQLite connection in WAL mode, so saves are O(1) appends and
+    concurrent writers from different Streamlit sessions don't lose rows.
+    """
+    path = path or JOURNAL_DB
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    if path in conns:
+        return conns[path]
+
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    _create_fts(conn)
+    _import_legacy_csv(conn)
+
+    conns[path] = conn
+    return conn
+
+
+def close(path=None):
+    """Close this thread's connection to the journal, if it has one."""
+    conn = getattr(_local, "conns", {}).pop(path or JOURNAL_DB, None)
+    if conn is not None:
+        conn.close()
+
+
+def _has_fts(conn):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entries_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _create_fts(conn):
+    """
+    Create the full-text index if SQLite has FTS5. A DB first used without
+    FTS5 already holds rows, so a new index is rebuilt from them.
+    """
+    if _has_fts(conn):
+        return
+    try:
+        conn.executescript("BEGIN IMMEDIATE;" + _FTS_SCHEMA + "COMMIT;")
+    except sqlite3.OperationalError as e:
+        if conn.in_transaction:
+            conn.rollback()
+        if "fts5" not in str(e):
+            raise
+        # SQLite built without FTS5; search falls back to LIKE
+
+
+def _csv_imported(conn):
+    return conn.execute("SELECT 1 FROM meta WHERE key = 'csv_imported'").fetchone() is not None
+
+
+def _import_legacy_csv(conn):
+    """Copy rows from the old journal.csv the first time the DB is opened."""
+    if not os.path.exists(JOURNAL_FILE) or _csv_imported(conn):
+        return
+    # Take the write lock before re-checking the marker, so two first-time
+    # connections can't both import the CSV.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not _csv_imported(conn):
+            for chunk in pd.read_csv(JOURNAL_FILE, chunksize=PAGE_SIZE):
+                # Empty cells were read as NaN; store them as NULL, not "nan"
+                values = chunk[COLUMNS].astype(str).where(chunk[COLUMNS].notna(), None)
+                conn.executemany(
+                    "INSERT INTO entries (timestamp, entry) VALUES (?, ?)",
+                    values.itertuples(index=False, name=None),
+                )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('csv_imported', ?)",
+                         (datetime.now().isoformat(),))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _frame(rows):
+    """timestamp/entry frame with a default index, as the CSV journal returned."""
+    return pd.DataFrame([row[1:] for row in rows], columns=COLUMNS)
+
+
+def _range_clause(start, end):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("timestamp < ?")
+        params.append(str(end))
+    return clauses, params
+
+
+def save_entry(text, reload=True):
+    """
+    Append one journal entry (an O(1) insert). Returns the whole journal,
+    as load_journal(), like the CSV journal did; with reload=False the
+    journal isn't re-read and None is returned.
+    """
+    conn = _connect()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conn:
+        conn.execute("INSERT INTO entries (timestamp, entry) VALUES (?, ?)", (timestamp, text))
+    return load_journal() if reload else None
+
+
+def load_journal(page=None, page_size=PAGE_SIZE, start=None, end=None):
+    """
+    Entries oldest first, optionally limited to start <= timestamp < end
+    ("YYYY-MM-DD[ HH:MM:SS]"). The whole journal by default; pass `page`
+    for one page of `page_size` entries.
+    Returns a timestamp/entry DataFrame, like the CSV journal.
+    """
+    clauses, params = _range_clause(start, end)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT id, timestamp, entry FROM entries {where} ORDER BY id"
+    if page is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [page_size, page * page_size]
+    return _frame(_connect().execute(sql, params).fetchall())
+
+
+def iter_journal(page_size=PAGE_SIZE, start=None, end=None):
+    """Stream the journal as DataFrame pages using keyset pagination."""
+    clauses, params = _range_clause(start, end)
+    last_id = 0
+    while True:
+        where = " AND ".join(clauses + ["id > ?"])
+        rows = _connect().execute(
+            f"SELECT id, timestamp, entry FROM entries WHERE {where} ORDER BY id LIMIT ?",
+            params + [last_id, page_size],
+        ).fetchall()
+        if not rows:
+            return
+        yield _frame(rows)
+        last_id = rows[-1][0]
+
+
+def search_journal(query, limit=50):
+    """Full-text search over entries, best matches first."""
+    conn = _connect()
+    if _has_fts(conn):
+        # Quote each term so user input can't break the FTS query syntax
+        terms = " ".join('"' + t.replace('"', '""') + '"' for t in query.split())
+        if not terms:
+            return _frame([])
+        rows = conn.execute(
+            "SELECT e.id, e.timestamp, e.entry FROM entries_fts f "
+            "JOIN entries e ON e.id = f.rowid "
+            "WHERE entries_fts MATCH ? ORDER BY f.rank LIMIT ?",
+            (terms, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT id, timestamp, entry FROM entries WHERE entry LIKE ? "
+            "ORDER BY id DESC LIMIT ?",
+            (f"%{query}%", limit),
+        ).fetchall()
+    return _frame(rows)
+
+
+def count_entries(start=None, end=None):
+    """Number of entries, optionally within a time range."""
+    clauses, params = _range_clause(start, end)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return _connect().execute(f"SELECT COUNT(*) FROM entries {where}", params).fetchone()[0]
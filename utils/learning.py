@@ -1,12 +1,61 @@
 import pandas as pd
 import numpy as np
 
-def run_es_vix_engine(es_df, vix_df):
-    # Clean numeric columns
-    for df in [es_df, vix_df]:
-        for col in ['Open', 'High', 'Low', 'Close']:
+from utils.instrument import timed
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def _parse_prices(df):
+    """
+    Strip thousands separators and cast price columns to float in place.
+    Columns that are already float are left alone, so repeated calls on the
+    same frames skip the string round-trip.
+    """
+    for col in PRICE_COLUMNS:
+        if not pd.api.types.is_float_dtype(df[col]):
             df[col] = df[col].astype(str).str.replace(',', '').astype(float)
 
+
+# Model thresholds. run_es_vix_engine and utils.sweep take overrides for any
+# of these keys.
+DEFAULT_PARAMS = {
+    "atr_min": 20,          # ATR14 >= atr_min
+    "es_move_min": 10,      # |ES_move| >= es_move_min
+    "vix_boost_min": 2,     # |VIX_move| > vix_boost_min doubles size
+    "vix_skip_low": 10,     # VIX < vix_skip_low -> skip
+    "vix_half_low": 12,     # VIX < vix_half_low -> half size
+    "vix_half_high": 30,    # VIX > vix_half_high -> half size
+    "vix_skip_high": 35,    # VIX > vix_skip_high -> skip
+}
+
+# (tick_value, base_contracts, round-trip cost) per contract
+CONTRACTS = {
+    "MES": (1.25, 2, 1.0),
+    "ES": (12.5, 2, 8.6),
+}
+
+
+def resolve_params(params=None):
+    """Merge overrides into DEFAULT_PARAMS, rejecting unknown keys."""
+    resolved = dict(DEFAULT_PARAMS)
+    if params:
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown ES/VIX parameters: {sorted(unknown)}")
+        resolved.update(params)
+    return resolved
+
+
+def prepare_es_vix_features(es_df, vix_df):
+    """
+    Build the parameter-free part of the model: merged ES/VIX bars, moves,
+    directions, raw divergence signal and ATR(14).
+    """
+    # Clean numeric columns (only on the first call for a given frame)
+    for df in [es_df, vix_df]:
+        _parse_prices(df)
+
     # Sort and merge
     es_df = es_df[['Date', 'Open', 'High', 'Low', 'Close']].sort_values('Date')
     vix_df = vix_df[['Date', 'Open', 'High', 'Low', 'Close']].sort_values('Date')
@@ -16,80 +65,110 @@ def run_es_vix_engine(es_df, vix_df):
     data['ES_move'] = data['Close_ES'] - data['Open_ES']
     data['VIX_move'] = data['Close_VIX'] - data['Open_VIX']
 
-    data['ES_dir'] = data['ES_move'].apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
-    data['VIX_dir'] = data['VIX_move'].apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
+    es_move = data['ES_move'].to_numpy()
+    vix_move = data['VIX_move'].to_numpy()
 
-    # Raw signal
-    def signal(row):
-        if row['ES_dir'] == 1 and row['VIX_dir'] == -1:
-            return 1
-        elif row['ES_dir'] == -1 and row['VIX_dir'] == 1:
-            return -1
-        return 0
+    # np.select rather than np.sign so a NaN move maps to 0, not NaN
+    es_dir = np.select([es_move > 0, es_move < 0], [1, -1], 0).astype(np.int64)
+    vix_dir = np.select([vix_move > 0, vix_move < 0], [1, -1], 0).astype(np.int64)
+    data['ES_dir'] = es_dir
+    data['VIX_dir'] = vix_dir
 
-    data['signal_raw'] = data.apply(signal, axis=1)
+    # Raw signal
+    data['signal_raw'] = np.select(
+        [(es_dir == 1) & (vix_dir == -1), (es_dir == -1) & (vix_dir == 1)],
+        [1, -1],
+        0,
+    ).astype(np.int64)
 
     # ATR(14)
-    high = data['High_ES']
-    low = data['Low_ES']
-    close = data['Close_ES']
-    prev_close = close.shift(1)
+    high = data['High_ES'].to_numpy()
+    low = data['Low_ES'].to_numpy()
+    prev_close = data['Close_ES'].shift(1).to_numpy()
 
-    tr = pd.concat([
-        high - low,
-        (high - prev_close).abs(),
-        (low - prev_close).abs()
-    ], axis=1).max(axis=1)
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
 
-    data['ATR14'] = tr.rolling(14).mean()
-    data['atr_ok'] = data['ATR14'] >= 20
+    data['ATR14'] = pd.Series(tr, index=data.index).rolling(14).mean()
 
-    # VIX regimes
-    def vix_regime(v):
-        if v < 10 or v > 35:
-            return 'skip'
-        if v < 12 or v > 30:
-            return 'half'
-        return 'full'
+    return data
+
+
+def es_vix_rules(es_move, vix_move, atr14, vix_close, signal_raw, params=None):
+    """
+    Apply the ATR, move, VIX-regime and volatility-boost filters to feature
+    arrays. Returns a dict of arrays: atr_ok, regime_skip, regime_half,
+    valid_move, vol_boost, signal, size_mult_vol, size_mult_regime, size_mult.
+    """
+    p = resolve_params(params)
+
+    atr_ok = atr14 >= p["atr_min"]
 
-    data['vix_regime'] = data['Close_VIX'].apply(vix_regime)
+    # VIX regimes
+    regime_skip = (vix_close < p["vix_skip_low"]) | (vix_close > p["vix_skip_high"])
+    regime_half = ~regime_skip & ((vix_close < p["vix_half_low"]) | (vix_close > p["vix_half_high"]))
 
     # ES move filter
-    data['valid_move'] = data['ES_move'].abs() >= 10
+    valid_move = np.abs(es_move) >= p["es_move_min"]
 
     # Volatility boost
-    data['vol_boost'] = data['VIX_move'].abs() > 2
+    vol_boost = np.abs(vix_move) > p["vix_boost_min"]
 
     # Final signal
-    def final_signal(row):
-        if row['signal_raw'] == 0:
-            return 0
-        if not row['valid_move']:
-            return 0
-        if not row['atr_ok']:
-            return 0
-        if row['vix_regime'] == 'skip':
-            return 0
-        return row['signal_raw']
-
-    data['signal'] = data.apply(final_signal, axis=1)
+    signal = np.where(valid_move & atr_ok & ~regime_skip, signal_raw, 0).astype(np.int64)
 
     # Size multipliers
-    data['size_mult_vol'] = data['vol_boost'].apply(lambda x: 2 if x else 1)
-    data['size_mult_regime'] = data['vix_regime'].apply(lambda r: 0.5 if r == 'half' else (1 if r == 'full' else 0))
-    data['size_mult'] = data['size_mult_vol'] * data['size_mult_regime']
+    size_mult_vol = np.where(vol_boost, 2, 1).astype(np.int64)
+    size_mult_regime = np.select([regime_half, regime_skip], [0.5, 0.0], 1.0)
+
+    return {
+        "atr_ok": atr_ok,
+        "regime_skip": regime_skip,
+        "regime_half": regime_half,
+        "valid_move": valid_move,
+        "vol_boost": vol_boost,
+        "signal": signal,
+        "size_mult_vol": size_mult_vol,
+        "size_mult_regime": size_mult_regime,
+        "size_mult": size_mult_vol * size_mult_regime,
+    }
+
+
+def es_vix_pnl(es_move, signal, size_mult, tick_value, base_contracts, cost):
+    """Flat per-day P&L in dollars; 0 on days without a trade."""
+    points = es_move * signal
+    contracts = base_contracts * size_mult
+    dollars = points / 0.25 * tick_value * contracts
+    return np.where(signal != 0, dollars - cost, 0.0)
+
+
+@timed("learning.run_es_vix_engine")
+def run_es_vix_engine(es_df, vix_df, params=None):
+    data = prepare_es_vix_features(es_df, vix_df)
+
+    es_move = data['ES_move'].to_numpy()
+    rules = es_vix_rules(
+        es_move,
+        data['VIX_move'].to_numpy(),
+        data['ATR14'].to_numpy(),
+        data['Close_VIX'].to_numpy(),
+        data['signal_raw'].to_numpy(),
+        params,
+    )
+
+    data['atr_ok'] = rules['atr_ok']
+    data['vix_regime'] = np.select(
+        [rules['regime_skip'], rules['regime_half']], ['skip', 'half'], 'full'
+    )
+    data['valid_move'] = rules['valid_move']
+    data['vol_boost'] = rules['vol_boost']
+    data['signal'] = rules['signal']
+    data['size_mult_vol'] = rules['size_mult_vol']
+    data['size_mult_regime'] = rules['size_mult_regime']
+    data['size_mult'] = rules['size_mult']
 
     # P&L (flat)
-    def pnl(row, tick_value, base_contracts, cost):
-        if row['signal'] == 0:
-            return 0
-        points = row['ES_move'] * row['signal']
-        contracts = base_contracts * row['size_mult']
-        dollars = points / 0.25 * tick_value * contracts
-        return dollars - cost
-
-    data['PnL_MES'] = data.apply(lambda r: pnl(r, 1.25, 2, 1.0), axis=1)
-    data['PnL_ES'] = data.apply(lambda r: pnl(r, 12.5, 2, 8.6), axis=1)
+    data['PnL_MES'] = es_vix_pnl(es_move, rules['signal'], rules['size_mult'], *CONTRACTS["MES"])
+    data['PnL_ES'] = es_vix_pnl(es_move, rules['signal'], rules['size_mult'], *CONTRACTS["ES"])
 
     # Monthly summary
     data['month'] = data['Date'].dt.to_period('M')
@@ -0,0 +1,66 @@
+import datetime
+import functools
+
+# NYSE regular sessions: full-day holidays and trading days.
+
+
+def _observed(day):
+    """Weekend holidays move to Friday (Saturday) or Monday (Sunday)."""
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (0=Mon) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + datetime.timedelta(days=offset + 7 * (n - 1))
+    nxt = datetime.date(year + month // 12, month % 12 + 1, 1)
+    last = nxt - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+@functools.lru_cache(maxsize=None)
+def nyse_holidays(year):
+    """Full-day NYSE market holidays for a year."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),                       # MLK Day
+        _nth_weekday(year, 2, 0, 3),                       # Presidents' Day
+        _easter(year) - datetime.timedelta(days=2),        # Good Friday
+        _nth_weekday(year, 5, 0, -1),                      # Memorial Day
+        _observed(datetime.date(year, 7, 4)),              # Independence Day
+        _nth_weekday(year, 9, 0, 1),                       # Labor Day
+        _nth_weekday(year, 11, 3, 4),                      # Thanksgiving
+        _observed(datetime.date(year, 12, 25)),            # Christmas
+    }
+    # New Year's Day is not moved back to Friday Dec 31
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+
+def is_trading_day(day):
+    """True if NYSE has a regular session on this date."""
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
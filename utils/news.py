@@ -1,6 +1,16 @@
-import requests
+import bisect
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
 import pandas as pd
 from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from utils.cache import ttl_cache
 
 # -----------------------------
 # API KEYS (replace placeholders)
@@ -10,17 +20,100 @@ FINNHUB_KEY = "d5n0fb9r01qj2afii6pgd5n0fb9r01qj2afii6q0"
 MARKETAUX_KEY = "syf8Is3MD7bwkQRihpo9p0z8Hb70GmVL8qEmsAhg"
 ALPHAVANTAGE_KEY = "Z0QQ8PAUM5E999U6"
 
+# Provider endpoints. Override (env or module attribute) to point the feed
+# at a mirror or a local stub server, e.g. for the offline benchmarks.
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2")
+FINNHUB_URL = os.getenv("FINNHUB_URL", "https://finnhub.io/api/v1")
+MARKETAUX_URL = os.getenv("MARKETAUX_URL", "https://api.marketaux.com/v1")
+ALPHAVANTAGE_URL = os.getenv("ALPHAVANTAGE_URL", "https://www.alphavantage.co")
+
+
+# -----------------------------
+# Shared HTTP session
+# -----------------------------
+# (connect, read) timeout per HTTP attempt
+PROVIDER_TIMEOUTS = {
+    "newsapi": (3.05, 6),
+    "finnhub": (3.05, 6),
+    "marketaux": (3.05, 6),
+    "alphavantage": (3.05, 10),
+}
+
+# Wall-clock budget per provider in get_news, retries included. A provider
+# that has not answered by then is dropped from that feed.
+PROVIDER_BUDGETS = {
+    "newsapi": 8,
+    "finnhub": 8,
+    "marketaux": 8,
+}
+
+# Cache lifetimes (seconds)
+NEWS_TTL_SECONDS = 300
+PRICE_REACTION_TTL_SECONDS = 3600
+
+# requests and the worker pool are created on first use, so importing this
+# module (e.g. for normalize_url) stays cheap.
+_session = None
+_executor = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the keep-alive session shared by all news providers."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=["GET"],
+            )
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _get_executor():
+    global _executor
+    with _session_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news")
+        return _executor
+
+
+def _get_json(url, provider):
+    """GET a provider URL on the shared session. Returns None on any failure."""
+    try:
+        r = get_session().get(url, timeout=PROVIDER_TIMEOUTS[provider])
+        return r.json()
+    except Exception as e:
+        print(f"{provider} fetch error: {e}")
+        return None
+
 
 # -----------------------------
 # NewsAPI
 # -----------------------------
-def fetch_newsapi(query):
+@ttl_cache(ttl=NEWS_TTL_SECONDS, maxsize=64)
+def fetch_newsapi(query, since=None):
     url = (
-        f"https://newsapi.org/v2/everything?"
+        f"{NEWSAPI_URL}/everything?"
         f"q={query}&sortBy=publishedAt&language=en&apiKey={NEWSAPI_KEY}"
     )
-    r = requests.get(url).json()
-    if "articles" not in r:
+    if since is not None:
+        url += f"&from={since.strftime('%Y-%m-%dT%H:%M:%S')}"
+    r = _get_json(url, "newsapi")
+    if r is None:
+        return None  # request failed; not cached, retried next call
+    if not isinstance(r, dict) or "articles" not in r:
         return []
     return [
         {
@@ -37,16 +130,20 @@ def fetch_newsapi(query):
 # -----------------------------
 # Finnhub
 # -----------------------------
-def fetch_finnhub(query):
+@ttl_cache(ttl=NEWS_TTL_SECONDS, maxsize=64)
+def fetch_finnhub(query, since=None):
     now = datetime.utcnow()
-    frm = (now - timedelta(days=7)).strftime("%Y-%m-%d")
+    # Finnhub filters by day only; the news index drops anything already seen.
+    frm = (since or now - timedelta(days=7)).strftime("%Y-%m-%d")
     to = now.strftime("%Y-%m-%d")
 
     url = (
-        f"https://finnhub.io/api/v1/company-news?"
+        f"{FINNHUB_URL}/company-news?"
         f"symbol={query}&from={frm}&to={to}&token={FINNHUB_KEY}"
     )
-    r = requests.get(url).json()
+    r = _get_json(url, "finnhub")
+    if r is None:
+        return None  # request failed; not cached, retried next call
     if not isinstance(r, list):
         return []
     return [
@@ -64,13 +161,18 @@ def fetch_finnhub(query):
 # -----------------------------
 # MarketAux
 # -----------------------------
-def fetch_marketaux(query):
+@ttl_cache(ttl=NEWS_TTL_SECONDS, maxsize=64)
+def fetch_marketaux(query, since=None):
     url = (
-        f"https://api.marketaux.com/v1/news/all?"
+        f"{MARKETAUX_URL}/news/all?"
         f"symbols={query}&filter_entities=true&language=en&api_token={MARKETAUX_KEY}"
     )
-    r = requests.get(url).json()
-    if "data" not in r:
+    if since is not None:
+        url += f"&published_after={since.strftime('%Y-%m-%dT%H:%M:%S')}"
+    r = _get_json(url, "marketaux")
+    if r is None:
+        return None  # request failed; not cached, retried next call
+    if not isinstance(r, dict) or "data" not in r:
         return []
     return [
         {
@@ -87,13 +189,14 @@ def fetch_marketaux(query):
 # -----------------------------
 # AlphaVantage price reaction
 # -----------------------------
+@ttl_cache(ttl=PRICE_REACTION_TTL_SECONDS, maxsize=32)
 def fetch_price_reaction(symbol):
     url = (
-        f"https://www.alphavantage.co/query?"
+        f"{ALPHAVANTAGE_URL}/query?"
         f"function=TIME_SERIES_DAILY&symbol={symbol}&apikey={ALPHAVANTAGE_KEY}"
     )
-    r = requests.get(url).json()
-    if "Time Series (Daily)" not in r:
+    r = _get_json(url, "alphavantage")
+    if not isinstance(r, dict) or "Time Series (Daily)" not in r:
         return None
 
     df = pd.DataFrame(r["Time Series (Daily)"]).T
@@ -114,18 +217,207 @@ def fetch_price_reaction(symbol):
 # -----------------------------
 # Unified feed
 # -----------------------------
-def get_news(query):
-    feed = []
-    feed.extend(fetch_newsapi(query))
-    feed.extend(fetch_finnhub(query))
-    feed.extend(fetch_marketaux(query))
+PROVIDERS = {
+    "newsapi": fetch_newsapi,
+    "finnhub": fetch_finnhub,
+    "marketaux": fetch_marketaux,
+}
+
+
+def _fetch_all(query, since=None):
+    """
+    {provider: articles, or None if it failed or ran out of budget}.
+    `since` maps provider -> only ask for articles newer than this.
+    """
+    # Query every provider concurrently; latency is bounded by the slowest
+    # provider's budget instead of the sum of all three.
+    since = since or {}
+    start = time.monotonic()
+    futures = {
+        name: _get_executor().submit(fn, query, since.get(name))
+        for name, fn in PROVIDERS.items()
+    }
 
-    df = pd.DataFrame(feed)
-    if df.empty:
-        return df
+    feeds = {}
+    for name, future in futures.items():
+        remaining = PROVIDER_BUDGETS[name] - (time.monotonic() - start)
+        feeds[name] = None
+        try:
+            feeds[name] = future.result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            print(f"{name} exceeded its {PROVIDER_BUDGETS[name]}s budget, skipping")
+        except Exception as e:
+            print(f"{name} fetch error: {e}")
+    return feeds
 
-    df["published"] = pd.to_datetime(df["published"], errors="coerce")
-    df = df.dropna(subset=["published"])
-    df = df.sort_values("published", ascending=False)
 
-    return df
+# -----------------------------
+# Deduplicated news index
+# -----------------------------
+_TRACKING_PARAMS = {"fbclid", "gclid", "cmpid", "ref", "ref_src", "guccounter", "mod"}
+_TITLE_SEPARATORS = re.compile(r"\s+[-|–—]\s+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_url(url):
+    """Canonical form of an article URL: no scheme, www, tracking params or fragment."""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{urlencode(query)}" if query else f"{host}{path}"
+
+
+def title_fingerprint(title):
+    """
+    Lowercased alphanumeric words of a headline, without a trailing
+    " - Source" / " | Source" suffix, so syndicated copies collide.
+    """
+    if not title:
+        return None
+    segments = _TITLE_SEPARATORS.split(title.strip())
+    if len(segments) > 1 and len(segments[-1].split()) <= 4:
+        segments = segments[:-1]
+    words = _NON_WORD.sub(" ", " ".join(segments).lower()).split()
+    return " ".join(words) or None
+
+
+def _parse_published(value):
+    """Provider timestamp (ISO string or epoch seconds) -> naive UTC Timestamp."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            ts = pd.Timestamp(value, unit="s", tz="UTC")
+        else:
+            ts = pd.Timestamp(value)
+            ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    except (ValueError, TypeError):
+        return None
+    if pd.isna(ts):
+        return None
+    return ts.tz_localize(None)
+
+
+class NewsIndex:
+    """
+    Incremental, deduplicated news feed per query.
+    Articles are parsed once when they arrive and dropped if their
+    normalized URL or title fingerprint was already seen. Each query keeps a
+    high-water mark per provider, so later polls only ask a provider for
+    articles newer than the last ones it returned; a provider that failed
+    or lagged is asked again from where it left off.
+    """
+
+    def __init__(self, max_articles=500, max_queries=32):
+        self.max_articles = max_articles
+        self.max_queries = max_queries
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, query):
+        state = self._queries.get(query)
+        if state is None:
+            state = {"keys": [], "articles": [], "urls": set(), "titles": set(),
+                     "high_water": {}, "frame": None}
+            self._queries[query] = state
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        self._queries.move_to_end(query)
+        return state
+
+    def ingest(self, query, articles, provider=None):
+        """
+        Merge articles into the index and advance `provider`'s high-water
+        mark past them. Returns how many were new.
+        """
+        added = 0
+        with self._lock:
+            state = self._state(query)
+            marks = state["high_water"]
+            for article in articles:
+                published = _parse_published(article.get("published"))
+                if published is None:
+                    continue
+                # Duplicates count too: the provider has delivered up to here
+                if provider is not None and (provider not in marks or published > marks[provider]):
+                    marks[provider] = published
+
+                url_key = normalize_url(article.get("url"))
+                title_key = title_fingerprint(article.get("title"))
+                if (url_key and url_key in state["urls"]) or (title_key and title_key in state["titles"]):
+                    continue
+
+                if url_key:
+                    state["urls"].add(url_key)
+                if title_key:
+                    state["titles"].add(title_key)
+
+                # Keep articles ordered oldest -> newest by publish time
+                pos = bisect.bisect_right(state["keys"], published)
+                state["keys"].insert(pos, published)
+                state["articles"].insert(pos, dict(article, published=published))
+                added += 1
+
+            if added:
+                overflow = len(state["articles"]) - self.max_articles
+                if overflow > 0:
+                    del state["keys"][:overflow]
+                    del state["articles"][:overflow]
+                    state["urls"] = {normalize_url(a.get("url")) for a in state["articles"]} - {None}
+                    state["titles"] = {title_fingerprint(a.get("title")) for a in state["articles"]} - {None}
+                state["frame"] = None
+        return added
+
+    def high_water(self, query, provider=None):
+        """
+        Publish time of the newest article `provider` returned for query
+        (any provider if None), or None.
+        """
+        with self._lock:
+            state = self._queries.get(query)
+            marks = state["high_water"] if state else {}
+            if provider is not None:
+                return marks.get(provider)
+            return max(marks.values(), default=None)
+
+    def poll(self, query):
+        """
+        Fetch each provider's articles newer than its high-water mark and
+        merge them. Failed providers keep their mark for the next poll.
+        """
+        with self._lock:
+            state = self._queries.get(query)
+            since = dict(state["high_water"]) if state else {}
+
+        added = 0
+        for provider, articles in _fetch_all(query, since=since).items():
+            if articles is not None:
+                added += self.ingest(query, articles, provider)
+        return added
+
+    def frame(self, query):
+        """The deduplicated feed for query, newest first."""
+        with self._lock:
+            state = self._state(query)
+            if state["frame"] is None:
+                state["frame"] = pd.DataFrame(
+                    state["articles"][::-1],
+                    columns=["source", "title", "url", "published", "sentiment"],
+                )
+            return state["frame"].copy()
+
+
+_index = NewsIndex()
+
+
+def get_news(query):
+    _index.poll(query)
+    return _index.frame(query)
@@ -1,63 +1,123 @@
+import datetime
 import os
-import requests
+import re
+
 import pandas as pd
 
+from utils.cache import daily_ttl, ttl_cache
+
 API_KEY = os.getenv("POLYGON_API_KEY")
 BASE_URL = "https://api.polygon.io/v2/aggs/ticker"
+REQUEST_TIMEOUT = 10
+
+# Cache lifetimes (seconds)
+INTRADAY_TTL_SECONDS = 30
+# Daily ranges use cache.daily_ttl: 1 day once closed, 5 minutes if they include today
+
+MARKET_TZ = "America/New_York"
+
+# Yahoo index symbols -> Polygon index tickers
+INDEX_TICKERS = {"^GSPC": "I:SPX", "^NDX": "I:NDX", "^RUT": "I:RUT"}
+
+_TIMESPANS = {"m": "minute", "h": "hour", "d": "day", "wk": "week", "mo": "month"}
+
+
+def polygon_ticker(symbol):
+    """Map a Yahoo-style symbol to Polygon's (^VIX -> I:VIX)."""
+    if symbol in INDEX_TICKERS:
+        return INDEX_TICKERS[symbol]
+    if symbol.startswith("^"):
+        return "I:" + symbol[1:]
+    return symbol
 
-def fetch_intraday(symbol, timespan="minute", limit=2):
-    url = f"{BASE_URL}/{symbol}/range/1/{timespan}/now"
-    params = {"apiKey": API_KEY, "limit": limit}
 
-    try:
-        r = requests.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-    except Exception as e:
-        print(f"Polygon fetch error: {e}")
+def _parse_interval(interval):
+    """'1m' -> (1, 'minute'), '15m' -> (15, 'minute'), '1h' -> (1, 'hour')."""
+    match = re.fullmatch(r"(\d+)(m|h|d|wk|mo)", interval)
+    if not match:
+        raise ValueError(f"Unsupported interval {interval!r}")
+    return int(match.group(1)), _TIMESPANS[match.group(2)]
+
+
+def _get_aggs(symbol, multiplier, timespan, start, end):
+    """
+    Raw aggregate bars for [start, end] (YYYY-MM-DD), or None when Polygon
+    has none. Network and HTTP errors raise (requests.RequestException), so
+    the provider registry counts them as failures.
+    """
+    if not API_KEY:
         return None
 
+    import requests
+
+    url = f"{BASE_URL}/{polygon_ticker(symbol)}/range/{multiplier}/{timespan}/{start}/{end}"
+    params = {"apiKey": API_KEY, "adjusted": "true", "sort": "asc", "limit": 50000}
+
+    r = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    r.raise_for_status()
+    data = r.json()
+
     if "results" not in data or not data["results"]:
         print("Polygon returned no results.")
         return None
 
     df = pd.DataFrame(data["results"])
-    df["t"] = pd.to_datetime(df["t"], unit="ms")
-    df = df.rename(columns={
-        "t": "Date",
+    for col in ["o", "h", "l", "c", "v"]:
+        if col not in df.columns:
+            df[col] = pd.NA
+    df["t"] = pd.to_datetime(df["t"], unit="ms", utc=True).dt.tz_convert(MARKET_TZ)
+    return df.rename(columns={
+        "t": "Datetime",
         "o": "Open",
         "h": "High",
         "l": "Low",
         "c": "Close",
         "v": "Volume"
     })
-    return df.sort_values("Date")
 
-def fetch_daily(symbol, start, end):
-    url = f"{BASE_URL}/{symbol}/range/1/day/{start}/{end}"
-    params = {"apiKey": API_KEY}
-
-    try:
-        r = requests.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-    except Exception as e:
-        print(f"Polygon fetch error: {e}")
+
+@ttl_cache(ttl=INTRADAY_TTL_SECONDS, maxsize=64)
+def fetch_intraday(symbol, period="1d", interval="1m"):
+    """
+    Intraday bars for the last `period` trading days ("1d", "5d", ...),
+    regular session only, in the yahoo_data.fetch_intraday schema:
+    Datetime (New York time), Open, High, Low, Close, Volume.
+    """
+    days = int(period.rstrip("d"))
+    multiplier, timespan = _parse_interval(interval)
+
+    today = pd.Timestamp.now(tz=MARKET_TZ).date()
+    # Calendar lookback wide enough to cover weekends and holidays
+    start = today - datetime.timedelta(days=days + 6)
+    df = _get_aggs(symbol, multiplier, timespan, start.isoformat(), today.isoformat())
+    if df is None:
         return None
 
-    if "results" not in data or not data["results"]:
-        print("Polygon returned no results.")
+    times = df["Datetime"].dt.time
+    df = df[(times >= datetime.time(9, 30)) & (times < datetime.time(16, 0))]
+    if df.empty:
         return None
 
-    df = pd.DataFrame(data["results"])
-    df["t"] = pd.to_datetime(df["t"], unit="ms")
-    df = df.rename(columns={
-        "t": "Date",
-        "o": "Open",
-        "h": "High",
-        "l": "Low",
-        "c": "Close",
-        "v": "Volume"
-    })
-    return df.sort_values("Date")
+    sessions = df["Datetime"].dt.date
+    keep = sorted(sessions.unique())[-days:]
+    df = df[sessions.isin(keep)]
+    return df[["Datetime", "Open", "High", "Low", "Close", "Volume"]].reset_index(drop=True)
+
+
+def _daily_ttl(symbol, start, end):
+    return daily_ttl(end)
+
+
+@ttl_cache(ttl=_daily_ttl, maxsize=64)
+def fetch_daily(symbol, start, end):
+    """
+    Daily bars with start <= Date < end, in the yahoo_data.fetch_daily
+    schema: Date, Open, Close, High, Low, Volume.
+    """
+    last = (pd.Timestamp(end) - pd.Timedelta(days=1)).date().isoformat()
+    df = _get_aggs(symbol, 1, "day", pd.Timestamp(start).date().isoformat(), last)
+    if df is None:
+        return None
 
+    df["Date"] = df["Datetime"].dt.date
+    return df[["Date", "Open", "Close", "High", "Low", "Volume"]].reset_index(drop=True)
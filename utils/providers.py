@@ -0,0 +1,378 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.bars import frame_arrays
+from utils import instrument
+
+MARKET_TZ = "America/New_York"
+
+# Normalized frame schemas every provider returns
+INTRADAY_COLUMNS = ["Datetime", "Open", "High", "Low", "Close", "Volume"]
+DAILY_COLUMNS = ["Date", "Open", "Close", "High", "Low", "Volume"]
+
+# Circuit breaker defaults
+FAILURE_THRESHOLD = 3      # consecutive failures before a provider is skipped
+COOLDOWN_SECONDS = 60      # how long it is skipped before one retry
+LATENCY_ALPHA = 0.3        # weight of the newest sample in the latency EWMA
+
+
+def _flat(df):
+    """Drop the ticker level of yfinance (field, ticker) columns."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+
+def normalize_intraday(df):
+    """
+    Coerce an intraday frame into INTRADAY_COLUMNS: Datetime in New York
+    time, float OHLCV, sorted, one row per timestamp. None if empty.
+    """
+    if df is None or len(df) == 0:
+        return None
+    df = _flat(df)
+    if "Datetime" in df.columns:
+        times = pd.DatetimeIndex(df["Datetime"])
+    elif "Date" in df.columns:
+        times = pd.DatetimeIndex(df["Date"])
+    else:
+        times = pd.DatetimeIndex(df.index)
+    times = times.tz_localize(MARKET_TZ) if times.tz is None else times.tz_convert(MARKET_TZ)
+    times = times.as_unit("ns")
+
+    out = pd.DataFrame({"Datetime": times})
+    for col in INTRADAY_COLUMNS[1:]:
+        if col in df.columns:
+            out[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(float)
+        else:
+            out[col] = np.nan
+    out = (out.dropna(subset=["Close"])
+              .drop_duplicates("Datetime", keep="last")
+              .sort_values("Datetime")
+              .reset_index(drop=True))
+    return out if len(out) else None
+
+
+def normalize_daily(df):
+    """Coerce a daily frame into DAILY_COLUMNS (Date as datetime.date). None if empty."""
+    if df is None or len(df) == 0:
+        return None
+    df = _flat(df)
+    if "Date" not in df.columns:
+        return None
+    out = pd.DataFrame({"Date": pd.to_datetime(df["Date"]).dt.date.to_numpy()})
+    for col in DAILY_COLUMNS[1:]:
+        if col in df.columns:
+            out[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(float)
+        else:
+            out[col] = np.nan
+    out = out.dropna(subset=["Close"]).reset_index(drop=True)
+    return out if len(out) else None
+
+
+# ---------------------------------------------------------
+# Providers
+# ---------------------------------------------------------
+
+class DataProvider:
+    """
+    One market-data source. fetch_intraday / fetch_daily return frames in
+    the normalized schemas above, or None when the source has no data, and
+    raise when it can't be reached, so the registry can tell the two apart.
+    """
+
+    name = "provider"
+
+    def available(self):
+        """False when the provider can't be used at all (e.g. no API key)."""
+        return True
+
+    def fetch_intraday(self, symbol, period="1d", interval="1m"):
+        raise NotImplementedError
+
+    def fetch_daily(self, symbol, start, end):
+        raise NotImplementedError
+
+    def fetch_intraday_batch(self, symbols, period="1d", interval="1m"):
+        """{symbol: frame or None}; providers with multi-ticker requests override this."""
+        return {symbol: self.fetch_intraday(symbol, period, interval) for symbol in symbols}
+
+    def fetch_bars_batch(self, symbols, period="1d", interval="1m"):
+        """{symbol: (ts, values) arrays or None}, as BarSeries.update takes them."""
+        frames = self.fetch_intraday_batch(symbols, period, interval)
+        return {symbol: frame_arrays(df) for symbol, df in frames.items()}
+
+
+class YahooProvider(DataProvider):
+    name = "yahoo"
+
+    def fetch_intraday(self, symbol, period="1d", interval="1m"):
+        from utils import yahoo_data
+        return normalize_intraday(yahoo_data.fetch_intraday(symbol, period=period, interval=interval))
+
+    def fetch_intraday_batch(self, symbols, period="1d", interval="1m"):
+        from utils import yahoo_data
+        frames = yahoo_data.fetch_intraday_batch(symbols, period=period, interval=interval)
+        return {symbol: normalize_intraday(df) for symbol, df in frames.items()}
+
+    def fetch_bars_batch(self, symbols, period="1d", interval="1m"):
+        from utils import yahoo_data
+        return yahoo_data.fetch_intraday_arrays(symbols, period=period, interval=interval)
+
+    def fetch_daily(self, symbol, start, end):
+        from utils import yahoo_data
+        return normalize_daily(yahoo_data.fetch_daily(symbol, start, end))
+
+
+class PolygonProvider(DataProvider):
+    name = "polygon"
+
+    def available(self):
+        from utils import polygon_data
+        return bool(polygon_data.API_KEY)
+
+    def fetch_intraday(self, symbol, period="1d", interval="1m"):
+        from utils import polygon_data
+        return normalize_intraday(polygon_data.fetch_intraday(symbol, period=period, interval=interval))
+
+    def fetch_daily(self, symbol, start, end):
+        from utils import polygon_data
+        return normalize_daily(polygon_data.fetch_daily(symbol, start, end))
+
+
+class LocalFileProvider(DataProvider):
+    """
+    Serves what is already on disk: intraday bars from the bar archive
+    (the latest `period` archived days, only while the newest of them is
+    today's session) and daily bars from the bar store. A last resort that
+    keeps the dashboard readable during outages; archived bars from an
+    earlier session are never passed off as live.
+    """
+
+    name = "local"
+
+    def __init__(self, archive=None, store=None):
+        self._archive = archive
+        self._store = store
+
+    @property
+    def archive(self):
+        if self._archive is None:
+            from utils.bar_archive import get_bar_archive
+            self._archive = get_bar_archive()
+        return self._archive
+
+    @property
+    def store(self):
+        if self._store is None:
+            from utils.bar_store import get_bar_store
+            self._store = get_bar_store()
+        return self._store
+
+    def fetch_intraday(self, symbol, period="1d", interval="1m"):
+        if interval != "1m":
+            return None
+        days = self.archive.days(symbol)[-int(period.rstrip("d")):]
+        if not days or days[-1] != pd.Timestamp.now(tz=MARKET_TZ).date():
+            return None
+        return normalize_intraday(self.archive.read(symbol, start=days[0]))
+
+    def fetch_daily(self, symbol, start, end):
+        return normalize_daily(self.store.read(symbol, "1d", start, end))
+
+
+# ---------------------------------------------------------
+# Registry
+# ---------------------------------------------------------
+
+class ProviderHealth:
+    """Success/empty/failure counts, latency EWMA and circuit state of one provider."""
+
+    def __init__(self):
+        self.successes = 0
+        self.empty = 0                # answers without data (closed market, unknown symbol)
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None           # EWMA seconds of successful calls
+        self.last_error = None
+        self.last_success = None      # epoch seconds
+        self.open_until = 0.0         # circuit open (provider skipped) until this monotonic time
+
+    def as_dict(self, now):
+        return {
+            "successes": self.successes,
+            "empty": self.empty,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": self.latency * 1000 if self.latency is not None else None,
+            "last_error": self.last_error,
+            "last_success": self.last_success,
+            "circuit": "open" if self.open_until > now else "closed",
+        }
+
+
+class ProviderRegistry:
+    """
+    Ordered set of data providers with failover.
+    Each call goes to the highest-priority healthy provider first; if it
+    fails or has no data the remaining healthy providers are tried,
+    fastest first by measured latency. A provider that raises
+    failure_threshold times in a row has its circuit opened and is skipped
+    for cooldown seconds, after which one trial call is let through.
+    "No data" is not a failure: it says nothing about the provider's
+    health (the market may be closed or the symbol unsupported), so it
+    never opens the circuit for the provider's other symbols.
+    """
+
+    def __init__(self, providers=(), failure_threshold=FAILURE_THRESHOLD,
+                 cooldown=COOLDOWN_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.providers = []           # in priority order
+        self.health = {}
+        self._lock = threading.Lock()
+        for provider in providers:
+            self.register(provider)
+
+    def register(self, provider, priority=None):
+        """Add a provider; priority is its position (default: lowest)."""
+        if provider.name in self.health:
+            raise ValueError(f"Provider {provider.name!r} already registered")
+        with self._lock:
+            index = len(self.providers) if priority is None else priority
+            self.providers.insert(index, provider)
+            self.health[provider.name] = ProviderHealth()
+
+    def candidates(self):
+        """Healthy providers in call order: primary first, then fastest."""
+        now = self.clock()
+        with self._lock:
+            healthy = [p for p in self.providers
+                       if self.health[p.name].open_until <= now and p.available()]
+            if not healthy:
+                return []
+
+            def speed(item):
+                position, provider = item
+                latency = self.health[provider.name].latency
+                return (latency is None, latency or 0.0, position)
+
+            rest = sorted(enumerate(healthy[1:]), key=speed)
+            return [healthy[0]] + [p for _, p in rest]
+
+    def _record(self, provider, latency=None, error=None, empty=False):
+        if latency is not None:
+            instrument.record(f"provider.{provider.name}", latency)
+        if error is not None:
+            instrument.count(f"provider.{provider.name}.failures")
+        elif empty:
+            instrument.count(f"provider.{provider.name}.empty")
+        with self._lock:
+            health = self.health[provider.name]
+            if error is None:
+                if empty:
+                    health.empty += 1
+                else:
+                    health.successes += 1
+                    health.last_success = time.time()
+                health.consecutive_failures = 0
+                health.open_until = 0.0
+                health.latency = latency if health.latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * health.latency)
+            else:
+                health.failures += 1
+                health.consecutive_failures += 1
+                health.last_error = error
+                if health.consecutive_failures >= self.failure_threshold:
+                    health.open_until = self.clock() + self.cooldown
+
+    def _call(self, method, *args):
+        """(result, name of the provider that answered), or (None, None)."""
+        for provider in self.candidates():
+            started = time.perf_counter()
+            try:
+                result, error = getattr(provider, method)(*args), None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            self._record(provider, time.perf_counter() - started, error, empty=result is None)
+            if result is not None:
+                return result, provider.name
+        return None, None
+
+    def fetch_intraday(self, symbol, period="1d", interval="1m", with_source=False):
+        """
+        Normalized intraday bars from the first provider that has them.
+        With with_source=True, returns (frame, provider name).
+        """
+        result = self._call("fetch_intraday", symbol, period, interval)
+        return result if with_source else result[0]
+
+    def _call_batch(self, method, symbols, *args):
+        """({symbol: result or None}, {symbol: provider name or None})."""
+        results = dict.fromkeys(symbols)
+        sources = dict.fromkeys(symbols)
+        for provider in self.candidates():
+            missing = [s for s in symbols if results[s] is None]
+            if not missing:
+                break
+            started = time.perf_counter()
+            try:
+                answer = getattr(provider, method)(missing, *args)
+                found = {s: value for s, value in answer.items() if value is not None}
+                error = None
+            except Exception as e:
+                found, error = {}, f"{type(e).__name__}: {e}"
+            self._record(provider, time.perf_counter() - started, error, empty=not found)
+            results.update(found)
+            sources.update(dict.fromkeys(found, provider.name))
+        return results, sources
+
+    def fetch_intraday_batch(self, symbols, period="1d", interval="1m", with_source=False):
+        """
+        Normalized intraday bars for several symbols. Each provider is asked
+        once for every symbol still missing, so a healthy primary answers
+        the whole batch in one request.
+        Returns {symbol: frame or None}; with with_source=True, also
+        {symbol: provider name or None} as a second item.
+        """
+        result = self._call_batch("fetch_intraday_batch", symbols, period, interval)
+        return result if with_source else result[0]
+
+    def fetch_bars_batch(self, symbols, period="1d", interval="1m", with_source=False):
+        """fetch_intraday_batch as (ts, values) arrays for BarSeries (the live path)."""
+        result = self._call_batch("fetch_bars_batch", symbols, period, interval)
+        return result if with_source else result[0]
+
+    def fetch_daily(self, symbol, start, end, with_source=False):
+        """
+        Normalized daily bars from the first provider that has them.
+        With with_source=True, returns (frame, provider name).
+        """
+        result = self._call("fetch_daily", symbol, start, end)
+        return result if with_source else result[0]
+
+    def status(self):
+        """Per-provider health, in priority order, for diagnostics."""
+        now = self.clock()
+        with self._lock:
+            return [
+                {"provider": p.name, "priority": i, "available": p.available(),
+                 **self.health[p.name].as_dict(now)}
+                for i, p in enumerate(self.providers)
+            ]
+
+
+_default_registry = None
+
+
+def get_registry():
+    """Process-wide registry: Yahoo, then Polygon (when keyed), then local files."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ProviderRegistry([YahooProvider(), PolygonProvider(), LocalFileProvider()])
+    return _default_registry
@@ -0,0 +1,190 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import compute_stats
+from utils.bars import FRAME_COLUMNS
+from utils.bot_engine import DEFAULT_STRATEGY, BotEngine
+from utils.bot_runner import MARKET_TZ, BotRunner, SessionSchedule
+from utils.data_bus import BarBus
+
+# Phase codes, matching SessionSchedule.phase
+CLOSED, PRE_ENTRY, ENTRY, HOLDING, EXIT = range(5)
+
+
+class SimClock:
+    """Settable clock (epoch seconds) handed to the engine's event log."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _bars(df):
+    """OHLCV of a minute-bar frame on a market-time index (Close required)."""
+    if "Datetime" in df.columns:
+        stamps = df["Datetime"]
+        if isinstance(stamps, pd.DataFrame):  # yfinance (field, ticker) columns
+            stamps = stamps.iloc[:, 0]
+        index = pd.DatetimeIndex(stamps)
+    else:
+        index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TZ)
+    else:
+        index = index.tz_convert(MARKET_TZ)
+    return pd.DataFrame({
+        col: np.asarray(df[col], dtype=float).ravel() if col in df.columns else np.nan
+        for col in FRAME_COLUMNS
+    }, index=index)
+
+
+def align_bars(frames, symbols):
+    """
+    Inner-join the bars of `symbols` on their common minute timestamps.
+    Returns (nanosecond DatetimeIndex, {symbol: (n, 5) OHLCV float64 array}).
+    """
+    bars = {}
+    for symbol in symbols:
+        df = _bars(frames[symbol])
+        bars[symbol] = df[~df.index.duplicated(keep="last")]
+    joined = pd.concat(bars, axis=1, join="inner").sort_index()
+    joined = joined.dropna(subset=[(symbol, "Close") for symbol in symbols])
+    return joined.index.as_unit("ns"), {symbol: joined[symbol].to_numpy() for symbol in symbols}
+
+
+def phase_codes(times, schedule):
+    """Vectorized SessionSchedule.phase for every timestamp (one session lookup per day)."""
+    ns = times.asi8
+    days, inverse = np.unique(times.date, return_inverse=True)
+
+    bounds = np.full((len(days), 5), np.iinfo(np.int64).min, dtype=np.int64)
+    trading = np.zeros(len(days), dtype=bool)
+    for k, day in enumerate(days):
+        session = schedule.session(day)
+        if session is None:
+            continue
+        open_at, close_at = session
+        entry_start = open_at + schedule.entry_delay
+        bounds[k] = [pd.Timestamp(t).value for t in (
+            open_at, entry_start, entry_start + schedule.entry_window,
+            close_at - schedule.exit_lead, close_at,
+        )]
+        trading[k] = True
+
+    open_ns, entry_ns, entry_end_ns, exit_ns, close_ns = bounds[inverse].T
+    codes = np.select(
+        [ns < open_ns, ns < entry_ns, ns >= exit_ns, ns < entry_end_ns],
+        [CLOSED, PRE_ENTRY, EXIT, ENTRY],
+        default=HOLDING,
+    )
+    codes[(ns >= close_ns) | ~trading[inverse]] = CLOSED
+    return codes
+
+
+class ReplayFeed:
+    """
+    fetch_batch for a BarBus that serves stored bars up to a cursor, the way
+    the live provider serves the session so far. Advancing the cursor and
+    ticking the bus folds every bar since the last tick into the series.
+    """
+
+    def __init__(self, times, bars):
+        self.ts = times.asi8
+        self.bars = bars
+        self.cursor = 0
+
+    def __call__(self, symbols, period=None, interval=None):
+        end = self.cursor + 1
+        return {symbol: (self.ts[:end], self.bars[symbol][:end]) for symbol in symbols}
+
+
+def replay(frames, strategies=None, schedule=None, base_capital_usd=65, broker=None):
+    """
+    Replay stored 1-minute bars ({symbol: DataFrame}) through the live
+    decision path on a simulated clock: BotRunner.step ticks the engine's
+    BarBus, whose feed serves the bars up to the current one, and
+    BotEngine.get_live_signals evaluates them with evaluate_divergence,
+    exactly as the headless runner does.
+
+    Bars in the pre-entry and holding phases, where the runner never acts,
+    are not stepped; they still reach the bar series on the next tick.
+
+    Returns dict(trades DataFrame, stats, bars, seconds, engine).
+    """
+    started = time.perf_counter()
+    strategies = list(strategies or [DEFAULT_STRATEGY])
+    schedule = schedule or SessionSchedule()
+
+    symbols = list(dict.fromkeys(s for strat in strategies for s in (strat.symbol, strat.vol_symbol)))
+    times, bars = align_bars(frames, symbols)
+    phases = phase_codes(times, schedule)
+    decision = np.flatnonzero((phases == ENTRY) | (phases == EXIT) | (phases == CLOSED))
+
+    # Every stepped bar can log a signal change, plus an entry and exit per day
+    n_days = len(np.unique(times.date)) if len(times) else 0
+    capacity = (len(decision) + 4 * n_days) * len(strategies) + 16
+
+    feed = ReplayFeed(times, bars)
+    clock = SimClock()
+    engine = BotEngine(base_capital_usd=base_capital_usd, strategies=strategies,
+                       bus=BarBus(fetch_batch=feed), log_capacity=capacity,
+                       clock=clock)
+    engine.broker = broker
+    runner = BotRunner(engine=engine, schedule=schedule, status_file=None)
+
+    ns = times.asi8
+    for i, now in zip(decision, times[decision]):
+        feed.cursor = i
+        clock.now = ns[i] / 1e9
+        runner.step(now)
+
+    trades = _pair_trades(engine.log.tail(len(engine.log)))
+    pnl = trades["PnL"].to_numpy() if len(trades) else np.array([])
+    equity = base_capital_usd + np.cumsum(pnl)
+    stats = compute_stats(pnl, equity, equity[-1] if len(equity) else base_capital_usd,
+                          position_size=base_capital_usd, initial_equity=base_capital_usd)
+    if len(trades):
+        trades["Equity"] = equity
+
+    return {
+        "trades": trades,
+        "stats": stats,
+        "bars": len(times),
+        "seconds": time.perf_counter() - started,
+        "engine": engine,
+    }
+
+
+def _pair_trades(events):
+    """Match entry/exit events per strategy into round-trip trades."""
+    open_trades = {}
+    rows = []
+    for event in events:
+        if event["kind"] == "entry":
+            open_trades[event["strategy"]] = event
+        elif event["kind"] == "exit" and event["strategy"] in open_trades:
+            entry = open_trades.pop(event["strategy"])
+            direction = 1 if entry["side"] == "LONG" else -1
+            rows.append({
+                "Strategy": entry["strategy"],
+                "Symbol": entry["symbol"],
+                "Side": entry["side"],
+                "Entry Time": pd.Timestamp(entry["ts"], unit="s", tz="UTC").tz_convert(MARKET_TZ),
+                "Entry": entry["price"],
+                "Exit Time": pd.Timestamp(event["ts"], unit="s", tz="UTC").tz_convert(MARKET_TZ),
+                "Exit": event["price"],
+                "Qty": entry["qty"],
+                "PnL": (event["price"] - entry["price"]) * entry["qty"] * direction,
+            })
+    return pd.DataFrame(rows, columns=["Strategy", "Symbol", "Side", "Entry Time", "Entry",
+                                       "Exit Time", "Exit", "Qty", "PnL"])
+
+
+def fetch_frames(symbols, period="7d", interval="1m"):
+    """Recent minute bars from Yahoo (7 days at most for 1m) for a quick replay."""
+    from utils.yahoo_data import fetch_intraday_batch
+    return fetch_intraday_batch(symbols, period=period, interval=interval)
@@ -0,0 +1,203 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import (
+    DEFAULT_THRESHOLD,
+    INITIAL_EQUITY,
+    POSITION_SIZE,
+    compute_stats,
+    divergence_signal,
+    sharpe_ratio,
+    simulate_trades,
+)
+from utils.learning import (
+    CONTRACTS,
+    es_vix_pnl,
+    es_vix_rules,
+    prepare_es_vix_features,
+    resolve_params,
+)
+
+# Feature columns packed into the shared matrix for the ES/VIX model
+ES_VIX_FEATURES = ["ES_move", "VIX_move", "ATR14", "Close_VIX", "signal_raw"]
+
+# Set in each worker process by _init_worker
+_features = None
+_shm = None
+
+
+def param_grid(**values):
+    """
+    Expand keyword lists into a list of parameter dicts.
+    Example: param_grid(atr_min=[15, 20], es_move_min=[5, 10]) -> 4 combos.
+    """
+    keys = list(values)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values.values())]
+
+
+# ---------------------------------------------------------
+# Per-combination evaluators (pure NumPy over the feature matrix)
+# ---------------------------------------------------------
+
+def _evaluate_es_vix(f, params):
+    rules = es_vix_rules(
+        f["ES_move"], f["VIX_move"], f["ATR14"], f["Close_VIX"], f["signal_raw"], params
+    )
+    signal = rules["signal"]
+    pnl_mes = es_vix_pnl(f["ES_move"], signal, rules["size_mult"], *CONTRACTS["MES"])
+    pnl_es = es_vix_pnl(f["ES_move"], signal, rules["size_mult"], *CONTRACTS["ES"])
+
+    traded = signal != 0
+    trade_pnl = pnl_mes[traded]
+    n = len(trade_pnl)
+
+    cum = np.cumsum(pnl_mes)
+    max_dd = (cum - np.maximum.accumulate(cum)).min() if len(cum) else 0.0
+
+    return {
+        "Trades": n,
+        "Wins": int((trade_pnl > 0).sum()),
+        "Losses": int((trade_pnl < 0).sum()),
+        "Win Rate (%)": round((trade_pnl > 0).mean() * 100, 2) if n else np.nan,
+        "PnL_MES": float(pnl_mes.sum()),
+        "PnL_ES": float(pnl_es.sum()),
+        "Max DD (MES)": float(max_dd),
+        "Sharpe (MES)": sharpe_ratio(trade_pnl),
+    }
+
+
+def _evaluate_divergence(f, params):
+    signal = divergence_signal(f["ES_pct"], f["VIX_pct"], params["threshold"])
+    _, pnl = simulate_trades(f["Open_SPY"], f["Close_SPY"], signal, POSITION_SIZE)
+
+    final_equity = INITIAL_EQUITY + pnl.sum()
+    equity_curve = INITIAL_EQUITY + np.cumsum(pnl)
+    stats = compute_stats(pnl, equity_curve, final_equity) or {}
+
+    return {
+        "Trades": len(pnl),
+        "Final Equity": float(final_equity),
+        **{k: float(v) for k, v in stats.items()},
+    }
+
+
+EVALUATORS = {
+    "es_vix": _evaluate_es_vix,
+    "divergence": _evaluate_divergence,
+}
+
+
+# ---------------------------------------------------------
+# Shared-memory worker plumbing
+# ---------------------------------------------------------
+
+def _attach(name):
+    """Attach to the parent's segment; the parent alone unlinks it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag. Workers share the parent's
+        # resource tracker, so the registration is a no-op there.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(shm_name, shape, columns):
+    global _features, _shm
+    _shm = _attach(shm_name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _features = {name: matrix[i] for i, name in enumerate(columns)}
+
+
+def _run_chunk(model, chunk):
+    evaluate = EVALUATORS[model]
+    return [(i, evaluate(_features, params)) for i, params in chunk]
+
+
+def _sweep(model, features, combos, max_workers=None, rank_by=None, ascending=False):
+    columns = list(features)
+    matrix = np.vstack([np.asarray(features[c], dtype=np.float64) for c in columns])
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(combos)))
+
+    indexed = list(enumerate(combos))
+    results = [None] * len(combos)
+
+    if max_workers == 1:
+        local = {name: matrix[i] for i, name in enumerate(columns)}
+        for i, params in indexed:
+            results[i] = EVALUATORS[model](local, params)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+
+            # A few chunks per worker keeps the pool busy without paying
+            # a pickle round-trip per combination.
+            n_chunks = max_workers * 4
+            chunks = [indexed[k::n_chunks] for k in range(n_chunks) if indexed[k::n_chunks]]
+
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(shm.name, matrix.shape, columns),
+            ) as pool:
+                for chunk_result in pool.map(_run_chunk, [model] * len(chunks), chunks):
+                    for i, metrics in chunk_result:
+                        results[i] = metrics
+        finally:
+            shm.close()
+            shm.unlink()
+
+    table = pd.concat(
+        [pd.DataFrame(combos), pd.DataFrame(results)], axis=1
+    )
+    if rank_by is not None and len(table):
+        table = table.sort_values(rank_by, ascending=ascending, na_position="last")
+        table = table.reset_index(drop=True)
+        table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table
+
+
+# ---------------------------------------------------------
+# Public sweep entry points
+# ---------------------------------------------------------
+
+def sweep_es_vix(es_df, vix_df, grid, max_workers=None, rank_by="PnL_MES"):
+    """
+    Evaluate run_es_vix_engine thresholds over a grid of parameter dicts
+    (see param_grid and learning.DEFAULT_PARAMS). Features are computed once
+    and shared with worker processes through shared memory.
+    Returns a results table ranked by `rank_by` (best first).
+    """
+    combos = [resolve_params(params) for params in grid]
+    data = prepare_es_vix_features(es_df, vix_df)
+    features = {name: data[name].to_numpy(dtype=float) for name in ES_VIX_FEATURES}
+    return _sweep("es_vix", features, combos, max_workers, rank_by)
+
+
+def sweep_divergence(df, thresholds=(DEFAULT_THRESHOLD,), max_workers=None, rank_by="Final Equity"):
+    """
+    Evaluate the daily divergence backtest (utils.backtest) for each
+    threshold over a merged SPY/VIX frame.
+    Returns a results table ranked by `rank_by` (best first).
+    """
+    open_spy = df["Open_SPY"].to_numpy(dtype=float)
+    close_spy = df["Close_SPY"].to_numpy(dtype=float)
+    open_vix = df["Open_VIX"].to_numpy(dtype=float)
+    close_vix = df["Close_VIX"].to_numpy(dtype=float)
+
+    features = {
+        "Open_SPY": open_spy,
+        "Close_SPY": close_spy,
+        "ES_pct": (close_spy - open_spy) / open_spy,
+        "VIX_pct": (close_vix - open_vix) / open_vix,
+    }
+    combos = [{"threshold": t} for t in thresholds]
+    return _sweep("divergence", features, combos, max_workers, rank_by)
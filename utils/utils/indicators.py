@@ -1,3 +1,6 @@
+from collections import deque
+import math
+
 import pandas as pd
 
 def sma(data, period=20):
@@ -6,12 +9,16 @@ def sma(data, period=20):
 def ema(data, period=20):
     return data['Close'].ewm(span=period, adjust=False).mean()
 
-def rsi(data, period=14):
+def rsi(data, period=14, smoothing="sma"):
     delta = data['Close'].diff()
     gain = delta.clip(lower=0)
     loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(period).mean()
-    avg_loss = loss.rolling(period).mean()
+    if smoothing == "wilder":
+        avg_gain = gain.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+        avg_loss = loss.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    else:
+        avg_gain = gain.rolling(period).mean()
+        avg_loss = loss.rolling(period).mean()
     rs = avg_gain / avg_loss
     rsi = 100 - (100 / (1 + rs))
     return rsi
@@ -30,3 +37,211 @@ def bollinger_bands(data, period=20, std_factor=2):
     upper = mid + std_factor * std
     lower = mid - std_factor * std
     return mid, upper, lower
+
+
+# ---------------------------------------------------------
+# Streaming indicators
+# ---------------------------------------------------------
+# Same parameters and outputs as the batch functions above, but each new
+# close is folded in with O(1) work. `warm_start(data)` seeds the state from
+# the same DataFrame the batch functions take (or a utils.bars.BarSeries),
+# and `update(close)` returns the latest value (NaN until enough bars have
+# been seen, like the batch output).
+
+NAN = float("nan")
+
+
+def _close_frame(data):
+    """warm_start input as a DataFrame with a Close column."""
+    if hasattr(data, "closes"):  # BarSeries
+        return pd.DataFrame({'Close': data.closes()})
+    return data
+
+
+class StreamingSMA:
+    """Rolling mean over a fixed window, kept as a running sum."""
+
+    def __init__(self, period=20):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, close):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(close)
+        self.total += close
+        self.value = self.total / self.period if len(self.window) == self.period else NAN
+        return self.value
+
+    def warm_start(self, data):
+        data = _close_frame(data)
+        # Only the last `period` closes affect the state
+        for close in data['Close'].iloc[-self.period:]:
+            self.update(float(close))
+        return self
+
+
+class StreamingEMA:
+    """Exponential moving average with span semantics (adjust=False)."""
+
+    def __init__(self, period=20):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = NAN
+
+    def update(self, close):
+        if math.isnan(self.value):
+            self.value = close
+        else:
+            self.value = self.value + self.alpha * (close - self.value)
+        return self.value
+
+    def warm_start(self, data):
+        data = _close_frame(data)
+        if len(data):
+            self.value = float(ema(data, self.period).iloc[-1])
+        return self
+
+
+class StreamingRSI:
+    """
+    RSI from running average gain/loss.
+    smoothing="sma" matches rsi() (rolling means over `period` deltas);
+    smoothing="wilder" keeps Wilder's recursive averages instead.
+    """
+
+    def __init__(self, period=14, smoothing="sma"):
+        self.period = period
+        self.smoothing = smoothing
+        self.prev_close = None
+        self.count = 0
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+        self.sum_gain = 0.0
+        self.sum_loss = 0.0
+        self.avg_gain = NAN
+        self.avg_loss = NAN
+        self.value = NAN
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        delta = close - self.prev_close
+        self.prev_close = close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.count += 1
+
+        if self.smoothing == "wilder":
+            if self.count == 1:
+                self.avg_gain, self.avg_loss = gain, loss
+            else:
+                self.avg_gain += (gain - self.avg_gain) / self.period
+                self.avg_loss += (loss - self.avg_loss) / self.period
+            ready = self.count >= self.period
+        else:
+            if len(self.gains) == self.period:
+                self.sum_gain -= self.gains[0]
+                self.sum_loss -= self.losses[0]
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.sum_gain += gain
+            self.sum_loss += loss
+            self.avg_gain = self.sum_gain / self.period
+            self.avg_loss = self.sum_loss / self.period
+            ready = len(self.gains) == self.period
+
+        if not ready:
+            self.value = NAN
+        elif self.avg_loss == 0:
+            self.value = 100.0 if self.avg_gain > 0 else NAN
+        else:
+            self.value = 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+        return self.value
+
+    def warm_start(self, data):
+        data = _close_frame(data)
+        closes = data['Close']
+        if self.smoothing != "wilder":
+            # The rolling window only needs the last `period` deltas
+            closes = closes.iloc[-(self.period + 1):]
+        for close in closes:
+            self.update(float(close))
+        return self
+
+
+class StreamingMACD:
+    """MACD line, signal line and histogram from three chained EMAs."""
+
+    def __init__(self):
+        self.fast = StreamingEMA(12)
+        self.slow = StreamingEMA(26)
+        self.signal = StreamingEMA(9)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close):
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        signal_line = self.signal.update(macd_line)
+        self.value = (macd_line, signal_line, macd_line - signal_line)
+        return self.value
+
+    def warm_start(self, data):
+        data = _close_frame(data)
+        if len(data):
+            macd_line, signal_line, histogram = macd(data)
+            self.fast.warm_start(data)
+            self.slow.warm_start(data)
+            self.signal.value = float(signal_line.iloc[-1])
+            self.value = (float(macd_line.iloc[-1]), self.signal.value, float(histogram.iloc[-1]))
+        return self
+
+
+class StreamingBollinger:
+    """
+    Bollinger bands over a rolling window. Mean and sample variance are
+    maintained with Welford-style add/remove updates.
+    """
+
+    def __init__(self, period=20, std_factor=2):
+        self.period = period
+        self.std_factor = std_factor
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close):
+        if len(self.window) == self.period:
+            old = self.window[0]
+            n = self.period
+            new_mean = self.mean + (close - old) / n
+            self.m2 += (close - old) * (close - new_mean + old - self.mean)
+            self.mean = new_mean
+            self.window.append(close)
+        else:
+            self.window.append(close)
+            n = len(self.window)
+            delta = close - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (close - self.mean)
+
+        if len(self.window) < self.period or self.period < 2:
+            self.value = (NAN, NAN, NAN)
+        else:
+            std = math.sqrt(max(self.m2, 0.0) / (self.period - 1))
+            self.value = (
+                self.mean,
+                self.mean + self.std_factor * std,
+                self.mean - self.std_factor * std,
+            )
+        return self.value
+
+    def warm_start(self, data):
+        data = _close_frame(data)
+        for close in data['Close'].iloc[-self.period:]:
+            self.update(float(close))
+        return self
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from utils.backtest import (
+    DEFAULT_THRESHOLD,
+    POSITION_SIZE,
+    TRADING_DAYS,
+    divergence_signal,
+    sharpe_from_sums,
+    simulate_trades,
+)
+from utils.learning import CONTRACTS, es_vix_pnl, es_vix_rules, prepare_es_vix_features, resolve_params
+
+
+def _prefix(values):
+    """Cumulative sums along the last axis with a leading zero column."""
+    values = np.asarray(values, dtype=float)
+    pad = np.zeros(values.shape[:-1] + (1,))
+    return np.concatenate([pad, np.cumsum(values, axis=-1)], axis=-1)
+
+
+def fold_bounds(n, train_size, test_size, step=None, anchored=False):
+    """
+    Row ranges for each walk-forward fold as
+    (train_start, train_end, test_start, test_end), all half-open.
+    With anchored=True the train window always starts at row 0 and grows.
+    """
+    step = test_size if step is None else step
+    if train_size < 1 or test_size < 1 or step < 1:
+        raise ValueError(
+            f"train_size, test_size and step must be positive, "
+            f"got {train_size}, {test_size}, {step}"
+        )
+    folds = []
+    train_end = train_size
+    while train_end + test_size <= n:
+        train_start = 0 if anchored else train_end - train_size
+        folds.append((train_start, train_end, train_end, train_end + test_size))
+        train_end += step
+    return folds
+
+
+def walk_forward(pnl, traded, dates, train_size, test_size, step=None,
+                 labels=None, anchored=False, periods_per_year=TRADING_DAYS):
+    """
+    Walk-forward evaluation over per-bar PnL for k candidate parameter sets.
+
+    pnl and traded are (k, n) arrays (PnL is 0 on bars without a trade).
+    Each fold picks the candidate with the best in-sample PnL and reports its
+    out-of-sample stats; test_sharpe is over the fold's trades, as in
+    backtest.compute_stats. Window aggregates come from cumulative sums, so
+    every fold costs O(k) regardless of window length.
+
+    Returns a DataFrame with one row per fold.
+    """
+    pnl = np.atleast_2d(np.asarray(pnl, dtype=float))
+    traded = np.atleast_2d(np.asarray(traded, dtype=bool))
+    dates = np.asarray(dates)
+    k, n = pnl.shape
+    labels = list(labels) if labels is not None else list(range(k))
+
+    pnl_sum = _prefix(pnl)
+    pnl_sq = _prefix(pnl * pnl)
+    trades = _prefix(traded)
+    wins = _prefix(traded & (pnl > 0))
+
+    rows = []
+    for fold, (tr_s, tr_e, te_s, te_e) in enumerate(
+        fold_bounds(n, train_size, test_size, step, anchored)
+    ):
+        train_pnl = pnl_sum[:, tr_e] - pnl_sum[:, tr_s]
+        best = int(np.argmax(train_pnl))
+
+        test_pnl = pnl_sum[best, te_e] - pnl_sum[best, te_s]
+        test_sq = pnl_sq[best, te_e] - pnl_sq[best, te_s]
+        test_trades = trades[best, te_e] - trades[best, te_s]
+        test_wins = wins[best, te_e] - wins[best, te_s]
+
+        # PnL is 0 off-trade, so the window sums are the sums over its trades
+        sharpe = sharpe_from_sums(test_pnl, test_sq, test_trades, periods_per_year)
+
+        rows.append({
+            "fold": fold,
+            "train_start": dates[tr_s],
+            "train_end": dates[tr_e - 1],
+            "test_start": dates[te_s],
+            "test_end": dates[te_e - 1],
+            "params": labels[best],
+            "train_pnl": float(train_pnl[best]),
+            "test_pnl": float(test_pnl),
+            "test_trades": int(test_trades),
+            "test_win_rate": test_wins / test_trades if test_trades else np.nan,
+            "test_sharpe": float(sharpe),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def summarize_folds(folds):
+    """Aggregate out-of-sample stats across walk-forward folds."""
+    if folds.empty:
+        return {"Folds": 0}
+    return {
+        "Folds": len(folds),
+        "Total OOS PnL": float(folds["test_pnl"].sum()),
+        "Profitable Folds (%)": round(float((folds["test_pnl"] > 0).mean()) * 100, 2),
+        "Mean OOS Sharpe": float(folds["test_sharpe"].mean()),
+        "OOS Trades": int(folds["test_trades"].sum()),
+    }
+
+
+def walk_forward_divergence(df, thresholds=(DEFAULT_THRESHOLD,), train_size=252,
+                            test_size=63, step=None, anchored=False):
+    """
+    Walk-forward the daily divergence backtest (utils.backtest) over a merged
+    SPY/VIX frame, choosing the threshold per fold from `thresholds`.
+    """
+    open_spy = df["Open_SPY"].to_numpy(dtype=float)
+    close_spy = df["Close_SPY"].to_numpy(dtype=float)
+    open_vix = df["Open_VIX"].to_numpy(dtype=float)
+    close_vix = df["Close_VIX"].to_numpy(dtype=float)
+
+    es_pct = (close_spy - open_spy) / open_spy
+    vix_pct = (close_vix - open_vix) / open_vix
+
+    pnl = np.zeros((len(thresholds), len(df)))
+    traded = np.zeros((len(thresholds), len(df)), dtype=bool)
+    for i, threshold in enumerate(thresholds):
+        signal = divergence_signal(es_pct, vix_pct, threshold)
+        mask, trade_pnl = simulate_trades(open_spy, close_spy, signal, POSITION_SIZE)
+        pnl[i, mask] = trade_pnl
+        traded[i] = mask
+
+    labels = [{"threshold": t} for t in thresholds]
+    return walk_forward(pnl, traded, df["Date"].to_numpy(), train_size, test_size,
+                        step, labels, anchored)
+
+
+def walk_forward_es_vix(es_df, vix_df, grid=({},), train_size=252, test_size=63,
+                        step=None, anchored=False, contract="MES"):
+    """
+    Walk-forward the ES/VIX engine (utils.learning), choosing the parameter
+    set per fold from `grid` (see utils.sweep.param_grid).
+    """
+    data = prepare_es_vix_features(es_df, vix_df)
+    es_move = data["ES_move"].to_numpy()
+    vix_move = data["VIX_move"].to_numpy()
+    atr14 = data["ATR14"].to_numpy()
+    vix_close = data["Close_VIX"].to_numpy()
+    signal_raw = data["signal_raw"].to_numpy()
+
+    labels = [resolve_params(params) for params in grid]
+    pnl = np.zeros((len(labels), len(data)))
+    traded = np.zeros((len(labels), len(data)), dtype=bool)
+    for i, params in enumerate(labels):
+        rules = es_vix_rules(es_move, vix_move, atr14, vix_close, signal_raw, params)
+        pnl[i] = es_vix_pnl(es_move, rules["signal"], rules["size_mult"], *CONTRACTS[contract])
+        traded[i] = rules["signal"] != 0
+
+    return walk_forward(pnl, traded, data["Date"].to_numpy(), train_size, test_size,
+                        step, labels, anchored)
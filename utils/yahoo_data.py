@@ -1,38 +1,282 @@
-import yfinance as yf
+import datetime
+
+import numpy as np
 import pandas as pd
 
+from utils.bar_store import get_bar_store
+from utils.bars import FRAME_COLUMNS, index_ns
+from utils.cache import daily_ttl, ttl_cache
+from utils.instrument import timed, timer
+from utils.market_calendar import is_trading_day
+
+# yfinance is imported inside the download helpers: it is slow to import and
+# daily ranges already in the bar store never need it.
+
+# Cache lifetimes (seconds)
+INTRADAY_TTL_SECONDS = 30          # 1-minute bars
+INTRADAY_SLOW_TTL_SECONDS = 300    # coarser intraday intervals
+# Daily ranges use cache.daily_ttl (shared with the Polygon fetcher)
+
+# What yfinance records for a ticker that simply has no bars; anything else it
+# records (connection/HTTP errors, rate limits) means the download failed.
+_NO_DATA_ERRORS = ("no price data", "no data found", "delisted", "no timezone")
+
+
+class YahooDownloadError(RuntimeError):
+    """A Yahoo download failed (network, HTTP, rate limit) rather than finding no data."""
+
+
+def _intraday_ttl(symbols, period="1d", interval="1m"):
+    return INTRADAY_TTL_SECONDS if interval == "1m" else INTRADAY_SLOW_TTL_SECONDS
+
+
+def _daily_ttl(symbol, start, end, use_store=True):
+    return daily_ttl(end)
+
+
+@timed("yahoo.fetch_intraday")
 def fetch_intraday(symbol: str, period: str = "1d", interval: str = "1m"):
     """
     Fetch intraday data (1-minute bars) for the given symbol.
     """
-    data = yf.download(symbol, period=period, interval=interval, progress=False)
+    return fetch_intraday_batch([symbol], period, interval)[symbol]
+
+
+@ttl_cache(ttl=_intraday_ttl, maxsize=32, copy=False)
+def _fetch_intraday_raw(symbols, period="1d", interval="1m"):
+    """One multi-ticker download, shared by the frame and array views below."""
+    with timer("yahoo.download_intraday"):
+        data = _download(symbols, period=period, interval=interval)
+    # An empty download is a failure: return None so it isn't cached
+    return data if data is not None and not data.empty else None
+
+
+def fetch_intraday_batch(symbols, period: str = "1d", interval: str = "1m"):
+    """
+    Fetch intraday bars for several symbols in one multi-ticker request.
+    Returns {symbol: DataFrame (fetch_intraday schema) or None}.
+    """
+    unique = tuple(dict.fromkeys(symbols))
+    frames = _split_tickers(_fetch_intraday_raw(unique, period, interval), unique)
+    return {
+        symbol: frames[symbol].reset_index() if frames[symbol] is not None else None
+        for symbol in symbols
+    }
+
+
+def fetch_intraday_arrays(symbols, period: str = "1d", interval: str = "1m"):
+    """
+    Like fetch_intraday_batch, but returns {symbol: (ts, values) or None}
+    ready for BarSeries.update: int64 ns timestamps and an (n, 5)
+    Open/High/Low/Close/Volume float array, sliced straight out of the
+    download without building per-symbol DataFrames.
+    """
+    unique = tuple(dict.fromkeys(symbols))
+    arrays = _ticker_arrays(_fetch_intraday_raw(unique, period, interval), unique)
+    return {symbol: arrays[symbol] for symbol in symbols}
+
+
+def _ticker_arrays(data, symbols):
+    """Per-symbol (ts, OHLCV values) arrays from a yf.download result."""
     if data is None or data.empty:
-        return None
+        return dict.fromkeys(symbols)
 
-    df = data.reset_index()
+    ts = index_ns(data.index)
+    raw = data.to_numpy(dtype=float)
 
-    # Normalize column names
-    df = df.rename(columns={
-        "Open": "Open",
-        "Close": "Close",
-        "High": "High",
-        "Low": "Low",
-        "Volume": "Volume"
-    })
+    columns = data.columns
+    if isinstance(columns, pd.MultiIndex):
+        level = 0 if set(symbols) & set(columns.get_level_values(0)) else 1
+        lookup = {(col[level], col[1 - level]): i for i, col in enumerate(columns)}
+    elif len(symbols) == 1:
+        lookup = {(symbols[0], col): i for i, col in enumerate(columns)}
+    else:
+        lookup = {}
 
-    return df
+    arrays = {}
+    for symbol in symbols:
+        positions = [lookup.get((symbol, field)) for field in FRAME_COLUMNS]
+        if positions[FRAME_COLUMNS.index("Close")] is None:
+            arrays[symbol] = None
+            continue
+        values = np.full((len(ts), len(FRAME_COLUMNS)), np.nan)
+        for i, j in enumerate(positions):
+            if j is not None:
+                values[:, i] = raw[:, j]
+        keep = ~np.isnan(values[:, FRAME_COLUMNS.index("Close")])
+        arrays[symbol] = (ts[keep], values[keep]) if keep.any() else None
+    return arrays
 
 
-def fetch_daily(symbol: str, start: str, end: str):
+@timed("yahoo.fetch_daily")
+@ttl_cache(ttl=_daily_ttl, maxsize=64)
+def fetch_daily(symbol: str, start: str, end: str, use_store: bool = True):
     """
     Fetch daily OHLCV data for the given symbol between start and end dates.
-    Handles Yahoo Finance quirks, MultiIndex columns, and missing fields.
+    Closed bars are served from the local bar store; only date ranges not
+    fetched before are downloaded. If Yahoo is unreachable, whatever is
+    already stored is returned; with nothing stored, the error is raised.
     """
-    data = yf.download(symbol, start=start, end=end, interval="1d", progress=False)
+    return _load_daily([symbol], start, end, use_store)[symbol]
 
+
+def _daily_batch_ttl(symbols, start, end, use_store=True):
+    return _daily_ttl(None, start, end, use_store)
+
+
+def _complete(frames):
+    return all(df is not None and not df.empty for df in frames.values())
+
+
+# A batch with a failed or empty symbol is returned but not cached, so that
+# symbol is retried on the next call instead of staying missing for the TTL.
+@ttl_cache(ttl=_daily_batch_ttl, maxsize=32, copy=False, store_if=_complete)
+def _fetch_daily_batch(symbols, start, end, use_store=True):
+    return _load_daily(symbols, start, end, use_store)
+
+
+def fetch_daily_batch(symbols, start: str, end: str, use_store: bool = True):
+    """
+    fetch_daily for several symbols at once. Store gaps shared by several
+    symbols are downloaded in one multi-ticker request, so N symbols cost
+    about as much as one.
+    Returns {symbol: DataFrame (Date/Open/Close/High/Low/Volume) or None}.
+    """
+    frames = _fetch_daily_batch(tuple(dict.fromkeys(symbols)), start, end, use_store)
+    return {symbol: _copy(frames.get(symbol)) for symbol in symbols}
+
+
+def _copy(df):
+    return df.copy() if df is not None else None
+
+
+def _load_daily(symbols, start, end, use_store):
+    """Shared body of fetch_daily / fetch_daily_batch. Returns {symbol: df or None}."""
+    if not use_store:
+        return _download_daily_batch(symbols, start, end)
+
+    store = get_bar_store()
+    start_d = pd.Timestamp(start).date()
+    end_d = pd.Timestamp(end).date()
+
+    # Today's bar is still forming, so only days before today are stored.
+    cutoff = max(start_d, min(end_d, datetime.date.today()))
+
+    # Symbols missing the same date range share one download
+    gaps = {}
+    for symbol in symbols:
+        for gap in store.missing_ranges(symbol, "1d", start_d, cutoff):
+            gaps.setdefault(gap, []).append(symbol)
+
+    error = None
+    for (gap_start, gap_end), gap_symbols in gaps.items():
+        try:
+            frames = _download_daily_batch(gap_symbols, gap_start.isoformat(), gap_end.isoformat())
+        except Exception as e:
+            print(f"Yahoo daily fetch error for {', '.join(gap_symbols)}: {e}")
+            error = e
+            continue
+
+        # Empty answers are retried next time, unless the gap has no
+        # trading day in it (a weekend or holiday) and so can never fill.
+        for symbol in gap_symbols:
+            gap = frames.get(symbol)
+            if gap is not None and not gap.empty:
+                store.write(symbol, "1d", gap, gap_start, gap_end)
+            elif not _has_trading_day(gap_start, gap_end):
+                store.mark_covered(symbol, "1d", gap_start, gap_end)
+
+    tail = {}
+    if end_d > cutoff:
+        tail = _download_daily_batch(symbols, cutoff.isoformat(), end_d.isoformat())
+
+    result = {}
+    for symbol in symbols:
+        parts = [store.read(symbol, "1d", start_d, cutoff), tail.get(symbol)]
+        parts = [p for p in parts if p is not None and not p.empty]
+        result[symbol] = pd.concat(parts, ignore_index=True) if parts else None
+
+    # Stored bars are served through an outage, but with nothing to serve
+    # the failure is raised so it isn't mistaken for "no data".
+    if error is not None and all(df is None for df in result.values()):
+        raise error
+    return result
+
+
+def _has_trading_day(start, end):
+    """True if [start, end) contains an NYSE session."""
+    day = start
+    while day < end:
+        if is_trading_day(day):
+            return True
+        day += datetime.timedelta(days=1)
+    return False
+
+
+def _split_tickers(data, symbols):
+    """
+    Split a yf.download result into one flat OHLCV frame per symbol.
+    Handles both (ticker, field) and (field, ticker) MultiIndex layouts
+    and single-ticker frames with plain columns. Rows where a symbol has
+    no data (e.g. another ticker's trading day) are dropped.
+    """
     if data is None or data.empty:
-        return None
+        return {symbol: None for symbol in symbols}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data.dropna(how="all")} if len(symbols) == 1 else \
+            {symbol: None for symbol in symbols}
+
+    level = 0 if set(symbols) & set(data.columns.get_level_values(0)) else 1
+    tickers = set(data.columns.get_level_values(level))
+
+    frames = {}
+    for symbol in symbols:
+        if symbol not in tickers:
+            frames[symbol] = None
+            continue
+        frame = data.xs(symbol, axis=1, level=level).dropna(how="all")
+        frame.columns.name = None
+        frames[symbol] = frame if not frame.empty else None
+    return frames
+
 
+def _download(symbols, **kwargs):
+    """
+    yf.download for several tickers. yfinance reports errors per ticker
+    instead of raising, so an empty result with a non-"no data" error
+    raises YahooDownloadError; an empty result without one means no data.
+    """
+    import yfinance as yf
+
+    data = yf.download(list(symbols), group_by="ticker", threads=True, progress=False, **kwargs)
+    if data is None or data.empty:
+        errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+        failed = {symbol: str(error) for symbol, error in errors.items()
+                  if not any(text in str(error).lower() for text in _NO_DATA_ERRORS)}
+        if failed:
+            raise YahooDownloadError("; ".join(f"{symbol}: {error}" for symbol, error in failed.items()))
+    return data
+
+
+def _download_daily_batch(symbols, start: str, end: str):
+    """
+    Download daily OHLCV data for several symbols in one Yahoo request.
+    Returns {symbol: DataFrame (Date/Open/Close/High/Low/Volume) or None}.
+    """
+    with timer("yahoo.download_daily"):
+        data = _download(symbols, start=start, end=end, interval="1d")
+    return {
+        symbol: _normalize_daily(frame) if frame is not None else None
+        for symbol, frame in _split_tickers(data, symbols).items()
+    }
+
+
+def _normalize_daily(data):
+    """
+    Normalize one symbol's daily frame to Date/Open/Close/High/Low/Volume.
+    Handles Yahoo Finance quirks and missing fields.
+    """
     df = data.reset_index()
 
     # Normalize date column